@@ -0,0 +1,30 @@
+"""Migration
+
+Revision ID: 5b1f3d8e2a07
+Revises: c4e2a9b71d53
+Create Date: 2026-10-17 11:02:18.504113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1f3d8e2a07'
+down_revision: Union[str, None] = 'c4e2a9b71d53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('body_hash', sa.String(length=32), sa.Computed("md5(coalesce(body, ''))", persisted=True), nullable=True))
+    op.create_index('ix_events_type_body_hash_created', 'events', ['event_type', 'body_hash', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_type_body_hash_created', table_name='events')
+    op.drop_column('events', 'body_hash')
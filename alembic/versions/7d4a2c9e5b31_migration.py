@@ -0,0 +1,30 @@
+"""Migration
+
+Revision ID: 7d4a2c9e5b31
+Revises: 9e3c6a4f0d12
+Create Date: 2026-10-17 15:41:09.318270
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4a2c9e5b31'
+down_revision: Union[str, None] = '9e3c6a4f0d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_events_retry_due', 'events', ['next_attempt_at'], unique=False, postgresql_where=sa.text("status = 'pending' AND next_attempt_at IS NOT NULL"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_retry_due', table_name='events', postgresql_where=sa.text("status = 'pending' AND next_attempt_at IS NOT NULL"))
+    op.drop_column('events', 'next_attempt_at')
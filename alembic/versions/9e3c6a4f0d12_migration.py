@@ -0,0 +1,160 @@
+"""Migration
+
+Revision ID: 9e3c6a4f0d12
+Revises: 5b1f3d8e2a07
+Create Date: 2026-10-17 13:27:05.921844
+
+Range-partition events by created_at (one partition per day, plus a default
+partition) so expired history can be dropped a partition at a time.
+"""
+from typing import Sequence, Union
+import os
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3c6a4f0d12'
+down_revision: Union[str, None] = '5b1f3d8e2a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# daily partitions created ahead of today; the service keeps extending this
+DAYS_AHEAD = 3
+
+_COLUMNS = (
+    "id, event_type, body, status, user_id, operation, expires_at, updated_by, "
+    "created_at, is_authorized, is_fast_track, error, retry_count, wait_time, "
+    "is_dependency_resolved, completed_in_seconds, receipt_handle"
+)
+
+_IDENT_RX = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _ident(x: str, env: str) -> str:
+    if not _IDENT_RX.match(x):
+        raise ValueError(f"{env} contains invalid identifier: {x!r}")
+    return x
+
+
+def _ql(s: str) -> str:
+    return s.replace("'", "''")
+
+
+def _event_columns():
+    return [
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('body_hash', sa.String(length=32), sa.Computed("md5(coalesce(body, ''))", persisted=True), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('operation', sa.String(length=100), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_by', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('is_authorized', sa.Boolean(), nullable=True),
+        sa.Column('is_fast_track', sa.Boolean(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('retry_count', sa.Integer(), nullable=True),
+        sa.Column('wait_time', sa.Integer(), nullable=True),
+        sa.Column('is_dependency_resolved', sa.Boolean(), nullable=True),
+        sa.Column('completed_in_seconds', sa.BigInteger(), nullable=True),
+        sa.Column('receipt_handle', sa.String(), nullable=True),
+    ]
+
+
+def _set_publication(publish_via_root: bool) -> None:
+    pubname = _ident(
+        os.getenv("PUBLICATION_NAME", "events_publication"), "PUBLICATION_NAME"
+    )
+    op.execute(
+        f"""
+  DO $plpgsql$
+  DECLARE
+    v_pub text := '{_ql(pubname)}';
+  BEGIN
+    IF EXISTS (SELECT 1 FROM pg_publication WHERE pubname = v_pub) THEN
+      PERFORM 1
+      FROM pg_publication_tables
+      WHERE pubname = v_pub AND schemaname = 'public' AND tablename = 'events';
+
+      IF NOT FOUND THEN
+        EXECUTE format('ALTER PUBLICATION %I ADD TABLE public.events', v_pub);
+      END IF;
+      EXECUTE format(
+        'ALTER PUBLICATION %I SET (publish_via_partition_root = {str(publish_via_root).lower()})',
+        v_pub
+      );
+    END IF;
+  END
+  $plpgsql$;
+  """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('events', 'events_unpartitioned')
+    op.execute('ALTER INDEX ix_events_id RENAME TO ix_events_unpartitioned_id')
+    op.execute('ALTER INDEX ix_events_type_body_hash_created RENAME TO ix_events_unpartitioned_type_body_hash_created')
+    op.execute('ALTER TABLE events_unpartitioned RENAME CONSTRAINT events_pkey TO events_unpartitioned_pkey')
+
+    op.create_table('events',
+    *_event_columns(),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    op.execute('CREATE TABLE events_default PARTITION OF events DEFAULT')
+    op.execute(
+        f"""
+  DO $plpgsql$
+  DECLARE
+    v_day date;
+    v_last date := (now() AT TIME ZONE 'utc')::date + {DAYS_AHEAD};
+  BEGIN
+    SELECT coalesce(min(created_at)::date, (now() AT TIME ZONE 'utc')::date)
+      INTO v_day FROM events_unpartitioned;
+    WHILE v_day <= v_last LOOP
+      EXECUTE format(
+        'CREATE TABLE %I PARTITION OF events FOR VALUES FROM (%L) TO (%L)',
+        'events_p' || to_char(v_day, 'YYYYMMDD'), v_day, v_day + 1
+      );
+      v_day := v_day + 1;
+    END LOOP;
+  END
+  $plpgsql$;
+  """
+    )
+    op.execute(f'INSERT INTO events ({_COLUMNS}) SELECT {_COLUMNS} FROM events_unpartitioned')
+    op.drop_table('events_unpartitioned')
+
+    op.create_index(op.f('ix_events_id'), 'events', ['id'], unique=False)
+    op.create_index('ix_events_type_body_hash_created', 'events', ['event_type', 'body_hash', 'created_at'], unique=False)
+    op.create_index('ix_events_operation_user_created', 'events', ['operation', 'user_id', 'created_at'], unique=False)
+    op.create_index('ix_events_expires_at', 'events', ['expires_at'], unique=False)
+
+    # publish changes under the parent's name so CDC keeps seeing "events"
+    _set_publication(True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('events', 'events_partitioned')
+    op.execute('ALTER INDEX ix_events_id RENAME TO ix_events_partitioned_id')
+    op.execute('ALTER INDEX ix_events_type_body_hash_created RENAME TO ix_events_partitioned_type_body_hash_created')
+    op.execute('ALTER TABLE events_partitioned RENAME CONSTRAINT events_pkey TO events_partitioned_pkey')
+
+    op.create_table('events',
+    *_event_columns(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(f'INSERT INTO events ({_COLUMNS}) SELECT {_COLUMNS} FROM events_partitioned')
+    op.drop_table('events_partitioned')
+
+    op.create_index(op.f('ix_events_id'), 'events', ['id'], unique=False)
+    op.create_index('ix_events_type_body_hash_created', 'events', ['event_type', 'body_hash', 'created_at'], unique=False)
+
+    _set_publication(False)
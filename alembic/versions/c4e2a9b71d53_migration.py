@@ -0,0 +1,34 @@
+"""Migration
+
+Revision ID: c4e2a9b71d53
+Revises: 107631f875cb
+Create Date: 2026-10-17 09:12:41.318270
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e2a9b71d53'
+down_revision: Union[str, None] = '107631f875cb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('event_stream_offsets',
+    sa.Column('consumer', sa.String(), nullable=False),
+    sa.Column('offset', sa.BigInteger(), nullable=True),
+    sa.Column('rewound_to', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('consumer')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('event_stream_offsets')
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from typing import AsyncGenerator
+import time
+from typing import AsyncGenerator, Optional, Tuple
 from contextlib import asynccontextmanager
 
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -18,17 +21,113 @@ class Base(DeclarativeBase):
         return cls.__name__.lower()
 
 
+class DatabaseStats:
+    """
+    Query latency and pool checkout wait, accumulated per window.
+    Whoever adapts to DB pressure calls ``drain()`` to read and reset the window.
+    """
+
+    def __init__(self) -> None:
+        self._query_seconds = 0.0
+        self._queries = 0
+        self._checkout_seconds = 0.0
+        self._checkouts = 0
+        self.total_queries = 0
+        self.total_checkouts = 0
+
+    def record_query(self, seconds: float) -> None:
+        self._query_seconds += seconds
+        self._queries += 1
+        self.total_queries += 1
+
+    def record_checkout(self, seconds: float) -> None:
+        self._checkout_seconds += seconds
+        self._checkouts += 1
+        self.total_checkouts += 1
+
+    def totals(self) -> dict:
+        return {
+            "total_queries": self.total_queries,
+            "total_checkouts": self.total_checkouts,
+        }
+
+    def drain(self) -> Tuple[Optional[float], Optional[float]]:
+        """Average query latency and checkout wait (seconds) since the last drain."""
+        query = self._query_seconds / self._queries if self._queries else None
+        checkout = (
+            self._checkout_seconds / self._checkouts if self._checkouts else None
+        )
+        self._query_seconds, self._queries = 0.0, 0
+        self._checkout_seconds, self._checkouts = 0.0, 0
+        return query, checkout
+
+
+def _timed_pool_class(stats: DatabaseStats):
+    class TimedQueuePool(AsyncAdaptedQueuePool):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            finally:
+                stats.record_checkout(time.perf_counter() - start)
+
+    return TimedQueuePool
+
+
 class Database:
-    def __init__(self, db_url: str) -> None:
+    def __init__(
+        self,
+        db_url: str,
+        pool_size: Optional[int] = None,
+        max_overflow: Optional[int] = None,
+        pool_timeout: Optional[float] = None,
+    ) -> None:
+        self.stats = DatabaseStats()
         self._engine = create_async_engine(
-            self._ensure_async_url(db_url), pool_pre_ping=True
+            self._ensure_async_url(db_url),
+            pool_pre_ping=True,
+            poolclass=_timed_pool_class(self.stats),
+            pool_size=pool_size or settings.DB_POOL_SIZE,
+            max_overflow=(
+                settings.DB_MAX_OVERFLOW if max_overflow is None else max_overflow
+            ),
+            pool_timeout=pool_timeout or settings.DB_POOL_TIMEOUT_SECONDS,
         )
+        self._instrument(self._engine.sync_engine)
         self._sessionmaker: async_sessionmaker[AsyncSession] = async_sessionmaker(
             bind=self._engine,
             expire_on_commit=False,
             autoflush=False,
         )
 
+    def _instrument(self, engine) -> None:
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info["query_start"].pop()
+            self.stats.record_query(time.perf_counter() - started)
+
+        @event.listens_for(engine, "handle_error")
+        def _error(ctx):
+            # a failed statement never reaches after_cursor_execute; without
+            # this its start would stay on the connection's stack
+            if ctx.connection is None or ctx.execution_context is None:
+                return
+            starts = ctx.connection.info.get("query_start")
+            if starts:
+                self.stats.record_query(time.perf_counter() - starts.pop())
+
+    def pool_status(self) -> dict:
+        pool = self._engine.sync_engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+
     @staticmethod
     def _ensure_async_url(url: str) -> str:
         if url.startswith("postgresql+asyncpg") or "+asyncpg" in url:
@@ -0,0 +1,241 @@
+"""
+In-process metrics with Prometheus text exposition (served at /metrics).
+
+Metrics are module-level objects registered on ``REGISTRY`` when created;
+components that already keep their own numbers (``stats()`` dicts) are
+exported through collectors instead, read at scrape time.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+# (name, help, type, samples)
+Family = Tuple[str, str, str, List[Sample]]
+Collector = Callable[[], Iterable[Family]]
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        body = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+        return f"{name}{{{body}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: "_Metric") -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def register_collector(self, collector: Collector) -> None:
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def unregister_collector(self, collector: Collector) -> None:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def collect(self) -> Iterable[Family]:
+        for metric in self._metrics.values():
+            yield metric.collect()
+        for collector in list(self._collectors):
+            yield from collector()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, help_text, kind, samples in self.collect():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(_format_sample(sample_name, labels, value))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def collect(self) -> Family:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> Family:
+        samples = [
+            (f"{self.name}_total", self._labels(k), v) for k, v in self._values.items()
+        ]
+        return (f"{self.name}_total", self.help, self.kind, samples)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> Family:
+        samples = [(self.name, self._labels(k), v) for k, v in self._values.items()]
+        return (self.name, self.help, self.kind, samples)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = REGISTRY,
+    ) -> None:
+        super().__init__(name, help_text, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def collect(self) -> Family:
+        samples: List[Sample] = []
+        for key, counts in self._counts.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = "+Inf" if math.isinf(bound) else _format_value(bound)
+                bucket_labels = {**labels, "le": le}
+                samples.append((f"{self.name}_bucket", bucket_labels, cumulative))
+            samples.append((f"{self.name}_sum", labels, self._sums[key]))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return (self.name, self.help, self.kind, samples)
+
+
+def stats_collector(
+    prefix: str,
+    help_text: str,
+    source: Callable[[], Dict[str, float]],
+    counters: Iterable[str] = (),
+) -> Collector:
+    """
+    Export a component's numeric ``stats()`` entries. Running totals, the
+    ``total_*`` entries plus any named in ``counters``, are counters named
+    ``<prefix>_<name>_total``; everything else is a gauge.
+    """
+    counters = frozenset(counters)
+
+    def collect() -> Iterable[Family]:
+        for key, value in source().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key.startswith("total_") or key in counters:
+                base = key[len("total_") :] if key.startswith("total_") else key
+                name = f"{prefix}_{base}_total"
+                yield (name, f"{help_text}: {key}", "counter", [(name, {}, value)])
+            else:
+                name = f"{prefix}_{key}"
+                yield (name, f"{help_text}: {key}", "gauge", [(name, {}, value)])
+
+    return collect
@@ -5,7 +5,7 @@ from app.infrastructure.db.models.asset import Asset
 from app.domain.schemas.asset import AssetCreate
 from app.domain.schemas.asset import AssetObjectType
 from app.domain.schemas.search import SimpleClause
-from typing import List, Tuple
+from typing import Any, Dict, List, Literal, Sequence, Tuple, Union
 
 
 class AssetRepository(Repository, Protocol):
@@ -24,8 +24,15 @@ class AssetRepository(Repository, Protocol):
     ) -> Optional[Asset]: ...
 
     async def bulk_upsert(
-        self, schemas: List[AssetCreate], default_asset_group_id: str, is_partial: bool
-    ) -> List[Asset]: ...
+        self,
+        schemas: List[AssetCreate],
+        default_asset_group_id: str,
+        is_partial: bool,
+        use_copy: Optional[bool] = None,
+        on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+        return_mode: Literal["none", "ids", "full"] = "full",
+        loaders: Optional[Sequence[Any]] = None,
+    ) -> Union[Dict[str, int], List[str], List[Asset]]: ...
 
     async def search_simple(
         self,
@@ -49,4 +56,21 @@ class AssetRepository(Repository, Protocol):
 
     async def soft_delete(self, id: str, user_id: str) -> Optional[Asset]: ...
 
-    async def delete_by_ids(self, ids: List[str]) -> int: ...
+    async def fetch_descendant_ids(
+        self, ancestor_ids: List[str], min_depth: int, max_depth: int
+    ) -> List[str]: ...
+
+    async def purge_subtrees(
+        self,
+        root_ids: List[str],
+        min_depth: int = 0,
+        max_depth: int = 2,
+        chunk_size: int = 1000,
+        lock_timeout_ms: Optional[int] = None,
+        chunk_timeout_ms: Optional[int] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, int]: ...
+
+    async def delete_by_ids(
+        self, ids: List[str], chunk_size: Optional[int] = None
+    ) -> int: ...
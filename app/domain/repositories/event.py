@@ -1,5 +1,7 @@
-from typing import List, Optional, Protocol
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+from datetime import datetime
 from app.infrastructure.db.models.event import Event
+from app.infrastructure.db.models.event_stream_offset import EventStreamOffset
 from app.domain.repositories.base import Repository
 from app.domain.schemas.events import Event as EventSchema
 
@@ -16,6 +18,8 @@ class EventRepository(Repository, Protocol):
 
     async def get_duplicate_records(self, event: EventSchema) -> List[Event]: ...
 
+    async def has_duplicate_record(self, event: EventSchema) -> bool: ...
+
     async def get_wait_time(self, event_id: str) -> Optional[int]: ...
 
     async def update_status_and_times(
@@ -26,4 +30,52 @@ class EventRepository(Repository, Protocol):
         completed_in_seconds: Optional[int] = None,
     ) -> None: ...
 
-    async def get_dependent_records(self, record: EventSchema) -> List[Event]: ...
+    async def bulk_update_status_and_times(
+        self, rows: List[Dict[str, Any]]
+    ) -> int: ...
+
+    async def claim_due_retries(
+        self,
+        limit: int = 100,
+        grace_seconds: float = 0,
+        lease_seconds: float = 300,
+        now: Optional[datetime] = None,
+        partitions: int = 0,
+        owned: Optional[Sequence[int]] = None,
+    ) -> List[Event]: ...
+
+    async def list_unfinished_in_partition(
+        self,
+        partition: int,
+        partitions: int,
+        created_before: datetime,
+        after: Optional[tuple] = None,
+        limit: int = 500,
+    ) -> List[Event]: ...
+
+    async def get_dependency_summary(
+        self, record: EventSchema, event_types: Iterable[str]
+    ) -> Dict[str, Tuple[bool, bool]]: ...
+
+    async def delete_expired_events(
+        self, limit: int = 1000, now: Optional[datetime] = None
+    ) -> int: ...
+
+    async def get_stream_offset(self, consumer: str) -> Optional[EventStreamOffset]: ...
+
+    async def save_stream_offset(
+        self,
+        consumer: str,
+        offset: Optional[int],
+        rewound_to: Optional[datetime] = None,
+    ) -> None: ...
+
+    async def list_partitions(self) -> List[str]: ...
+
+    async def ensure_partitions(
+        self, days_ahead: int = 3, now: Optional[datetime] = None
+    ) -> List[str]: ...
+
+    async def drop_expired_partitions(
+        self, now: Optional[datetime] = None, lock_timeout_ms: int = 5000
+    ) -> List[str]: ...
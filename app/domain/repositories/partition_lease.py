@@ -0,0 +1,18 @@
+from typing import List, Protocol
+
+
+class PartitionLeaseRepository(Protocol):
+    @property
+    def is_open(self) -> bool: ...
+
+    async def open(self) -> None: ...
+
+    async def close(self) -> None: ...
+
+    async def try_lock(self, namespace: int, key: int) -> bool: ...
+
+    async def unlock(self, namespace: int, key: int) -> bool: ...
+
+    async def count_holders(self, namespace: int) -> int: ...
+
+    async def held_keys(self, namespace: int) -> List[int]: ...
@@ -1,8 +1,9 @@
 from enum import Enum
 from dataclasses import dataclass, field
-from typing import Optional, Any
-import json
-from datetime import datetime
+from typing import Optional, Any, Callable, Dict, Union
+from datetime import datetime, timezone
+import hashlib
+import orjson
 from pydantic import BaseModel, ConfigDict
 
 
@@ -151,6 +152,7 @@ class Event(BaseModel):
     is_authorized: bool = True
     is_fast_track: bool = False
     retry_count: int = 0
+    next_attempt_at: Optional[datetime] = None
     wait_time: Optional[int] = None
     error: Optional[str] = None
     is_dependency_resolved: bool = False
@@ -159,54 +161,113 @@ class Event(BaseModel):
     receipt_handle: Optional[str] = None
 
 
+def decode_debezium_envelope(message_body: Union[bytes, str]) -> Dict[str, Any]:
+    """Parse a Debezium JSON envelope straight from the raw message body."""
+    return orjson.loads(message_body)
+
+
+def is_pending_change(after: Dict[str, Any]) -> bool:
+    return (after.get("status") or "").lower() == EventStatus.PENDING.value
+
+
+def is_scheduled_retry(after: Dict[str, Any]) -> bool:
+    """A PENDING image written by the retry path; the retry is delivered from there."""
+    return after.get("next_attempt_at") is not None
+
+
+def body_hash(body: Optional[str]) -> str:
+    """Same fingerprint as the generated events.body_hash column."""
+    return hashlib.md5((body or "").encode()).hexdigest()
+
+
+def event_partition(
+    operation: Union[Operation, str, None], user_id: Optional[str], partitions: int
+) -> int:
+    """
+    Stream partition of an event: md5 of ``operation|user_id``, first 32 bits,
+    modulo ``partitions``. Matches EventRepository's SQL, so ownership can be
+    checked on the stream and queried in Postgres alike.
+    """
+    op = operation.value if isinstance(operation, Enum) else (operation or "")
+    digest = hashlib.md5(f"{op}|{user_id or ''}".encode()).hexdigest()
+    return int(digest[:8], 16) % partitions
+
+
+def naive_utc(dt: datetime) -> datetime:
+    """events timestamps are naive UTC, like the columns they are compared to."""
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_debezium_timestamp(value: Any) -> Optional[datetime]:
+    """Parse various timestamp formats from Debezium, as naive UTC"""
+    if value is None or value == "":
+        return None
+
+    try:
+        # MicroTimestamp (default time.precision.mode): microseconds since epoch
+        if isinstance(value, (int, float)):
+            return naive_utc(
+                datetime.fromtimestamp(value / 1_000_000, tz=timezone.utc)
+            )
+        # Try ISO format first
+        if "T" in value:
+            return naive_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+        # Try Unix timestamp (milliseconds)
+        elif value.isdigit():
+            return naive_utc(
+                datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc)
+            )
+        # Fallback to current time
+        else:
+            return naive_utc(datetime.now(timezone.utc))
+    except (ValueError, TypeError, OverflowError):
+        return naive_utc(datetime.now(timezone.utc))
+
+
 @dataclass
 class EventContext:
     event: Event
     context: Any = None
+    # position on the events stream, when delivered from it
+    stream_offset: Optional[int] = None
+    # called once the event's final status has been committed
+    on_done: Optional[Callable[[], None]] = field(default=None, repr=False)
+
+    @classmethod
+    def from_debezium_message(cls, message_body: Union[bytes, str]) -> "EventContext":
+        data = decode_debezium_envelope(message_body)
+        return cls.from_debezium_after(data.get("after") or {})
 
     @classmethod
-    def from_debezium_message(cls, message_body: str) -> "EventContext":
-        data = json.loads(message_body)
-        after_data = data.get("after", {})
-        created_at = cls._parse_timestamp(after_data.get("created_at"))
-        expires_at = cls._parse_timestamp(after_data.get("expires_at"))
-        event = Event(
-            id=after_data.get("id", ""),
-            event_type=after_data.get("event_type", ""),
-            body=after_data.get("body", ""),
-            status=EventStatus(after_data.get("status", EventStatus.PENDING)),
-            user_id=after_data.get("user_id", ""),
-            operation=Operation(after_data.get("operation", "")),
-            expires_at=expires_at,
-            updated_by=after_data.get("updated_by", ""),
-            created_at=created_at,
-            is_authorized=after_data.get("is_authorized", True),
-            is_fast_track=after_data.get("is_fast_track", False),
-            error=after_data.get("error"),
-            retry_count=after_data.get("retry_count", 0),
-            wait_time=after_data.get("wait_time"),
-            is_dependency_resolved=after_data.get("is_dependency_resolved", False),
-            completed_in_seconds=after_data.get("completed_in_seconds"),
-            receipt_handle=after_data.get("receipt_handle"),
+    def from_debezium_after(cls, after_data: Dict[str, Any]) -> "EventContext":
+        """Build the context from an already-decoded ``after`` image."""
+        event = Event.model_validate(
+            {
+                "id": after_data.get("id") or "",
+                "event_type": after_data.get("event_type", ""),
+                "body": after_data.get("body") or "",
+                "status": after_data.get("status") or EventStatus.PENDING,
+                "user_id": after_data.get("user_id") or "",
+                "operation": after_data.get("operation", ""),
+                "expires_at": parse_debezium_timestamp(after_data.get("expires_at")),
+                "updated_by": after_data.get("updated_by") or "",
+                "created_at": parse_debezium_timestamp(after_data.get("created_at")),
+                "is_authorized": after_data.get("is_authorized", True),
+                "is_fast_track": bool(after_data.get("is_fast_track")),
+                "error": after_data.get("error"),
+                "retry_count": after_data.get("retry_count") or 0,
+                "next_attempt_at": parse_debezium_timestamp(
+                    after_data.get("next_attempt_at")
+                ),
+                "wait_time": after_data.get("wait_time"),
+                "is_dependency_resolved": bool(
+                    after_data.get("is_dependency_resolved")
+                ),
+                "completed_in_seconds": after_data.get("completed_in_seconds"),
+                "receipt_handle": after_data.get("receipt_handle"),
+            }
         )
 
         return cls(event=event)
-
-    @staticmethod
-    def _parse_timestamp(timestamp_str: Optional[str]) -> Optional[datetime]:
-        """Parse various timestamp formats from Debezium"""
-        if not timestamp_str:
-            return None
-
-        try:
-            # Try ISO format first
-            if "T" in timestamp_str:
-                return datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
-            # Try Unix timestamp (milliseconds)
-            elif timestamp_str.isdigit():
-                return datetime.fromtimestamp(int(timestamp_str) / 1000)
-            # Fallback to current time
-            else:
-                return datetime.now()
-        except (ValueError, TypeError):
-            return datetime.now()
@@ -24,3 +24,4 @@ from app.infrastructure.db.models.lineage import Lineage
 
 
 from app.infrastructure.db.models.event import Event
+from app.infrastructure.db.models.event_stream_offset import EventStreamOffset
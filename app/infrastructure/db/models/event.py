@@ -6,6 +6,9 @@ from sqlalchemy import (
     DateTime,
     Text,
     BigInteger,
+    Computed,
+    Index,
+    text,
 )
 from app.infrastructure.db.models.base import Base
 from sqlalchemy.sql import func
@@ -18,17 +21,46 @@ class Event(Base):
     id = Column(String, primary_key=True, index=True)
     event_type = Column(String(100), nullable=False)
     body = Column(Text)
+    # fingerprint for duplicate checks; filled by Postgres on every insert/update
+    body_hash = Column(String(32), Computed("md5(coalesce(body, ''))", persisted=True))
     status = Column(String(20), default=EventStatus.PENDING)
     user_id = Column(String, nullable=False)
     operation = Column(String(100), nullable=False)
     expires_at = Column(DateTime, nullable=False)
     updated_by = Column(String, nullable=False)
-    created_at = Column(DateTime, nullable=False, default=func.now())
+    # partition key of the range-partitioned table, hence part of the PK
+    created_at = Column(
+        DateTime, primary_key=True, nullable=False, default=func.now()
+    )
     is_authorized = Column(Boolean, default=True)
     is_fast_track = Column(Boolean, default=False)
     error = Column(Text)
     retry_count = Column(Integer, default=0)
+    # when a PENDING retry is due; NULL for events not waiting on a retry
+    next_attempt_at = Column(DateTime)
     wait_time = Column(Integer)
     is_dependency_resolved = Column(Boolean, default=False)
     completed_in_seconds = Column(BigInteger)
     receipt_handle = Column(String)
+
+    __table_args__ = (
+        # duplicate detection: same type + body, created later
+        Index(
+            "ix_events_type_body_hash_created", "event_type", "body_hash", "created_at"
+        ),
+        # dependency lookups: earlier events of the same operation/user
+        Index(
+            "ix_events_operation_user_created", "operation", "user_id", "created_at"
+        ),
+        Index("ix_events_expires_at", "expires_at"),
+        # retry sweeper: due retries only, so the index stays small
+        Index(
+            "ix_events_retry_due",
+            "next_attempt_at",
+            postgresql_where=text(
+                "status = 'pending' AND next_attempt_at IS NOT NULL"
+            ),
+        ),
+        # one partition per day: events_pYYYYMMDD, plus events_default
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from app.infrastructure.db.models.base import Base
+from sqlalchemy.sql import func
+
+
+# last committed offset per consumer of the events stream
+class EventStreamOffset(Base):
+    __tablename__ = "event_stream_offsets"
+
+    consumer = Column(String, primary_key=True)
+    offset = Column(BigInteger)
+    rewound_to = Column(DateTime(timezone=True))
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
@@ -1,7 +1,39 @@
 from uuid import uuid4
+import asyncio
 import re
-from typing import Any, Optional, Callable, AsyncContextManager, Dict, List, Set, Tuple
-from sqlalchemy import select, func, or_, not_, and_, update as sql_update, delete
+from typing import (
+    Any,
+    Optional,
+    Callable,
+    AsyncContextManager,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+from sqlalchemy import (
+    Column,
+    String,
+    any_,
+    bindparam,
+    column,
+    select,
+    func,
+    literal_column,
+    or_,
+    not_,
+    and_,
+    update as sql_update,
+    delete,
+    exists,
+    table,
+    text,
+)
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session, joinedload, selectinload, load_only
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.domain.schemas.asset import AssetCreate, AssetObjectType, FullTag
@@ -9,11 +41,16 @@ from app.domain.schemas.types import Type
 from app.infrastructure.db.models.asset_tag_link import AssetTagLink
 from app.infrastructure.db.repositories.base import BaseRepository
 from app.infrastructure.db.models.asset import Asset
+from app.infrastructure.db.models.asset_data_sharing import asset_data_sharing
+from app.infrastructure.db.models.asset_ext_connection import asset_ext_connection
+from app.infrastructure.db.models.asset_ext_owner import asset_ext_owner
+from app.infrastructure.db.models.asset_ext_tag import asset_ext_tag
 from app.infrastructure.db.models.data_sharing import DataSharing
 from app.infrastructure.db.models.ext_tag import ExtTag
 from app.infrastructure.db.models.ext_owner import ExtOwner
 from app.infrastructure.db.models.ext_connection import ExtConnection
 from app.infrastructure.db.models.ext_source import ExtSource
+from app.infrastructure.db.models.ext_connection_sources import ext_connection_source
 from app.infrastructure.db.models.statistics import Statistics
 from app.infrastructure.db.models.asset_group import AssetGroup
 from app.infrastructure.db.models.asset_path import AssetPath
@@ -21,7 +58,7 @@ from app.infrastructure.db.models.property_set import PropertySet
 from app.infrastructure.db.models.asset_property_set import AssetPropertySet
 from app.infrastructure.db.models.property_set_property import PropertySetProperty
 from app.infrastructure.db.models.property import Property
-from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from app.utils.casting import to_float, to_int
 from app.domain.schemas.search import SimpleClause
 from sqlalchemy.sql.elements import ColumnElement
@@ -35,11 +72,58 @@ FIELD_MAP: dict[str, ColumnElement] = {
 }
 
 
+# lock_not_available, query_canceled (lock_timeout / statement_timeout)
+_TIMEOUT_SQLSTATES = {"55P03", "57014"}
+
+
+def _is_timeout(e: DBAPIError) -> bool:
+    code = getattr(e.orig, "sqlstate", None) or getattr(e.orig, "pgcode", None)
+    return code in _TIMEOUT_SQLSTATES
+
+
+# Columns written by bulk_upsert, in staging-table order
+UPSERT_COLUMNS = (
+    "id",
+    "service_name",
+    "physical_name",
+    "is_lost",
+    "is_csv_imported",
+    "is_archived",
+    "asset_type",
+    "comment_on_ddl",
+    "ddl_statement",
+    "data_type",
+    "ordinal_position",
+    "record_updated_at",
+    "ext_url",
+    "ext_access_count",
+    "ext_name",
+    "ext_description",
+    "logical_name",
+    "description",
+    "version",
+)
+UPSERT_STAGE_TABLE = "_assets_upsert_stage"
+
+
 class AssetRepository(BaseRepository):
     def __init__(
-        self, session_factory: Callable[[], AsyncContextManager[AsyncSession]]
+        self,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]],
+        copy_min_rows: int = 0,
+        upsert_max_params: int = 30000,
+        upsert_max_chunk_bytes: int = 8 * 1024 * 1024,
+        upsert_parallelism: int = 4,
     ):
         super().__init__(session_factory, Asset)
+        # bulk_upsert batches at least this large go through COPY; 0 = never
+        self.copy_min_rows = copy_min_rows
+        # bulk_upsert chunk bounds: bind parameters (Postgres caps them at
+        # 32767) and approximate payload size of the incoming schemas
+        self.upsert_max_params = max(1, upsert_max_params)
+        self.upsert_max_chunk_bytes = max(1, upsert_max_chunk_bytes)
+        # chunks in flight at once, each on its own connection
+        self.upsert_parallelism = max(1, upsert_parallelism)
 
     async def find_or_create(self, id: str) -> Asset:
         async with self.session_factory() as session:
@@ -130,47 +214,207 @@ class AssetRepository(BaseRepository):
         schemas: List[AssetCreate],
         default_asset_group_id: str,
         is_partial: bool,
-    ) -> List[Asset]:
+        use_copy: Optional[bool] = None,
+        on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+        return_mode: Literal["none", "ids", "full"] = "full",
+        loaders: Optional[Sequence[Any]] = None,
+    ) -> Union[Dict[str, int], List[str], List[Asset]]:
         """
         Bulk upsert Assets, then upsert/attach relationships efficiently.
-        Returns the list of ORM Asset rows (refreshed).
+        ``return_mode`` picks what comes back: "none" the inserted/updated/
+        unchanged/chunks summary, "ids" the upserted asset ids in input order,
+        "full" the Asset rows, reloaded after commit in one query with
+        ``loaders`` (by default the relationships bulk_upsert writes).
+        ``use_copy`` forces the COPY staging ingest on or off; by default it is
+        used for batches of at least ``copy_min_rows``.
+
+        The batch is split into chunks bounded by ``upsert_max_params`` and
+        ``upsert_max_chunk_bytes``, each upserted and committed in its own
+        transaction. Up to ``upsert_parallelism`` chunks run at once; a chunk
+        sharing an asset or related row with one in flight waits for it, so
+        chunks never race on the same rows and later rows still win.
+        ``on_progress(summary)`` is called after every chunk with the running
+        inserted/updated/unchanged/chunks counts. If a chunk fails, no further
+        chunks are started and the error is raised once the running ones
+        finish; chunks already committed stay committed.
         """
+        summary = {"inserted": 0, "updated": 0, "unchanged": 0, "chunks": 0}
         if not schemas:
-            return []
+            return summary if return_mode == "none" else []
+        if use_copy is None:
+            use_copy = 0 < self.copy_min_rows <= len(schemas)
+
+        errors: List[BaseException] = []
+        slots = asyncio.Semaphore(self.upsert_parallelism)
+        busy: Set[Tuple[str, str]] = set()
+        released = asyncio.Condition()
+
+        async def run(chunk: List[AssetCreate], keys) -> None:
+            try:
+                counts = await self._upsert_chunk(
+                    chunk, default_asset_group_id, is_partial, use_copy
+                )
+                for key, n in counts.items():
+                    summary[key] += n
+                summary["chunks"] += 1
+                if on_progress is not None:
+                    on_progress(dict(summary))
+            except BaseException as e:
+                errors.append(e)
+                raise
+            finally:
+                slots.release()
+                async with released:
+                    busy.difference_update(keys)
+                    released.notify_all()
+
+        tasks: List[asyncio.Task] = []
+        for chunk in self._chunk_schemas(schemas, use_copy):
+            keys = self._chunk_keys(chunk)
+            await slots.acquire()
+            async with released:
+                await released.wait_for(lambda: busy.isdisjoint(keys))
+                busy.update(keys)
+            if errors:
+                slots.release()
+                break
+            tasks.append(asyncio.create_task(run(chunk, keys)))
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if errors:
+            raise errors[0]
+
+        if return_mode == "none":
+            return summary
+        ids = list(dict.fromkeys(s.id for s in schemas))
+        if return_mode == "ids":
+            return ids
+        return await self._fetch_upserted(ids, loaders)
+
+    def _upsert_loaders(self):
+        return (
+            selectinload(Asset.statistics),
+            selectinload(Asset.data_sharing),
+            selectinload(Asset.ext_tags),
+            selectinload(Asset.ext_owners),
+            selectinload(Asset.asset_groups),
+            selectinload(Asset.ext_connections).selectinload(ExtConnection.ext_sources),
+        )
 
+    async def _fetch_upserted(
+        self, ids: List[str], loaders: Optional[Sequence[Any]]
+    ) -> List[Asset]:
+        """``ids`` as Asset rows in the same order, in one query plus loaders."""
+        async with self.session_factory() as session:
+            rs = await session.execute(
+                select(Asset)
+                .where(Asset.id == any_(bindparam("ids", ids, type_=ARRAY(String))))
+                .options(*(self._upsert_loaders() if loaders is None else loaders))
+            )
+            by_id = {a.id: a for a in rs.scalars().unique()}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def _chunk_schemas(
+        self, schemas: List[AssetCreate], use_copy: bool
+    ) -> Iterator[List[AssetCreate]]:
+        """
+        Consecutive runs of ``schemas`` within the parameter and size bounds.
+        COPY binds no per-row parameters for the asset row itself; the
+        relationship lookups bind one per related id either way.
+        """
+        row_params = 0 if use_copy else len(UPSERT_COLUMNS)
+        chunk: List[AssetCreate] = []
+        params = size = 0
+        for s in schemas:
+            s_params = row_params + len(self._related_keys(s)) + 1
+            s_size = len(s.model_dump_json())
+            if chunk and (
+                params + s_params > self.upsert_max_params
+                or size + s_size > self.upsert_max_chunk_bytes
+            ):
+                yield chunk
+                chunk, params, size = [], 0, 0
+            chunk.append(s)
+            params += s_params
+            size += s_size
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _related_keys(s: AssetCreate) -> Set[Tuple[str, str]]:
+        """Rows besides the asset's own that upserting ``s`` writes to."""
+        keys = {("data_sharing", o.global_id) for o in s.data_sharing or ()}
+        keys.update(("ext_tag", t.ext_tag_id) for t in s.ext_tag or ())
+        keys.update(("ext_owner", o.ext_owner_id) for o in s.ext_owner or ())
+        for c in s.ext_connection or ():
+            keys.add(("ext_connection", c.ext_table_id))
+            keys.update(
+                ("ext_source", src.id) for src in getattr(c, "sources", None) or ()
+            )
+        return keys
+
+    def _chunk_keys(self, chunk: List[AssetCreate]) -> Set[Tuple[str, str]]:
+        keys: Set[Tuple[str, str]] = set()
+        for s in chunk:
+            keys.add(("asset", s.id))
+            keys |= self._related_keys(s)
+        return keys
+
+    async def _upsert_chunk(
+        self,
+        schemas: List[AssetCreate],
+        default_asset_group_id: str,
+        is_partial: bool,
+        use_copy: bool,
+    ) -> Dict[str, int]:
         async with self.session_factory() as session:
             # 1) Upsert main asset rows, return ORM objects (already persistent)
-            assets = await self._bulk_upsert_assets(session, schemas, is_partial)
+            assets, counts = await self._bulk_upsert_assets(
+                session, schemas, is_partial, use_copy
+            )
 
             # 2) Build id->Asset map
             asset_by_id: Dict[str, Asset] = {a.id: a for a in assets}
 
             # 3) Relationships (each helper handles its own selects/adds)
-            await self._process_bulk_data_sharing(session, asset_by_id, schemas)
-            await self._process_bulk_ext_tags(session, asset_by_id, schemas)
-            await self._process_bulk_ext_owners(session, asset_by_id, schemas)
-            await self._process_bulk_ext_connections(session, asset_by_id, schemas)
+            await self._process_bulk_data_sharing(session, schemas)
+            await self._process_bulk_ext_tags(session, schemas)
+            await self._process_bulk_ext_owners(session, schemas)
+            await self._process_bulk_ext_connections(session, schemas)
             await self._process_bulk_statistics(session, asset_by_id, schemas)
             await self._process_bulk_asset_groups(
                 session, asset_by_id, schemas, default_asset_group_id
             )
 
-            # 4) Commit once
+            # 4) Commit the chunk; callers wanting rows reload them in one go
             await session.commit()
-
-            # 5) Refresh assets to reflect relationship changes
-            for a in assets:
-                await session.refresh(a)
-
-            return assets
+            return counts
 
     async def _bulk_upsert_assets(
-        self, session: AsyncSession, schemas: List[AssetCreate], is_partial: bool
-    ) -> List[Asset]:
-        """Bulk upsert top-level Asset fields using INSERT ... ON CONFLICT DO UPDATE ... RETURNING."""
+        self,
+        session: AsyncSession,
+        schemas: List[AssetCreate],
+        is_partial: bool,
+        use_copy: bool = False,
+    ) -> Tuple[List[Asset], Dict[str, int]]:
+        """
+        Bulk upsert top-level Asset fields using INSERT ... ON CONFLICT DO UPDATE ... RETURNING.
+        With ``use_copy`` the rows are COPYed into a staging table and merged with
+        INSERT ... SELECT instead of being bound as one multi-VALUES statement.
+        Returns the assets and their inserted/updated/unchanged counts.
+        """
         insert_rows: List[Dict[str, Any]] = []
         non_null_columns: Set[str] = set()
 
+        # Existence only matters for the logical_name override; one query for all
+        existing_ids = await self._existing_ids(
+            session,
+            [
+                s.id
+                for s in schemas
+                if s.logical_name is not None and s.override_logical_name == "new_asset"
+            ],
+        )
+
         for s in schemas:
             # Custom logical_name rules
             logical_name = s.logical_name
@@ -178,10 +422,7 @@ class AssetRepository(BaseRepository):
 
             if logical_name is not None and s.override_logical_name == "new_asset":
                 # Only override for existing rows; if brand-new it’s fine to keep the provided one
-                exists_stmt = (
-                    select(func.count()).select_from(Asset).where(Asset.id == s.id)
-                )
-                exists = (await session.scalar(exists_stmt)) or 0
+                exists = s.id in existing_ids
                 if exists and s.csv_custom_data:
                     logical_name = s.csv_custom_data.logical_name
                 elif exists:
@@ -191,27 +432,7 @@ class AssetRepository(BaseRepository):
             row.update({"id": s.id})
 
             # Ensure all expected columns present (fill None)
-            expected = [
-                "service_name",
-                "physical_name",
-                "is_lost",
-                "is_csv_imported",
-                "is_archived",
-                "asset_type",
-                "comment_on_ddl",
-                "ddl_statement",
-                "data_type",
-                "ordinal_position",
-                "record_updated_at",
-                "ext_url",
-                "ext_access_count",
-                "ext_name",
-                "ext_description",
-                "logical_name",
-                "description",
-                "version",
-            ]
-            for col in expected:
+            for col in UPSERT_COLUMNS:
                 row.setdefault(col, None)
 
             insert_rows.append(row)
@@ -223,15 +444,83 @@ class AssetRepository(BaseRepository):
             col: getattr(excluded, col) for col in non_null_columns if col not in ("id")
         }
 
-        stmt = pg_insert(self.model).values(insert_rows)
+        if use_copy:
+            stmt = await self._stage_rows(session, insert_rows)
+        else:
+            stmt = pg_insert(self.model).values(insert_rows)
 
+        # Rows whose SET columns already hold the incoming values are left
+        # alone (no new row version) and not returned; xmax = 0 marks inserts
+        table_cols = self.model.__table__.c
         stmt = stmt.on_conflict_do_update(
             index_elements=[self.model.id],
             set_=set_map,
-        ).returning(self.model)
+            where=(
+                or_(*(table_cols[c].is_distinct_from(v) for c, v in set_map.items()))
+                if set_map
+                else None
+            ),
+        ).returning(self.model, literal_column("xmax = 0").label("inserted"))
 
         res = await session.execute(stmt)
-        return list(res.scalars())
+        assets: List[Asset] = []
+        inserted = 0
+        for asset, was_inserted in res.all():
+            assets.append(asset)
+            inserted += bool(was_inserted)
+
+        unchanged_ids = {s.id for s in schemas} - {a.id for a in assets}
+        if unchanged_ids:
+            rs = await session.execute(
+                select(self.model).where(
+                    self.model.id
+                    == any_(bindparam("ids", list(unchanged_ids), type_=ARRAY(String)))
+                )
+            )
+            assets.extend(rs.scalars())
+
+        counts = {
+            "inserted": inserted,
+            "updated": len(assets) - inserted - len(unchanged_ids),
+            "unchanged": len(unchanged_ids),
+        }
+        return assets, counts
+
+    async def _stage_rows(self, session: AsyncSession, rows: List[Dict[str, Any]]):
+        """
+        COPY ``rows`` into a temp table (dropped on commit) and return an
+        INSERT ... SELECT from it into assets. The staging table is built from
+        the assets columns without their NOT NULL constraints, so it takes the
+        rows exactly as the VALUES path would bind them.
+        """
+        conn = await session.connection()
+        await conn.execute(
+            text(
+                f"CREATE TEMP TABLE {UPSERT_STAGE_TABLE} ON COMMIT DROP AS "
+                f"SELECT {', '.join(UPSERT_COLUMNS)} FROM assets WITH NO DATA"
+            )
+        )
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            UPSERT_STAGE_TABLE,
+            records=[tuple(row[col] for col in UPSERT_COLUMNS) for row in rows],
+            columns=list(UPSERT_COLUMNS),
+        )
+        stage = table(UPSERT_STAGE_TABLE, *(column(col) for col in UPSERT_COLUMNS))
+        return pg_insert(self.model).from_select(
+            list(UPSERT_COLUMNS), select(*stage.c)
+        )
+
+    async def _existing_ids(self, session: AsyncSession, ids: List[str]) -> Set[str]:
+        """Which of ``ids`` already have a row, bound as a single array parameter."""
+        if not ids:
+            return set()
+        rs = await session.execute(
+            select(Asset.id).where(
+                Asset.id == any_(bindparam("ids", list(set(ids)), type_=ARRAY(String)))
+            )
+        )
+        return set(rs.scalars())
 
     def _get_updatable_columns(
         self,
@@ -264,287 +553,190 @@ class AssetRepository(BaseRepository):
         return cols
 
     async def _process_bulk_data_sharing(
-        self,
-        session: AsyncSession,
-        asset_by_id: Dict[str, Asset],
-        schemas: List[AssetCreate],
+        self, session: AsyncSession, schemas: List[AssetCreate]
     ) -> None:
-        all_ids: Set[str] = set()
-        desired_map: Dict[str, Set[str]] = {}
-
+        rows: Dict[str, Dict[str, Any]] = {}
+        desired: Dict[str, Set[str]] = {}
         for s in schemas:
             if s.data_sharing is None:
                 continue
-            desired = {o.global_id for o in s.data_sharing}
-            desired_map[s.id] = desired
-            all_ids |= desired
-
-        existing: Dict[str, DataSharing] = {}
-        if all_ids:
-            rs = await session.execute(
-                select(DataSharing).where(DataSharing.id.in_(all_ids))
-            )
-            existing = {ds.id: ds for ds in rs.scalars()}
-
-        for s in schemas:
-            if s.data_sharing is None:
-                continue
-            asset = asset_by_id[s.id]
-            if not s.is_csv_imported or not asset.data_sharing:
-                asset.data_sharing.clear()
-
-            desired = desired_map.get(s.id, set())
-            # upsert-ish for each related row (small scale; OK to do per row)
+            desired[s.id] = {o.global_id for o in s.data_sharing}
             for o in s.data_sharing:
-                ds = existing.get(o.global_id)
-                if not ds:
-                    ds = DataSharing(
-                        id=o.global_id,
-                        sharing_name=o.sharing_name,
-                        physical_name=o.physical_name,
-                        sharing_type=o.sharing_type,
-                        error_reason=o.error_reason,
-                    )
-                    session.add(ds)
-                    existing[o.global_id] = ds
-                else:
-                    ds.sharing_name = o.sharing_name
-                    ds.physical_name = o.physical_name
-                    ds.sharing_type = o.sharing_type
-                    ds.error_reason = o.error_reason
-
-                if ds not in asset.data_sharing:
-                    asset.data_sharing.append(ds)
+                rows[o.global_id] = {
+                    "id": o.global_id,
+                    "sharing_name": o.sharing_name,
+                    "physical_name": o.physical_name,
+                    "sharing_type": o.sharing_type,
+                    "error_reason": o.error_reason,
+                }
 
-            if s.is_csv_imported:
-                asset.data_sharing[:] = [
-                    ds for ds in asset.data_sharing if ds.id in desired
-                ]
+        await self._upsert_dimension(session, DataSharing, rows)
+        await self._sync_links(
+            session,
+            asset_data_sharing.c.asset_id,
+            asset_data_sharing.c.data_sharing_id,
+            desired,
+        )
 
     async def _process_bulk_ext_tags(
-        self,
-        session: AsyncSession,
-        asset_by_id: Dict[str, Asset],
-        schemas: List[AssetCreate],
+        self, session: AsyncSession, schemas: List[AssetCreate]
     ) -> None:
-        all_ids: Set[str] = set()
-        desired_map: Dict[str, Set[str]] = {}
-
+        rows: Dict[str, Dict[str, Any]] = {}
+        desired: Dict[str, Set[str]] = {}
         for s in schemas:
             if s.ext_tag is None:
                 continue
-            desired = {t.ext_tag_id for t in s.ext_tag}
-            desired_map[s.id] = desired
-            all_ids |= desired
-
-        existing: Dict[str, ExtTag] = {}
-        if all_ids:
-            rs = await session.execute(select(ExtTag).where(ExtTag.id.in_(all_ids)))
-            existing = {t.id: t for t in rs.scalars()}
-
-        for s in schemas:
-            if s.ext_tag is None:
-                continue
-            asset = asset_by_id[s.id]
-            if not s.is_csv_imported or not asset.ext_tags:
-                asset.ext_tags.clear()
-
-            desired = desired_map.get(s.id, set())
+            desired[s.id] = {t.ext_tag_id for t in s.ext_tag}
             for t in s.ext_tag:
-                tag = existing.get(t.ext_tag_id)
-                if not tag:
-                    tag = ExtTag(
-                        id=t.ext_tag_id,
-                        ext_tag_name=t.ext_tag_name,
-                        ext_tag_description=t.ext_tag_description,
-                    )
-                    session.add(tag)
-                    existing[t.ext_tag_id] = tag
-                else:
-                    tag.ext_tag_name = t.ext_tag_name
-                    tag.ext_tag_description = t.ext_tag_description
-
-                if tag not in asset.ext_tags:
-                    asset.ext_tags.append(tag)
+                rows[t.ext_tag_id] = {
+                    "id": t.ext_tag_id,
+                    "ext_tag_name": t.ext_tag_name,
+                    "ext_tag_description": t.ext_tag_description,
+                }
 
-            if s.is_csv_imported:
-                asset.ext_tags[:] = [t for t in asset.ext_tags if t.id in desired]
+        await self._upsert_dimension(session, ExtTag, rows)
+        await self._sync_links(
+            session, asset_ext_tag.c.asset_id, asset_ext_tag.c.ext_tag_id, desired
+        )
 
     async def _process_bulk_ext_owners(
-        self,
-        session: AsyncSession,
-        asset_by_id: Dict[str, Asset],
-        schemas: List[AssetCreate],
+        self, session: AsyncSession, schemas: List[AssetCreate]
     ) -> None:
-        all_ids: Set[str] = set()
-        desired_map: Dict[str, Set[str]] = {}
-
+        rows: Dict[str, Dict[str, Any]] = {}
+        desired: Dict[str, Set[str]] = {}
         for s in schemas:
             if s.ext_owner is None:
                 continue
-            desired = {o.ext_owner_id for o in s.ext_owner}
-            desired_map[s.id] = desired
-            all_ids |= desired
-
-        existing: Dict[str, ExtOwner] = {}
-        if all_ids:
-            rs = await session.execute(select(ExtOwner).where(ExtOwner.id.in_(all_ids)))
-            existing = {o.id: o for o in rs.scalars()}
-
-        for s in schemas:
-            if s.ext_owner is None:
-                continue
-            asset = asset_by_id[s.id]
-            if not s.is_csv_imported or not asset.ext_owners:
-                asset.ext_owners.clear()
-
-            desired = desired_map.get(s.id, set())
+            desired[s.id] = {o.ext_owner_id for o in s.ext_owner}
             for o in s.ext_owner:
-                owner = existing.get(o.ext_owner_id)
-                if not owner:
-                    owner = ExtOwner(
-                        id=o.ext_owner_id,
-                        display_name=o.display_name,
-                        email_address=o.email_address,
-                    )
-                    session.add(owner)
-                    existing[o.ext_owner_id] = owner
-                else:
-                    owner.display_name = o.display_name
-                    owner.email_address = o.email_address
-
-                if owner not in asset.ext_owners:
-                    asset.ext_owners.append(owner)
+                rows[o.ext_owner_id] = {
+                    "id": o.ext_owner_id,
+                    "display_name": o.display_name,
+                    "email_address": o.email_address,
+                }
 
-            if s.is_csv_imported:
-                asset.ext_owners[:] = [o for o in asset.ext_owners if o.id in desired]
+        await self._upsert_dimension(session, ExtOwner, rows)
+        await self._sync_links(
+            session,
+            asset_ext_owner.c.asset_id,
+            asset_ext_owner.c.ext_owner_id,
+            desired,
+        )
 
     async def _process_bulk_ext_connections(
-        self,
-        session: AsyncSession,
-        asset_by_id: Dict[str, Asset],
-        schemas: List[AssetCreate],
+        self, session: AsyncSession, schemas: List[AssetCreate]
     ) -> None:
-        # 1) Collect desired state
-        all_conn_ids: Set[str] = set()
-        all_source_ids: Set[str] = set()
-        desired_conns_by_asset: Dict[str, List[Dict[str, Any]]] = {}
+        conn_rows: Dict[str, Dict[str, Any]] = {}
+        source_rows: Dict[str, Dict[str, Any]] = {}
+        desired_conns: Dict[str, Set[str]] = {}
+        # a connection listed more than once takes its last list of sources
+        desired_sources: Dict[str, Set[str]] = {}
 
         for s in schemas:
             if not s.ext_connection:
                 continue
-            items: List[Dict[str, Any]] = []
+            desired_conns[s.id] = {c.ext_table_id for c in s.ext_connection}
             for c in s.ext_connection:
-                row = {
+                conn_rows[c.ext_table_id] = {
                     "id": c.ext_table_id,
                     "ext_table_name": c.ext_table_name,
                     "ext_table_name_path": c.ext_table_name_path,
                     "ext_description": c.ext_description,
                     "ext_service_name": c.ext_service_name,
                     "possible_global_ids": getattr(c, "possible_global_ids", None),
-                    "sources": [
-                        {
-                            "id": src.id,
-                            "source_name": src.source_name,
-                            "source_type": src.source_type,
-                        }
-                        for src in (getattr(c, "sources", []) or [])
-                    ],
                 }
-                items.append(row)
-                all_conn_ids.add(row["id"])
-                for src in row["sources"]:
-                    all_source_ids.add(src["id"])
-            desired_conns_by_asset[s.id] = items
+                sources = getattr(c, "sources", []) or []
+                desired_sources[c.ext_table_id] = {src.id for src in sources}
+                for src in sources:
+                    source_rows[src.id] = {
+                        "id": src.id,
+                        "source_name": src.source_name,
+                        "source_type": src.source_type,
+                    }
+
+        await self._upsert_dimension(session, ExtConnection, conn_rows)
+        await self._upsert_dimension(session, ExtSource, source_rows)
+        await self._sync_links(
+            session,
+            ext_connection_source.c.ext_connection_id,
+            ext_connection_source.c.ext_source_id,
+            desired_sources,
+        )
+        await self._sync_links(
+            session,
+            asset_ext_connection.c.asset_id,
+            asset_ext_connection.c.ext_connection_id,
+            desired_conns,
+        )
 
-        if not all_conn_ids and not all_source_ids:
+    async def _upsert_dimension(
+        self, session: AsyncSession, model, rows: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """
+        INSERT ... ON CONFLICT (id) DO UPDATE for rows keyed by id, overwriting
+        every column with the incoming value; rows that already match are left
+        alone. Split so no statement exceeds ``upsert_max_params``.
+        """
+        if not rows:
             return
-
-        # 2) Preload existing ExtConnection / ExtSource
-        existing_conn: Dict[str, ExtConnection] = {}
-        if all_conn_ids:
-            rs = await session.execute(
-                select(ExtConnection).where(ExtConnection.id.in_(all_conn_ids))
+        values = list(rows.values())
+        columns = [c for c in values[0] if c != "id"]
+        per_statement = max(1, self.upsert_max_params // (len(columns) + 1))
+        table_cols = model.__table__.c
+        for i in range(0, len(values), per_statement):
+            stmt = pg_insert(model).values(values[i : i + per_statement])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[model.id],
+                set_={c: stmt.excluded[c] for c in columns},
+                where=or_(
+                    *(table_cols[c].is_distinct_from(stmt.excluded[c]) for c in columns)
+                ),
             )
-            existing_conn = {x.id: x for x in rs.scalars()}
+            await session.execute(stmt)
 
-        existing_src: Dict[str, ExtSource] = {}
-        if all_source_ids:
-            rs = await session.execute(
-                select(ExtSource).where(ExtSource.id.in_(all_source_ids))
+    async def _sync_links(
+        self,
+        session: AsyncSession,
+        owner_col: Column,
+        target_col: Column,
+        desired: Dict[str, Set[str]],
+    ) -> None:
+        """
+        Make the links of every owner in ``desired`` exactly its set of targets:
+        one DELETE of the links not wanted any more and one INSERT of the
+        missing ones, both reading the desired pairs from unnest()ed arrays.
+        """
+        if not desired:
+            return
+        link_table = owner_col.table
+        pairs = [(owner, target) for owner, ts in desired.items() for target in ts]
+        wanted = (
+            func.unnest(
+                bindparam("link_owners", [o for o, _ in pairs], type_=ARRAY(String)),
+                bindparam("link_targets", [t for _, t in pairs], type_=ARRAY(String)),
             )
-            existing_src = {x.id: x for x in rs.scalars()}
-
-        # 3) Upsert connections + sources; sync links
-        for s in schemas:
-            if s.id not in desired_conns_by_asset:
-                continue
-
-            asset = asset_by_id[s.id]
+            .table_valued("owner_id", "target_id")
+            .render_derived()
+        )
 
-            # If not CSV-imported or asset has no connections yet, reset the list
-            if not getattr(s, "is_csv_imported", False) or not asset.ext_connections:
-                asset.ext_connections.clear()
-
-            desired_rows = desired_conns_by_asset[s.id]
-            seen_conn_ids: Set[str] = set()
-            updated_conns: List[ExtConnection] = []
-
-            for row in desired_rows:
-                cid = row["id"]
-                seen_conn_ids.add(cid)
-
-                conn = existing_conn.get(cid)
-                if not conn:
-                    conn = ExtConnection(
-                        id=cid,
-                        ext_table_name=row["ext_table_name"],
-                        ext_table_name_path=row["ext_table_name_path"],
-                        ext_description=row["ext_description"],
-                        ext_service_name=row["ext_service_name"],
-                        possible_global_ids=row["possible_global_ids"],
-                    )
-                    session.add(conn)
-                    existing_conn[cid] = conn
-                else:
-                    conn.ext_table_name = row["ext_table_name"]
-                    conn.ext_table_name_path = row["ext_table_name_path"]
-                    conn.ext_description = row["ext_description"]
-                    conn.ext_service_name = row["ext_service_name"]
-                    conn.possible_global_ids = row["possible_global_ids"]
-
-                # Upsert & attach sources (M2M)
-                # Build desired source objects for this connection
-                conn_desired_sources: List[ExtSource] = []
-                for srow in row["sources"]:
-                    sid = srow["id"]
-                    src = existing_src.get(sid)
-                    if not src:
-                        src = ExtSource(
-                            id=sid,
-                            source_name=srow["source_name"],
-                            source_type=srow["source_type"],
-                        )
-                        session.add(src)
-                        existing_src[sid] = src
-                    else:
-                        src.source_name = srow["source_name"]
-                        src.source_type = srow["source_type"]
-
-                    conn_desired_sources.append(src)
-
-                # Sync connection↔sources list (replace to desired)
-                conn.ext_sources[:] = conn_desired_sources
-
-                updated_conns.append(conn)
-
-            # Sync asset↔connections (CSV import keeps only seen; else replace)
-            if getattr(s, "is_csv_imported", False):
-                asset.ext_connections[:] = [
-                    c for c in updated_conns if c.id in seen_conn_ids
-                ]
-            else:
-                asset.ext_connections[:] = updated_conns
+        await session.execute(
+            delete(link_table).where(
+                owner_col
+                == any_(bindparam("owners", list(desired), type_=ARRAY(String))),
+                ~exists().where(
+                    wanted.c.owner_id == owner_col, wanted.c.target_id == target_col
+                ),
+            )
+        )
+        if pairs:
+            await session.execute(
+                pg_insert(link_table)
+                .from_select(
+                    [owner_col.name, target_col.name],
+                    select(wanted.c.owner_id, wanted.c.target_id),
+                )
+                .on_conflict_do_nothing()
+            )
 
     async def _process_bulk_statistics(
         self,
@@ -921,6 +1113,101 @@ class AssetRepository(BaseRepository):
         res = await session.execute(stmt)
         return res.scalars().all()
 
+    async def fetch_descendant_ids(
+        self,
+        ancestor_ids: List[str],
+        min_depth: int,
+        max_depth: int,
+    ) -> List[str]:
+        """
+        IDs of the union of the subtrees under ancestor_ids, depth in
+        [min_depth, max_depth]: asset_paths joined to assets, with the
+        soft-delete filter applied; only ids are loaded, no Asset rows.
+        """
+        if not ancestor_ids:
+            return []
+        stmt = (
+            select(AssetPath.asset_id)
+            .join(Asset, Asset.id == AssetPath.asset_id)
+            .where(AssetPath.ancestor_id.in_(ancestor_ids))
+            .where(AssetPath.depth >= min_depth)
+            .where(AssetPath.depth <= max_depth)
+            .distinct()
+        )
+        stmt = self._maybe_soft_delete(stmt)
+        async with self.session_factory() as session:
+            res = await session.execute(stmt)
+            return list(res.scalars().all())
+
+    async def purge_subtrees(
+        self,
+        root_ids: List[str],
+        min_depth: int = 0,
+        max_depth: int = 2,
+        chunk_size: int = 1000,
+        lock_timeout_ms: Optional[int] = None,
+        chunk_timeout_ms: Optional[int] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, int]:
+        """
+        Delete root_ids and their descendants (depth in [min_depth, max_depth]).
+
+        The subtree is resolved as IDs (fetch_descendant_ids), then deleted in chunks
+        of at most ``chunk_size``, each in its own transaction so locks and
+        cascades (paths, tag links, statistics...) are held one chunk at a time.
+        ``lock_timeout_ms`` bounds how long a chunk waits for locks and
+        ``chunk_timeout_ms`` how long it may run; a chunk that hits either is
+        split in half and retried. ``on_progress(deleted, total)`` is called
+        after every chunk.
+        """
+        roots = list(dict.fromkeys(root_ids))
+        if not roots:
+            return {"deleted": 0, "requested": 0, "chunks": 0}
+        descendants = await self.fetch_descendant_ids(roots, min_depth, max_depth)
+        ids = list(dict.fromkeys([*descendants, *roots]))
+
+        total = len(ids)
+        deleted = 0
+        chunks = 0
+        pending = [ids[i : i + chunk_size] for i in range(0, total, chunk_size)]
+        pending.reverse()
+        while pending:
+            chunk = pending.pop()
+            try:
+                deleted += await self._delete_chunk(
+                    chunk, lock_timeout_ms, chunk_timeout_ms
+                )
+            except DBAPIError as e:
+                # lock or statement timeout: retry in smaller pieces
+                if len(chunk) == 1 or not _is_timeout(e):
+                    raise
+                mid = len(chunk) // 2
+                pending.extend([chunk[mid:], chunk[:mid]])
+                continue
+            chunks += 1
+            if on_progress is not None:
+                on_progress(deleted, total)
+        return {"deleted": deleted, "requested": total, "chunks": chunks}
+
+    async def _delete_chunk(
+        self,
+        ids: List[str],
+        lock_timeout_ms: Optional[int],
+        chunk_timeout_ms: Optional[int],
+    ) -> int:
+        async with self.session_factory() as session:
+            if lock_timeout_ms:
+                await session.execute(
+                    text(f"SET LOCAL lock_timeout = '{int(lock_timeout_ms)}ms'")
+                )
+            if chunk_timeout_ms:
+                await session.execute(
+                    text(f"SET LOCAL statement_timeout = '{int(chunk_timeout_ms)}ms'")
+                )
+            res = await session.execute(delete(Asset).where(Asset.id.in_(ids)))
+            await session.commit()
+            return res.rowcount or 0
+
     async def _fetch_parents(
         self,
         session: AsyncSession,
@@ -981,11 +1268,20 @@ class AssetRepository(BaseRepository):
             await session.commit()
             return obj
 
-    async def delete_by_ids(self, ids: List[str]) -> int:
+    async def delete_by_ids(
+        self, ids: List[str], chunk_size: Optional[int] = None
+    ) -> int:
+        """Delete in one transaction, optionally as several bounded statements."""
         if not ids:
             return 0
+        chunk_size = chunk_size or len(ids)
+        deleted = 0
         async with self.session_factory() as session:
-            stmt = delete(self.model).where(self.model.id.in_(ids))
-            res = await session.execute(stmt)
+            for i in range(0, len(ids), chunk_size):
+                stmt = delete(self.model).where(
+                    self.model.id.in_(ids[i : i + chunk_size])
+                )
+                res = await session.execute(stmt)
+                deleted += res.rowcount or 0
             await session.commit()
-            return res.rowcount or 0
+            return deleted
@@ -1,18 +1,86 @@
 from __future__ import annotations
 
-from typing import Callable, Optional, List, AsyncContextManager
-from datetime import datetime, timedelta, timezone
+import logging
+from typing import (
+    Any,
+    AsyncContextManager,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from datetime import date, datetime, timedelta, timezone
 
-from sqlalchemy import select, update as sql_update
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Integer,
+    String,
+    Text,
+    bindparam,
+    case,
+    cast,
+    column,
+    delete as sql_delete,
+    exists,
+    func,
+    select,
+    text,
+    tuple_,
+    update as sql_update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.infrastructure.db.repositories.base import BaseRepository
 from app.infrastructure.db.models.event import Event
+from app.infrastructure.db.models.event_stream_offset import EventStreamOffset
 from app.domain.services.id import new_global_id
 from app.domain.schemas.types import Type
-from app.domain.schemas.events import EventStatus
+from app.domain.schemas.events import EventStatus, body_hash
 from app.domain.schemas.events import Event as EventSchema
 
+logger = logging.getLogger(__name__)
+
+# events expire one day after creation
+EVENT_TTL = timedelta(days=1)
+PARTITION_PREFIX = "events_p"
+FINAL_STATUSES = (
+    EventStatus.COMPLETED.value,
+    EventStatus.SKIPPED.value,
+    EventStatus.FAILED.value,
+)
+
+
+def _partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def _partition_day(name: str) -> Optional[date]:
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX) :], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def _in_partitions(partitions: int, owned: Sequence[int]):
+    """Events whose stream partition is one of ``owned``."""
+    # same hash as app.domain.schemas.events.event_partition
+    return text(
+        "(('x' || substr(md5(events.operation || '|' || "
+        "coalesce(events.user_id, '')), 1, 8))::bit(32)::bigint "
+        "% :partitions) = ANY(:owned_partitions)"
+    ).bindparams(
+        bindparam("partitions", partitions),
+        bindparam("owned_partitions", list(owned), type_=ARRAY(Integer)),
+    )
+
 
 class EventRepository(BaseRepository):
     def __init__(
@@ -29,7 +97,7 @@ class EventRepository(BaseRepository):
     ) -> Event:
         async with self.session_factory() as session:
             now = datetime.now(timezone.utc)
-            expires_at = now + timedelta(days=1)
+            expires_at = now + EVENT_TTL
 
             event = Event(
                 id=new_global_id(Type.Event),
@@ -53,15 +121,29 @@ class EventRepository(BaseRepository):
         async with self.session_factory() as session:
             stmt = (
                 select(Event)
-                .where(Event.event_type == event.event_type)
-                .where(Event.body == event.body)
-                .where(Event.created_at > event.created_at)
-                .where(Event.id != event.id)
+                .where(*self._duplicate_filters(event))
                 .order_by(Event.created_at.asc())
             )
             rows = (await session.execute(stmt)).scalars().all()
             return rows
 
+    async def has_duplicate_record(self, event: EventSchema) -> bool:
+        async with self.session_factory() as session:
+            stmt = select(exists().where(*self._duplicate_filters(event)))
+            return bool(await session.scalar(stmt))
+
+    @staticmethod
+    def _duplicate_filters(event: EventSchema) -> List[Any]:
+        # served by ix_events_type_body_hash_created; comparing the body too
+        # guards against hash collisions
+        return [
+            Event.event_type == event.event_type,
+            Event.body_hash == body_hash(event.body),
+            Event.body == event.body,
+            Event.created_at > event.created_at,
+            Event.id != event.id,
+        ]
+
     async def get_wait_time(self, event_id: str) -> Optional[int]:
         async with self.session_factory() as session:
             stmt = select(Event.wait_time).where(Event.id == event_id).limit(1)
@@ -85,16 +167,315 @@ class EventRepository(BaseRepository):
             await session.execute(stmt)
             await session.commit()
 
-    async def get_dependent_records(self, record: EventSchema) -> List[Event]:
+    async def bulk_update_status_and_times(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Apply many status transitions with a single
+        UPDATE events ... FROM (VALUES ...) statement.
+        Each row carries id/status and optional wait_time/completed_in_seconds/
+        retry_count/next_attempt_at/error; a None keeps the value already
+        stored on the event. next_attempt_at only survives on PENDING rows,
+        any other status clears it.
+        """
+        if not rows:
+            return 0
+
+        v = values(
+            column("id", String),
+            column("status", String),
+            column("wait_time", Integer),
+            column("completed_in_seconds", BigInteger),
+            column("retry_count", Integer),
+            column("next_attempt_at", DateTime),
+            column("error", Text),
+            name="v",
+        ).data(
+            [
+                (
+                    r["id"],
+                    r["status"],
+                    r.get("wait_time"),
+                    r.get("completed_in_seconds"),
+                    r.get("retry_count"),
+                    r.get("next_attempt_at"),
+                    r.get("error"),
+                )
+                for r in rows
+            ]
+        )
+
         async with self.session_factory() as session:
             stmt = (
-                select(Event)
+                sql_update(Event)
+                .where(Event.id == v.c.id)
+                .values(
+                    status=v.c.status,
+                    # untyped NULLs in VALUES default to text, so cast explicitly
+                    wait_time=func.coalesce(
+                        cast(v.c.wait_time, Integer), Event.wait_time
+                    ),
+                    completed_in_seconds=func.coalesce(
+                        cast(v.c.completed_in_seconds, BigInteger),
+                        Event.completed_in_seconds,
+                    ),
+                    retry_count=func.coalesce(
+                        cast(v.c.retry_count, Integer), Event.retry_count
+                    ),
+                    next_attempt_at=case(
+                        (
+                            v.c.status == EventStatus.PENDING.value,
+                            func.coalesce(
+                                cast(v.c.next_attempt_at, DateTime),
+                                Event.next_attempt_at,
+                            ),
+                        ),
+                        else_=None,
+                    ),
+                    error=func.coalesce(cast(v.c.error, Text), Event.error),
+                )
+            )
+            res = await session.execute(stmt)
+            await session.commit()
+            return res.rowcount or 0
+
+    async def claim_due_retries(
+        self,
+        limit: int = 100,
+        grace_seconds: float = 0,
+        lease_seconds: float = 300,
+        now: Optional[datetime] = None,
+        partitions: int = 0,
+        owned: Optional[Sequence[int]] = None,
+    ) -> List[Event]:
+        """
+        Claim up to ``limit`` PENDING events whose retry was due at least
+        ``grace_seconds`` ago. Claimed rows get next_attempt_at pushed out by
+        ``lease_seconds``, so other sweepers skip them (SKIP LOCKED while the
+        claim commits, the lease afterwards) until the claimant's next status
+        write clears it, or the lease runs out because the claimant died.
+        With ``partitions``, only events of the ``owned`` stream partitions
+        are claimed.
+        """
+        if partitions and not owned:
+            return []
+        now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        naive_now = now.replace(tzinfo=None)
+        due = (
+            select(Event.id, Event.created_at)
+            .where(Event.status == EventStatus.PENDING.value)
+            .where(Event.next_attempt_at.is_not(None))
+            .where(
+                Event.next_attempt_at <= naive_now - timedelta(seconds=grace_seconds)
+            )
+            .order_by(Event.next_attempt_at.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if partitions:
+            due = due.where(_in_partitions(partitions, owned))
+        due = due.cte("due")
+        async with self.session_factory() as session:
+            stmt = (
+                sql_update(Event)
+                .where(Event.id == due.c.id)
+                .where(Event.created_at == due.c.created_at)
+                .values(next_attempt_at=naive_now + timedelta(seconds=lease_seconds))
+                .returning(Event)
+                .execution_options(synchronize_session=False)
+            )
+            rows = (await session.execute(stmt)).scalars().all()
+            await session.commit()
+            return list(rows)
+
+    async def list_unfinished_in_partition(
+        self,
+        partition: int,
+        partitions: int,
+        created_before: datetime,
+        after: Optional[tuple] = None,
+        limit: int = 500,
+    ) -> List[Event]:
+        """
+        PENDING (not waiting on a retry) and EXECUTING events of one stream
+        partition created at/before ``created_before``, oldest first, that
+        have not expired. Page with ``after=(created_at, id)`` of the last row.
+        """
+        created_before = created_before.astimezone(timezone.utc).replace(tzinfo=None)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        stmt = (
+            select(Event)
+            .where(_in_partitions(partitions, [partition]))
+            .where(
+                (
+                    (Event.status == EventStatus.PENDING.value)
+                    & Event.next_attempt_at.is_(None)
+                )
+                | (Event.status == EventStatus.EXECUTING.value)
+            )
+            .where(Event.created_at <= created_before)
+            # also prunes partitions older than the TTL
+            .where(Event.created_at >= now - EVENT_TTL)
+            .where(Event.expires_at > now)
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(Event.created_at, Event.id) > tuple_(*after))
+        stmt = stmt.order_by(Event.created_at.asc(), Event.id.asc()).limit(limit)
+        async with self.session_factory() as session:
+            return list((await session.execute(stmt)).scalars().all())
+
+    async def get_dependency_summary(
+        self, record: EventSchema, event_types: Iterable[str]
+    ) -> Dict[str, Tuple[bool, bool]]:
+        """
+        For each of ``event_types``, whether earlier events of the record's
+        operation/user exist and whether all of them are in a final status:
+        {event_type: (present, all_final)}. Types without events are left out.
+        One GROUP BY over ix_events_operation_user_created.
+        """
+        event_types = list(event_types)
+        if not event_types:
+            return {}
+        async with self.session_factory() as session:
+            stmt = (
+                select(
+                    Event.event_type,
+                    func.bool_and(Event.status.in_(FINAL_STATUSES)),
+                )
                 .where(Event.operation == record.operation)
+                .where(Event.event_type.in_(event_types))
                 .where(Event.created_at < record.created_at)
+                # older events have expired; the bound also prunes partitions
+                .where(Event.created_at >= record.created_at - EVENT_TTL)
+                .group_by(Event.event_type)
             )
             if record.user_id:
                 stmt = stmt.where(Event.user_id == record.user_id)
+            rows = await session.execute(stmt)
+            return {event_type: (True, bool(done)) for event_type, done in rows}
 
-            stmt = stmt.order_by(Event.created_at.asc())
-            rows = (await session.execute(stmt)).scalars().all()
-            return rows
+    async def get_stream_offset(self, consumer: str) -> Optional[EventStreamOffset]:
+        async with self.session_factory() as session:
+            return await session.get(EventStreamOffset, consumer)
+
+    async def save_stream_offset(
+        self,
+        consumer: str,
+        offset: Optional[int],
+        rewound_to: Optional[datetime] = None,
+    ) -> None:
+        values: Dict[str, Any] = {"consumer": consumer, "offset": offset}
+        if rewound_to is not None:
+            values["rewound_to"] = rewound_to
+
+        async with self.session_factory() as session:
+            stmt = pg_insert(EventStreamOffset).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[EventStreamOffset.consumer],
+                set_={
+                    **{k: getattr(stmt.excluded, k) for k in values if k != "consumer"},
+                    "updated_at": func.now(),
+                },
+            )
+            await session.execute(stmt)
+            await session.commit()
+
+    async def delete_expired_events(
+        self, limit: int = 1000, now: Optional[datetime] = None
+    ) -> int:
+        """
+        Delete up to ``limit`` expired events in a final status, oldest expiry
+        first, in one short transaction. Rows locked elsewhere are skipped.
+        """
+        now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        doomed = (
+            select(Event.id, Event.created_at)
+            .where(Event.expires_at < now.replace(tzinfo=None))
+            .where(Event.status.in_(FINAL_STATUSES))
+            .order_by(Event.expires_at.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte("doomed")
+        )
+        async with self.session_factory() as session:
+            stmt = (
+                sql_delete(Event)
+                .where(Event.id == doomed.c.id)
+                .where(Event.created_at == doomed.c.created_at)
+                .execution_options(synchronize_session=False)
+            )
+            res = await session.execute(stmt)
+            await session.commit()
+            return res.rowcount or 0
+
+    async def list_partitions(self) -> List[str]:
+        async with self.session_factory() as session:
+            rows = await session.execute(
+                text(
+                    "SELECT c.relname FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid "
+                    "WHERE i.inhparent = 'events'::regclass"
+                )
+            )
+            return [r[0] for r in rows]
+
+    async def ensure_partitions(
+        self, days_ahead: int = 3, now: Optional[datetime] = None
+    ) -> List[str]:
+        """
+        Create the missing daily partitions from today through today + days_ahead.
+        Returns the partitions created.
+        """
+        today = (now or datetime.now(timezone.utc)).date()
+        existing = set(await self.list_partitions())
+        created: List[str] = []
+        for i in range(days_ahead + 1):
+            day = today + timedelta(days=i)
+            name = _partition_name(day)
+            if name in existing:
+                continue
+            try:
+                async with self.session_factory() as session:
+                    await session.execute(
+                        text(
+                            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF events "
+                            f"FOR VALUES FROM ('{day}') TO ('{day + timedelta(days=1)}')"
+                        )
+                    )
+                    await session.commit()
+                created.append(name)
+            except Exception as e:
+                # e.g. rows for that day already sit in events_default
+                logger.error(f"Error creating partition {name}: {e}")
+        return created
+
+    async def drop_expired_partitions(
+        self, now: Optional[datetime] = None, lock_timeout_ms: int = 5000
+    ) -> List[str]:
+        """
+        Drop daily partitions whose rows have all expired: everything in a
+        partition was created before its upper bound, so it expired by
+        ``upper bound + EVENT_TTL``. Decided from the bounds alone, without
+        reading the partition; each drop is a catalog operation.
+        """
+        now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        dropped: List[str] = []
+        for name in sorted(await self.list_partitions()):
+            day = _partition_day(name)
+            if day is None:
+                continue
+            upper = datetime.combine(
+                day + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc
+            )
+            if upper + EVENT_TTL > now:
+                continue
+            try:
+                async with self.session_factory() as session:
+                    await session.execute(
+                        text(f"SET LOCAL lock_timeout = '{int(lock_timeout_ms)}ms'")
+                    )
+                    await session.execute(text(f"DROP TABLE {name}"))
+                    await session.commit()
+                dropped.append(name)
+            except Exception as e:
+                # busy partition; try again on the next round
+                logger.error(f"Error dropping partition {name}: {e}")
+        return dropped
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import logging
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionLeaseRepository:
+    """
+    Session-level Postgres advisory locks on one dedicated connection.
+
+    A lock is held until it is released or the connection goes away, so a
+    replica that dies (or loses its connection) gives up every lease at once.
+    Locks use the two-key form ``(namespace, key)``.
+
+    The connection comes from a NullPool engine on the same database rather
+    than the app pool: it is held for the life of the lease, and closing it
+    really disconnects instead of handing a session that still holds locks
+    back to the pool.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = create_async_engine(engine.url, poolclass=NullPool)
+        self._conn: Optional[AsyncConnection] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None and not self._conn.closed
+
+    async def open(self) -> None:
+        if self.is_open:
+            return
+        conn = await self.engine.connect()
+        # no transaction around the lock calls: session-level locks, and the
+        # connection never sits idle in transaction
+        self._conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+    async def close(self) -> None:
+        """Release every lock held and disconnect."""
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            if not conn.closed:
+                await conn.execute(text("SELECT pg_advisory_unlock_all()"))
+        except Exception as e:
+            # closing a NullPool connection ends the session, which drops
+            # the locks anyway
+            logger.error(f"Error releasing leases: {e}")
+        try:
+            await conn.close()
+        except Exception as e:
+            logger.error(f"Error closing lease connection: {e}")
+
+    async def _scalar(self, sql: str, **params):
+        if not self.is_open:
+            raise RuntimeError("lease connection is not open")
+        return await self._conn.scalar(text(sql), params)
+
+    async def try_lock(self, namespace: int, key: int) -> bool:
+        return bool(
+            await self._scalar(
+                "SELECT pg_try_advisory_lock(:ns, :key)", ns=namespace, key=key
+            )
+        )
+
+    async def unlock(self, namespace: int, key: int) -> bool:
+        return bool(
+            await self._scalar(
+                "SELECT pg_advisory_unlock(:ns, :key)", ns=namespace, key=key
+            )
+        )
+
+    async def count_holders(self, namespace: int) -> int:
+        """Granted locks in ``namespace`` across all sessions of this database."""
+        return int(
+            await self._scalar(
+                "SELECT count(*) FROM pg_locks "
+                "WHERE locktype = 'advisory' AND objsubid = 2 AND granted "
+                "AND classid = CAST(:ns AS oid) "
+                "AND database = (SELECT oid FROM pg_database "
+                "WHERE datname = current_database())",
+                ns=namespace,
+            )
+        )
+
+    async def held_keys(self, namespace: int) -> List[int]:
+        """Keys in ``namespace`` held by this connection."""
+        if not self.is_open:
+            return []
+        rows = await self._conn.execute(
+            text(
+                "SELECT objid::bigint FROM pg_locks "
+                "WHERE locktype = 'advisory' AND objsubid = 2 AND granted "
+                "AND classid = CAST(:ns AS oid) AND pid = pg_backend_pid()"
+            ),
+            {"ns": namespace},
+        )
+        return sorted(int(r[0]) for r in rows)
@@ -1,55 +1,403 @@
 import asyncio
+import functools
 import logging
-import json
-from typing import List
+import signal
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
 import aio_pika
+from aio_pika.abc import AbstractIncomingMessage, AbstractRobustConnection
 from app.core.config import settings
-from app.domain.schemas.events import EventContext
+from app.core.metrics import REGISTRY, Counter, Histogram, stats_collector
+from app.domain.schemas.events import (
+    EventContext,
+    decode_debezium_envelope,
+    is_pending_change,
+    is_scheduled_retry,
+)
+from app.domain.repositories.event import EventRepository
+from app.domain.repositories.partition_lease import PartitionLeaseRepository
 from app.services.event import EventProcessorWorkerPool
+from app.services.event_expiry import ExpiredEventSweeper
+from app.services.event_ownership import PartitionOwnership
+from app.services.event_partitions import EventPartitionMaintainer
 
 logger = logging.getLogger(__name__)
 
+EVENTS_CONSUMED = Counter(
+    "events_consumed",
+    "Messages read from the events stream, by kind (pending/observed/foreign/error)",
+    ["kind"],
+)
+EVENT_HANDOFF_SECONDS = Histogram(
+    "event_handoff_seconds",
+    "Time to hand a pending event to the processor pool (blocks when lanes are full)",
+)
+
+
+class _AckBatcher:
+    """
+    Cumulative acknowledgements for one channel.
+
+    Messages are handed off in delivery order, so acking the newest handed-off
+    delivery with multiple=True also acks everything before it. Flushed once
+    ``max_pending`` messages are waiting or every ``flush_interval_ms``.
+    """
+
+    def __init__(self, max_pending: int, flush_interval_ms: int):
+        self.max_pending = max(1, max_pending)
+        self.flush_interval = flush_interval_ms / 1000
+        self._last: Optional[AbstractIncomingMessage] = None
+        self._pending = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def ack(self, msg: AbstractIncomingMessage) -> None:
+        self._last = msg
+        self._pending += 1
+        if self._pending >= self.max_pending:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self._last is None:
+            return
+        msg, self._last, self._pending = self._last, None, 0
+        await msg.ack(multiple=True)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("ack flush failed: %s", e)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("final ack flush failed: %s", e)
+
+
+class _StreamOffsets:
+    """
+    Committed-offset watermarks for one stream consumer.
+
+    Messages we only observe are settled as soon as they are seen; events
+    handed to the pool stay in flight until their final status is committed.
+    A committed offset is the highest one below every in-flight offset, so a
+    restart resumes right after it without rescanning the stream. Each stream
+    partition has its own watermark, held back only by its own events.
+    """
+
+    def __init__(self):
+        self._highest: Optional[int] = None
+        # in-flight offset -> stream partition (None: unpartitioned)
+        self._in_flight: Dict[int, Optional[int]] = {}
+        # checkpoint key -> offset last saved under it
+        self.saved: Dict[str, int] = {}
+
+    def seen(self, offset: int) -> None:
+        if self._highest is None or offset > self._highest:
+            self._highest = offset
+
+    def begin(self, offset: int, partition: Optional[int] = None) -> None:
+        self._in_flight[offset] = partition
+
+    def done(self, offset: int) -> None:
+        self._in_flight.pop(offset, None)
+
+    @property
+    def committed(self) -> Optional[int]:
+        if self._in_flight:
+            return min(self._in_flight) - 1
+        return self._highest
+
+    def committed_for(self, partition: int) -> Optional[int]:
+        held = [o for o, p in self._in_flight.items() if p == partition]
+        if held:
+            return min(held) - 1
+        return self._highest
+
+
+def _message_offset(msg: AbstractIncomingMessage) -> Optional[int]:
+    offset = (msg.headers or {}).get("x-stream-offset")
+    return int(offset) if offset is not None else None
+
+
+def _chain(*callbacks: Optional[Callable[[], None]]) -> Callable[[], None]:
+    def run():
+        for fn in callbacks:
+            if fn is not None:
+                fn()
+
+    return run
+
+
+def _as_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+async def _connect() -> AbstractRobustConnection:
+    return await aio_pika.connect_robust(settings.RABBITMQ_URL)
+
 
 class EventConsumerPool:
-    def __init__(self, processor_pool: EventProcessorWorkerPool):
+    def __init__(
+        self,
+        processor_pool: EventProcessorWorkerPool,
+        prefetch_count: Optional[int] = None,
+        ack_batch_size: Optional[int] = None,
+        ack_flush_interval_ms: Optional[int] = None,
+        queue_name: Optional[str] = None,
+        stream_offset: Any = None,
+        connect: Callable[[], Awaitable[AbstractRobustConnection]] = _connect,
+        event_repo: Optional[EventRepository] = None,
+        ownership: Optional[PartitionOwnership] = None,
+    ):
         self.processor_pool = processor_pool
+        # with several replicas: only events of partitions this one holds
+        self.ownership = ownership
+        self.prefetch_count = max(
+            1, prefetch_count or settings.EVENT_CONSUMER_PREFETCH_COUNT
+        )
+        # a batch larger than the prefetch window would never fill up
+        self.ack_batch_size = min(
+            self.prefetch_count,
+            ack_batch_size or settings.EVENT_CONSUMER_ACK_BATCH_SIZE,
+        )
+        self.ack_flush_interval_ms = (
+            ack_flush_interval_ms or settings.EVENT_CONSUMER_ACK_FLUSH_INTERVAL_MS
+        )
+        self.queue_name = queue_name or settings.RABBITMQ_EVENTS_QUEUE
+        # an explicit stream_offset bypasses the stored checkpoint
+        self.stream_offset = stream_offset
+        self._connect = connect
+        self.event_repo = event_repo
+        self.consumer_name = settings.EVENT_STREAM_CONSUMER_NAME or settings.APP_NAME
+        self.checkpoint_interval = settings.EVENT_STREAM_CHECKPOINT_INTERVAL_SECONDS
         self._tasks: List[asyncio.Task] = []
         self._running = False
+        # kept past stop(): events still finishing keep moving the watermarks
+        self._offsets: Dict[int, _StreamOffsets] = {}
+
+    def _checkpoints(self, worker_id: int) -> Dict[str, Optional[int]]:
+        """
+        Checkpoint rows of a consumer worker, by key: one per partition this
+        replica holds when the stream is split between replicas, so no two
+        replicas ever write the same row; a single one (None) otherwise.
+        """
+        base = f"{self.consumer_name}:{worker_id}"
+        if self.ownership is None:
+            return {base: None}
+        return {f"{base}:p{p}": p for p in sorted(self.ownership.owned)}
+
+    async def _start_offset(self, worker_id: int) -> Any:
+        """
+        Where to attach to the stream: an explicit offset, a one-time rewind to
+        EVENT_STREAM_REWIND_TO, or right after the oldest of the worker's
+        checkpoints. None means the broker default ("next") for a consumer
+        without any.
+
+        A partition taken over from another replica resumes from its own
+        row, wherever that replica got to. Starting at the oldest row replays
+        the other partitions a little, but only events created before this
+        replica acquired them, which it leaves to adoption from the DB. A
+        partition without a row yet (first start with partitioned
+        checkpoints) falls back to the worker's unpartitioned row.
+        """
+        if self.stream_offset is not None:
+            return self.stream_offset
+        if self.event_repo is None:
+            return None
+
+        stored = {
+            key: await self.event_repo.get_stream_offset(key)
+            for key in self._checkpoints(worker_id)
+        }
+        rewind_to = settings.EVENT_STREAM_REWIND_TO
+        if rewind_to is not None:
+            rewind_to = _as_utc(rewind_to)
+            pending = [
+                key
+                for key, row in stored.items()
+                if row is None
+                or row.rewound_to is None
+                or _as_utc(row.rewound_to) != rewind_to
+            ]
+            if pending:
+                # remember the rewind so later restarts resume from checkpoints
+                for key in pending:
+                    row = stored[key]
+                    await self.event_repo.save_stream_offset(
+                        key, row.offset if row else None, rewound_to=rewind_to
+                    )
+                logger.info(
+                    "consumer-%s: rewinding events stream to %s", worker_id, rewind_to
+                )
+                return rewind_to
+
+        rows = list(stored.values())
+        base = f"{self.consumer_name}:{worker_id}"
+        if base not in stored and any(row is None for row in rows):
+            rows.append(await self.event_repo.get_stream_offset(base))
+        saved = [r.offset for r in rows if r is not None and r.offset is not None]
+        if saved:
+            return min(saved) + 1
+        return None
+
+    async def _save_checkpoint(self, worker_id: int, offsets: _StreamOffsets) -> None:
+        if self.event_repo is None:
+            return
+        for key, partition in self._checkpoints(worker_id).items():
+            committed = (
+                offsets.committed
+                if partition is None
+                else offsets.committed_for(partition)
+            )
+            if committed is None or committed == offsets.saved.get(key):
+                continue
+            await self.event_repo.save_stream_offset(key, committed)
+            offsets.saved[key] = committed
+
+    async def _checkpoint_loop(self, worker_id: int, offsets: _StreamOffsets):
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            try:
+                await self._save_checkpoint(worker_id, offsets)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("consumer-%s: checkpoint failed: %s", worker_id, e)
 
     async def _consumer_worker(self, worker_id: int):
-        conn = await aio_pika.connect_robust(settings.RABBITMQ_URL)
+        offsets = self._offsets[worker_id] = _StreamOffsets()
+        checkpointer: Optional[asyncio.Task] = None
+        conn = await self._connect()
+        acker = _AckBatcher(self.ack_batch_size, self.ack_flush_interval_ms)
         try:
             channel = await conn.channel()
-            await channel.set_qos(prefetch_count=1)
+            await channel.set_qos(prefetch_count=self.prefetch_count)
 
             queue = await channel.declare_queue(
-                settings.RABBITMQ_EVENTS_QUEUE,
+                self.queue_name,
                 durable=True,
                 arguments={"x-queue-type": "stream"},
             )
-            logger.info("consumer-%s: started", worker_id)
+            consume_args = {}
+            start_offset = await self._start_offset(worker_id)
+            if start_offset is not None:
+                consume_args["x-stream-offset"] = start_offset
+            logger.info(
+                "consumer-%s: started (prefetch=%s, ack_batch=%s, offset=%s)",
+                worker_id,
+                self.prefetch_count,
+                self.ack_batch_size,
+                start_offset if start_offset is not None else "next",
+            )
 
-            async with queue.iterator() as it:
+            acker.start()
+            checkpointer = asyncio.create_task(
+                self._checkpoint_loop(worker_id, offsets)
+            )
+            async with queue.iterator(arguments=consume_args) as it:
                 async for msg in it:
                     if not self._running:
                         break
+                    offset = _message_offset(msg)
+                    if offset is not None:
+                        offsets.seen(offset)
                     try:
-                        data = json.loads(msg.body.decode())
+                        # one parse of the raw bytes; the model is only built for
+                        # messages that pass the pending filter
+                        data = decode_debezium_envelope(msg.body)
                         after = data.get("after") or {}
-                        if (after.get("status") or "").lower() != "pending":
-                            await msg.ack()
+                        if not is_pending_change(after) or is_scheduled_retry(after):
+                            # not ours to run (retries come back through the retry
+                            # scheduler/sweeper), but completions unblock parked
+                            # dependents
+                            if after:
+                                self.processor_pool.observe_change(after)
+                            EVENTS_CONSUMED.inc(kind="observed")
+                            await acker.ack(msg)
+                            continue
+
+                        ownership = self.ownership
+                        if ownership is not None and not ownership.owns_change(after):
+                            # another replica's partition, or one we adopt from the DB
+                            self.processor_pool.observe_change(after)
+                            EVENTS_CONSUMED.inc(kind="foreign")
+                            await acker.ack(msg)
                             continue
 
-                        ctx = EventContext.from_debezium_message(msg.body.decode())
-                        await self.processor_pool.add_event(ctx)
-                        await msg.ack()
+                        ctx = EventContext.from_debezium_after(after)
+                        settle = partition = None
+                        if ownership is not None:
+                            settle = ownership.track(ctx.event)
+                            partition = ownership.partition_of(
+                                ctx.event.operation, ctx.event.user_id
+                            )
+                        if offset is not None:
+                            offsets.begin(offset, partition)
+                            ctx.stream_offset = offset
+                            ctx.on_done = _chain(
+                                functools.partial(offsets.done, offset), settle
+                            )
+                        else:
+                            ctx.on_done = settle
+                        # ack only once the event has been handed to the pool
+                        started = time.perf_counter()
+                        await self._hand_off(ctx)
+                        EVENT_HANDOFF_SECONDS.observe(time.perf_counter() - started)
+                        EVENTS_CONSUMED.inc(kind="pending")
+                        await acker.ack(msg)
                     except Exception as e:
+                        EVENTS_CONSUMED.inc(kind="error")
                         logger.exception("consumer-%s: error: %s", worker_id, e)
                         # consider msg.nack(requeue=True) if you want retries
-                        await msg.ack()
+                        await acker.ack(msg)
         finally:
+            if checkpointer:
+                checkpointer.cancel()
+                await asyncio.gather(checkpointer, return_exceptions=True)
+            try:
+                await self._save_checkpoint(worker_id, offsets)
+            except Exception as e:
+                logger.error("consumer-%s: final checkpoint failed: %s", worker_id, e)
+            await acker.close()
             await conn.close()
 
+    async def _hand_off(self, ctx: EventContext) -> None:
+        """
+        Queue ``ctx`` on the processor pool. If that fails the event never
+        went in flight, so its offset and partition count are released here
+        instead of holding the committed watermark back for good.
+        """
+        try:
+            await self.processor_pool.add_event(ctx)
+        except Exception:
+            if ctx.on_done is not None:
+                ctx.on_done()
+            raise
+
+    async def save_checkpoints(self) -> None:
+        """Save every consumer's committed offset, e.g. after a drain."""
+        for worker_id, offsets in self._offsets.items():
+            try:
+                await self._save_checkpoint(worker_id, offsets)
+            except Exception as e:
+                logger.error("consumer-%s: checkpoint failed: %s", worker_id, e)
+
     async def start(self, workers: int):
         if self._running:
             return
@@ -72,21 +420,121 @@ class EventConsumerPool:
 
 
 class EventsRuntime:
-    def __init__(self, processor_pool: EventProcessorWorkerPool):
+    def __init__(
+        self,
+        processor_pool: EventProcessorWorkerPool,
+        lease_repo: Optional[PartitionLeaseRepository] = None,
+    ):
         self.processor_pool = processor_pool
-        self.consumer_pool = EventConsumerPool(processor_pool)
+        self.ownership: Optional[PartitionOwnership] = None
+        if lease_repo is not None and settings.EVENT_STREAM_PARTITIONS > 0:
+            rebalance = settings.EVENT_PARTITION_REBALANCE_INTERVAL_SECONDS
+            self.ownership = PartitionOwnership(
+                lease_repo,
+                processor_pool.event_repo,
+                processor_pool.add_event,
+                partitions=settings.EVENT_STREAM_PARTITIONS,
+                lock_namespace=settings.EVENT_PARTITION_LOCK_NAMESPACE,
+                rebalance_interval_seconds=rebalance,
+                adopt_delay_seconds=settings.EVENT_PARTITION_ADOPT_DELAY_SECONDS,
+            )
+            # persisted retries are recovered by the partition's owner only
+            processor_pool.retry_sweeper.ownership = self.ownership
+        self.consumer_pool = EventConsumerPool(
+            processor_pool,
+            event_repo=processor_pool.event_repo,
+            ownership=self.ownership,
+        )
+        self.partition_maintainer = EventPartitionMaintainer(
+            processor_pool.event_repo,
+            days_ahead=settings.EVENT_PARTITION_DAYS_AHEAD,
+            interval_seconds=settings.EVENT_PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+        )
+        self.expiry_sweeper = ExpiredEventSweeper(
+            processor_pool.event_repo,
+            batch_size=settings.EVENT_EXPIRY_SWEEP_BATCH_SIZE,
+            batch_pause_ms=settings.EVENT_EXPIRY_SWEEP_BATCH_PAUSE_MS,
+            interval_seconds=settings.EVENT_EXPIRY_SWEEP_INTERVAL_SECONDS,
+        )
+        self._expiry_collector = stats_collector(
+            "event_expiry", "Expired event sweeper", self.expiry_sweeper.stats
+        )
         self._started = False
+        self.draining = False
+        self._drain_task: Optional[asyncio.Task] = None
+        self._drain_signal: Optional[int] = None
 
     async def start(self):
         if self._started:
             return
+        self.partition_maintainer.start()
+        self.expiry_sweeper.start()
+        REGISTRY.register_collector(self._expiry_collector)
         self.processor_pool.start()
+        if self.ownership is not None:
+            await self.ownership.start()
         await self.consumer_pool.start(settings.EVENT_CONSUMER_WORKER_POOL_SIZE)
         self._started = True
 
-    async def stop(self):
-        if not self._started:
-            return
+    async def drain(self, timeout: Optional[float] = None) -> int:
+        """
+        Stop intake, give in-flight events ``timeout`` seconds to finish and
+        return the rest to PENDING in one bulk update. ``draining`` is set for
+        the whole time so readiness fails and traffic moves away right away.
+        Returns how many events were returned to PENDING.
+
+        Later calls (the lifespan shutdown after a preStop drain) join the
+        drain already running instead of starting another, and a caller
+        going away does not cut it short.
+        """
+        task = self.begin_drain(timeout)
+        if task is None:
+            return 0
+        return await asyncio.shield(task)
+
+    def begin_drain(self, timeout: Optional[float] = None) -> Optional[asyncio.Task]:
+        """Start draining in the background once; returns the drain task."""
+        if self._drain_task is None:
+            if not self._started:
+                return None
+            self.draining = True
+            self._drain_task = asyncio.create_task(
+                self._drain(timeout), name="events-drain"
+            )
+        return self._drain_task
+
+    def drain_on_signal(self, sig: int = signal.SIGUSR1) -> None:
+        """
+        Start draining when the process gets ``sig``. The chart's preStop hook
+        sends it, so the server keeps serving (readiness reporting "draining")
+        until the kubelet's SIGTERM. There is deliberately no HTTP trigger,
+        and no resume: a drained runtime belongs to a pod on its way out, and
+        the replicas left take over its partitions.
+        """
+        asyncio.get_running_loop().add_signal_handler(sig, self.begin_drain)
+        self._drain_signal = sig
+
+    async def _drain(self, timeout: Optional[float]) -> int:
+        if timeout is None:
+            timeout = settings.EVENT_DRAIN_TIMEOUT_SECONDS
+        logger.info("draining events runtime (deadline %ss)", timeout)
+
         await self.consumer_pool.stop()
-        self.processor_pool.stop()
+        reset = await self.processor_pool.stop(drain_timeout=timeout)
+        # events that finished during the drain moved the committed offsets
+        await self.consumer_pool.save_checkpoints()
+        # only now: the new owners adopt whatever this replica left PENDING
+        if self.ownership is not None:
+            await self.ownership.stop()
+        await self.partition_maintainer.stop()
+        await self.expiry_sweeper.stop()
+        REGISTRY.unregister_collector(self._expiry_collector)
         self._started = False
+        logger.info("events runtime drained (%d events returned to PENDING)", reset)
+        return reset
+
+    async def stop(self):
+        if self._drain_signal is not None:
+            asyncio.get_running_loop().remove_signal_handler(self._drain_signal)
+            self._drain_signal = None
+        await self.drain()
@@ -2,6 +2,7 @@
 import asyncio
 import logging
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from dependency_injector import containers, providers
 
 from app.core.logging import configure_logging
@@ -9,9 +10,12 @@ from app.core.config import settings
 from app.api.v1.routes import routers
 from app.services.registration import register
 from app.core.database import Database
+from app.core.metrics import REGISTRY, stats_collector
 from app.infrastructure.db.repositories.asset import AssetRepository
 from app.infrastructure.db.repositories.event import EventRepository
+from app.infrastructure.db.repositories.partition_lease import PartitionLeaseRepository
 from app.services.event import EventProcessorWorkerPool
+from app.services.event_limiter import AdaptiveConcurrencyLimiter
 from app.infrastructure.messaging.consumers.event import EventsRuntime
 
 configure_logging()
@@ -27,14 +31,46 @@ class Container(containers.DeclarativeContainer):
         ]
     )
     db = providers.Singleton(Database, db_url=settings.DATABASE_URL)
-    asset_repo = providers.Factory(AssetRepository, session_factory=db.provided.session)
+    asset_repo = providers.Factory(
+        AssetRepository,
+        session_factory=db.provided.session,
+        copy_min_rows=settings.ASSET_UPSERT_COPY_MIN_ROWS,
+        upsert_max_params=settings.ASSET_UPSERT_MAX_PARAMS,
+        upsert_max_chunk_bytes=settings.ASSET_UPSERT_MAX_CHUNK_BYTES,
+        upsert_parallelism=settings.ASSET_UPSERT_PARALLELISM,
+    )
     event_repo = providers.Factory(EventRepository, session_factory=db.provided.session)
+    partition_lease_repo = providers.Factory(
+        PartitionLeaseRepository, engine=db.provided.engine
+    )
+    concurrency_limiter = providers.Singleton(
+        AdaptiveConcurrencyLimiter,
+        latency_source=db.provided.stats.drain,
+        initial_limit=settings.EVENT_CONCURRENCY_INITIAL_LIMIT,
+        min_limit=settings.EVENT_CONCURRENCY_MIN_LIMIT,
+        max_limit=settings.EVENT_PROCESSOR_WORKER_POOL_SIZE,
+    )
     processor_pool = providers.Factory(
         EventProcessorWorkerPool,
         event_repo=event_repo,
         asset_repo=asset_repo,
         max_workers=settings.EVENT_PROCESSOR_WORKER_POOL_SIZE,
         queue_capacity_factor=5,
+        status_flush_interval_ms=settings.EVENT_STATUS_FLUSH_INTERVAL_MS,
+        status_flush_batch_size=settings.EVENT_STATUS_FLUSH_BATCH_SIZE,
+        concurrency_limiter=concurrency_limiter,
+        dedupe_index_capacity=settings.EVENT_DEDUPE_INDEX_CAPACITY,
+        delete_batch_window_ms=settings.EVENT_DELETE_BATCH_WINDOW_MS,
+        delete_batch_max_events=settings.EVENT_DELETE_BATCH_MAX_EVENTS,
+        delete_chunk_size=settings.ASSET_DELETE_CHUNK_SIZE,
+        delete_lock_timeout_ms=settings.ASSET_DELETE_LOCK_TIMEOUT_MS,
+        delete_chunk_timeout_ms=settings.ASSET_DELETE_CHUNK_TIMEOUT_MS,
+        priority_aging_seconds=settings.EVENT_PRIORITY_AGING_SECONDS,
+        bulk_body_bytes=settings.EVENT_BULK_BODY_BYTES,
+        retry_sweep_interval_seconds=settings.EVENT_RETRY_SWEEP_INTERVAL_SECONDS,
+        retry_sweep_batch_size=settings.EVENT_RETRY_SWEEP_BATCH_SIZE,
+        retry_sweep_grace_seconds=settings.EVENT_RETRY_SWEEP_GRACE_SECONDS,
+        retry_claim_lease_seconds=settings.EVENT_RETRY_CLAIM_LEASE_SECONDS,
     )
 
 
@@ -44,13 +80,26 @@ container = Container()
 async def lifespan(app: FastAPI):
     reg_task = None
     events_runtime = None
+    collectors = []
     try:
         if ENABLE_REGISTRATION:
             reg_task = asyncio.create_task(register(), name="service-register")
 
+        db = container.db()
+        collectors = [
+            stats_collector("db_pool", "Database connection pool", db.pool_status),
+            stats_collector("db", "Database activity", db.stats.totals),
+        ]
+        for collector in collectors:
+            REGISTRY.register_collector(collector)
+
         processor_pool = container.processor_pool()
-        events_runtime = EventsRuntime(processor_pool)
+        events_runtime = EventsRuntime(
+            processor_pool, lease_repo=container.partition_lease_repo()
+        )
         await events_runtime.start()
+        # the chart's preStop hook signals the drain; see drain_on_signal
+        events_runtime.drain_on_signal()
 
         app.state.container = container
         app.state.events_runtime = events_runtime
@@ -66,6 +115,9 @@ async def lifespan(app: FastAPI):
             reg_task.cancel()
             await asyncio.gather(reg_task, return_exceptions=True)
 
+        for collector in collectors:
+            REGISTRY.unregister_collector(collector)
+
 
 app = FastAPI(
     title="QDIC Assets",
@@ -76,7 +128,21 @@ app = FastAPI(
 
 @app.get("/healthz")
 async def healthz():
+    events_runtime = getattr(app.state, "events_runtime", None)
+    if events_runtime is not None and events_runtime.draining:
+        # not ready: let traffic shift while in-flight events finish
+        return JSONResponse(
+            status_code=503,
+            content={"status": "draining", "tenant": settings.TENANT_ID},
+        )
     return {"status": "ok", "tenant": settings.TENANT_ID}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 app.include_router(routers, prefix="/api/v1")
@@ -1,22 +1,90 @@
 import asyncio
+import functools
 import logging
-from typing import Iterable, List, Optional, Union
+import time
+from enum import Enum
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+from app.core.metrics import REGISTRY, Counter, Gauge, Histogram, stats_collector
 from app.domain.schemas.events import (
     Event,
     EventContext,
     EventStatus,
     Operation,
     EventType,
+    naive_utc,
+    parse_debezium_timestamp,
 )
 from app.infrastructure.db.repositories.event import EventRepository
+from app.services.event_batch import MicroBatcher
+from app.services.event_dedupe import RecentEventIndex
+from app.services.event_dependency import DependencySummary, DependencyTracker
+from app.services.event_lanes import EventLanes
+from app.services.event_limiter import AdaptiveConcurrencyLimiter
+from app.services.event_retry import RetryScheduler, RetrySweeper, backoff_delay
 from app.infrastructure.db.repositories.asset import AssetRepository
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger(__name__)
 DEPENDENCY_POLL_TIMEOUT_SECONDS = 120
-EVENT_TABLE_POLLER_INTERVAL_MS = 100
 REVISIBILITY_DELAY_SECONDS = 20
+MAX_REVISIBILITY_DELAY_SECONDS = 300
 MAX_RETRY_COUNT = 4
+# FAILED is the dead-letter state: final, and it unblocks dependents
+FINAL_STATUSES = (EventStatus.COMPLETED, EventStatus.SKIPPED, EventStatus.FAILED)
+
+# seconds, from sub-second up to the dependency timeout and beyond
+_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 900, 3600)
+
+EVENTS_IN_FLIGHT = Gauge("events_in_flight", "Events currently held by a worker")
+EVENTS_PROCESSED = Counter(
+    "events_processed", "Events reaching a final status", ["event_type", "status"]
+)
+EVENT_RETRIES = Counter("event_retries", "Event retries scheduled", ["event_type"])
+EVENT_RETRIES_EXHAUSTED = Counter(
+    "event_retries_exhausted",
+    "Events moved to FAILED after MAX_RETRY_COUNT retries",
+    ["event_type"],
+)
+EVENT_DEPENDENCY_WAIT = Histogram(
+    "event_dependency_wait_seconds",
+    "Time spent waiting for prerequisites, by outcome (resolved/timeout)",
+    ["event_type", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+EVENT_WAIT_TIME = Histogram(
+    "event_wait_time_seconds",
+    "wait_time of finished events: creation to start of execution",
+    ["event_type"],
+    buckets=_LATENCY_BUCKETS,
+)
+EVENT_COMPLETED_IN = Histogram(
+    "event_completed_in_seconds",
+    "completed_in_seconds of finished events: start of execution to final status",
+    ["event_type"],
+    buckets=_LATENCY_BUCKETS,
+)
+EVENT_PROCESSING_SECONDS = Histogram(
+    "event_processing_seconds",
+    "Time a worker spends on an event (incl. dependency wait), by priority",
+    ["priority"],
+    buckets=_LATENCY_BUCKETS,
+)
+EVENT_BULK_UPDATE = Histogram(
+    "event_bulk_update_seconds",
+    "Duration of bulk_update, by outcome (ok/error)",
+    ["event_type", "outcome"],
+)
 dependencies: dict[Operation, list[EventType]] = {
     Operation.UPDATE_USER_GROUP: [],
     Operation.DELETE_USER_GROUP: [],
@@ -304,12 +372,212 @@ OPTIONAL_EVENT_SET: set[tuple[Operation, EventType]] = {
 }
 
 
-def _to_operation(op: Union[Operation, str]) -> Operation:
-    return op if isinstance(op, Operation) else Operation(op)
+def _label(x: Union[Enum, str, None]) -> str:
+    return x.value if isinstance(x, Enum) else str(x or "")
+
+
+class Prerequisites(NamedTuple):
+    required: FrozenSet[str]  # must exist and be final
+    optional: FrozenSet[str]  # must be final if they exist
+
+    @property
+    def event_types(self) -> FrozenSet[str]:
+        return self.required | self.optional
+
+
+def _compile_prerequisites() -> Dict[Tuple[str, str], Prerequisites]:
+    """
+    (operation, event_type) -> what has to finish first: the types listed
+    before the event's own type in ``dependencies``, split by
+    OPTIONAL_EVENT_SET. Types not in their operation's list have none.
+    """
+    compiled: Dict[Tuple[str, str], Prerequisites] = {}
+    for op, deps in dependencies.items():
+        for i, event_type in enumerate(deps):
+            key = (op.value, event_type.value)
+            if key in compiled:  # the first occurrence decides
+                continue
+            before = {dep for dep in deps[:i] if dep != event_type}
+            optional = {dep for dep in before if (op, dep) in OPTIONAL_EVENT_SET}
+            compiled[key] = Prerequisites(
+                required=frozenset(dep.value for dep in before - optional),
+                optional=frozenset(dep.value for dep in optional),
+            )
+    return compiled
+
+
+PREREQUISITES = _compile_prerequisites()
+NO_PREREQUISITES = Prerequisites(frozenset(), frozenset())
+# every prerequisite type per operation: what a history summary has to cover
+OPERATION_PREREQUISITE_TYPES: Dict[str, FrozenSet[str]] = {}
+for (_op, _), _prereqs in PREREQUISITES.items():
+    OPERATION_PREREQUISITE_TYPES[_op] = (
+        OPERATION_PREREQUISITE_TYPES.get(_op, frozenset()) | _prereqs.event_types
+    )
+
+
+def dependencies_met(prereqs: Prerequisites, summary: DependencySummary) -> bool:
+    for event_type in prereqs.required:
+        present, done = summary.get(event_type, (False, False))
+        if not (present and done):
+            return False
+    for event_type in prereqs.optional:
+        present, done = summary.get(event_type, (False, True))
+        if present and not done:
+            return False
+    return True
 
 
-def _to_event_type(et: Union[EventType, str]) -> EventType:
-    return et if isinstance(et, EventType) else EventType(et)
+class EventStatusWriter:
+    """
+    Write-behind buffer for event status transitions.
+
+    Transitions are coalesced per event (latest status wins, times and retry
+    fields are kept unless a newer transition sets them) and written with one
+    bulk UPDATE per tick, or as soon as ``max_batch_size`` events are pending.
+    Flushes are serialized, so an event's transitions reach the DB in order.
+    ``on_flushed`` callbacks run once the transition is committed.
+    """
+
+    def __init__(
+        self,
+        event_repo: EventRepository,
+        flush_interval_ms: int = 50,
+        max_batch_size: int = 500,
+    ):
+        self.event_repo = event_repo
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._callbacks: Dict[str, List[Callable[[], None]]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self.total_flushed = 0
+        self.flush_errors = 0
+
+    def submit(
+        self,
+        event_id: str,
+        status: str,
+        wait_time: Optional[int] = None,
+        completed_in_seconds: Optional[int] = None,
+        on_flushed: Optional[Callable[[], None]] = None,
+        retry_count: Optional[int] = None,
+        next_attempt_at: Optional[datetime] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        if on_flushed is not None:
+            self._callbacks.setdefault(event_id, []).append(on_flushed)
+        self._merge(
+            self._pending,
+            {
+                "id": event_id,
+                "status": status,
+                "wait_time": wait_time,
+                "completed_in_seconds": completed_in_seconds,
+                "retry_count": retry_count,
+                "next_attempt_at": next_attempt_at,
+                "error": error,
+            },
+        )
+        if len(self._pending) >= self.max_batch_size:
+            self._wakeup.set()
+
+    def pending_wait_time(self, event_id: str) -> Optional[int]:
+        row = self._pending.get(event_id)
+        return row.get("wait_time") if row else None
+
+    @staticmethod
+    def _merge(target: Dict[str, Dict[str, Any]], row: Dict[str, Any]) -> None:
+        current = target.get(row["id"])
+        if current is None:
+            target[row["id"]] = dict(row)
+            return
+        current["status"] = row["status"]
+        for key in (
+            "wait_time",
+            "completed_in_seconds",
+            "retry_count",
+            "next_attempt_at",
+            "error",
+        ):
+            if row.get(key) is not None:
+                current[key] = row[key]
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            callbacks, self._callbacks = self._callbacks, {}
+            rows = list(batch.values())
+            written = 0
+            try:
+                for i in range(0, len(rows), self.max_batch_size):
+                    written += await self.event_repo.bulk_update_status_and_times(
+                        rows[i : i + self.max_batch_size]
+                    )
+            except Exception:
+                self.flush_errors += 1
+                # Re-queue the whole batch underneath anything submitted meanwhile;
+                # re-applying already written rows is harmless.
+                for row in self._pending.values():
+                    self._merge(batch, row)
+                self._pending = batch
+                for event_id, fns in self._callbacks.items():
+                    callbacks.setdefault(event_id, []).extend(fns)
+                self._callbacks = callbacks
+                raise
+            self.total_flushed += written
+
+            for fns in callbacks.values():
+                for fn in fns:
+                    try:
+                        fn()
+                    except Exception as e:
+                        logger.error(f"Error in status flush callback: {e}")
+            return written
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "total_flushed": self.total_flushed,
+            "flush_errors": self.flush_errors,
+        }
+
+    async def _run(self):
+        while self._running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error flushing event statuses: {e}")
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run(), name="event-status-writer")
+
+    async def stop(self):
+        self._running = False
+        self._wakeup.set()
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # final flush so no transition is lost on shutdown
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing event statuses on shutdown: {e}")
 
 
 class EventProcessorWorkerPool:
@@ -319,25 +587,133 @@ class EventProcessorWorkerPool:
         asset_repo: AssetRepository,
         max_workers: int = 1000,
         queue_capacity_factor: int = 5,
+        status_flush_interval_ms: int = 50,
+        status_flush_batch_size: int = 500,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        dedupe_index_capacity: int = 100_000,
+        delete_batch_window_ms: int = 20,
+        delete_batch_max_events: int = 200,
+        delete_chunk_size: int = 1000,
+        delete_lock_timeout_ms: Optional[int] = None,
+        delete_chunk_timeout_ms: Optional[int] = None,
+        priority_aging_seconds: float = 5.0,
+        bulk_body_bytes: int = 4096,
+        retry_sweep_interval_seconds: float = 5,
+        retry_sweep_batch_size: int = 100,
+        retry_sweep_grace_seconds: float = 30,
+        retry_claim_lease_seconds: float = 300,
     ):
         self.max_workers = max_workers
-        self.queue = asyncio.Queue(maxsize=max_workers * queue_capacity_factor)
+        # per-key ordered lanes: same (operation, user_id, body) runs in order,
+        # independent keys in parallel, fast-track/small events ahead of bulk
+        self.lanes = EventLanes(
+            maxsize=max_workers * queue_capacity_factor,
+            aging_seconds=priority_aging_seconds,
+            bulk_body_bytes=bulk_body_bytes,
+        )
         self.workers: List[asyncio.Task] = []
         self.is_running = False
+        # events held by a worker, by id; reset to PENDING if a drain times out
+        self._in_flight: Dict[str, EventContext] = {}
         self.event_repo = event_repo
         self.asset_repo = asset_repo
+        self.status_writer = EventStatusWriter(
+            event_repo,
+            flush_interval_ms=status_flush_interval_ms,
+            max_batch_size=status_flush_batch_size,
+        )
+        self.dependency_tracker = DependencyTracker()
+        self.recent_events = RecentEventIndex(capacity=dedupe_index_capacity)
+        # gates the DB-bound phases; dependency waits don't hold a slot
+        self.concurrency_limiter = concurrency_limiter or AdaptiveConcurrencyLimiter(
+            initial_limit=max_workers, max_limit=max_workers
+        )
+        self.retry_claim_lease_seconds = retry_claim_lease_seconds
+        self.retry_scheduler = RetryScheduler(
+            self._redeliver_retry,
+            base_delay_seconds=REVISIBILITY_DELAY_SECONDS,
+            max_delay_seconds=MAX_REVISIBILITY_DELAY_SECONDS,
+        )
+        # persisted retries the scheduler above lost (crash, restart, other pod)
+        self.retry_sweeper = RetrySweeper(
+            event_repo,
+            self._deliver_recovered,
+            interval_seconds=retry_sweep_interval_seconds,
+            batch_size=retry_sweep_batch_size,
+            grace_seconds=retry_sweep_grace_seconds,
+            lease_seconds=retry_claim_lease_seconds,
+        )
+        # DELETE_ASSETS events arriving together are purged as one batch
+        self.delete_batcher: MicroBatcher[str] = MicroBatcher(
+            self._purge_asset_batch,
+            window_ms=delete_batch_window_ms,
+            max_size=delete_batch_max_events,
+        )
+        self.delete_chunk_size = delete_chunk_size
+        self.delete_lock_timeout_ms = delete_lock_timeout_ms
+        self.delete_chunk_timeout_ms = delete_chunk_timeout_ms
+        self._collectors = [
+            stats_collector("event_lanes", "Event scheduler lanes", self.lanes.stats),
+            stats_collector(
+                "event_status_writer",
+                "Status write-behind",
+                self.status_writer.stats,
+                counters=("flush_errors",),
+            ),
+            stats_collector(
+                "event_retry_scheduler", "Scheduled retries", self.retry_scheduler.stats
+            ),
+            stats_collector(
+                "event_retry_sweeper",
+                "Persisted retries recovered",
+                self.retry_sweeper.stats,
+                counters=("sweep_errors",),
+            ),
+            stats_collector(
+                "event_concurrency",
+                "DB concurrency limit",
+                self.concurrency_limiter.stats,
+            ),
+            stats_collector(
+                "event_dependencies",
+                "Dependency tracker",
+                self.dependency_tracker.stats,
+            ),
+            stats_collector(
+                "event_dedupe",
+                "Recent-event duplicate index",
+                self.recent_events.stats,
+                counters=("hits", "misses"),
+            ),
+            stats_collector(
+                "event_delete_batches",
+                "Coalesced DELETE_ASSETS purges",
+                self.delete_batcher.stats,
+            ),
+        ]
 
     async def worker(self):
         """Worker that processes events from the queue"""
         while self.is_running:
             try:
-                event_ctx = await self.queue.get()
+                event_ctx = await self.lanes.get()
 
                 if event_ctx is None:  # Poison pill
                     break
 
-                await self.process_event(event_ctx)
-                self.queue.task_done()
+                EVENTS_IN_FLIGHT.inc()
+                self._in_flight[event_ctx.event.id] = event_ctx
+                started = time.perf_counter()
+                try:
+                    await self.process_event(event_ctx)
+                finally:
+                    EVENTS_IN_FLIGHT.dec()
+                    self._in_flight.pop(event_ctx.event.id, None)
+                    self.lanes.done(event_ctx)
+                    EVENT_PROCESSING_SECONDS.observe(
+                        time.perf_counter() - started,
+                        priority=self.lanes.priority_of(event_ctx.event).name.lower(),
+                    )
 
             except asyncio.CancelledError:
                 break
@@ -351,146 +727,183 @@ class EventProcessorWorkerPool:
             # Update event status to executing
             await self.update_event_status(event_ctx, EventStatus.EXECUTING, True)
 
-            # Check for duplicate records
-            dupe = await self.has_duplicate_records(event_ctx)
+            # Check for duplicate records, in memory first
+            dupe = self.recent_events.is_duplicate(ev)
+            if dupe is None:
+                async with self.concurrency_limiter:
+                    dupe = await self.has_duplicate_records(event_ctx)
             if dupe:
                 await self.update_event_status(event_ctx, EventStatus.SKIPPED, False)
                 return
 
-            actual_deps_for_op = self.get_dependencies(ev)
-            if actual_deps_for_op:
-                start = datetime.now(timezone.utc)
-
-                while True:
-                    db_events_for_op = await self.get_dependent_records(ev)
-                    if self._all_dependencies_completed(
-                        ev, actual_deps_for_op, db_events_for_op
-                    ):
-                        break
-
-                    # timeout?
-                    elapsed = (datetime.now(timezone.utc) - start).total_seconds()
-                    if elapsed > DEPENDENCY_POLL_TIMEOUT_SECONDS:
-                        # increase retry_count and "requeue".
-                        ev.retry_count += 1
-
-                        if ev.retry_count <= MAX_RETRY_COUNT:
-                            await self.event_repo.update_status_and_times(
-                                event_id=ev.id, status=EventStatus.PENDING.value
-                            )
-
-                            # INTERNAL REQUEUE: push back into our own worker queue after delay
-                            await asyncio.sleep(REVISIBILITY_DELAY_SECONDS)
-                            await self.add_event(event_ctx)
-                        else:
-                            # give up gracefully: mark completed to avoid deadlock (Go unblocks dependents)
-                            await self.update_event_status(
-                                event_ctx, EventStatus.COMPLETED, False
-                            )
-
-                        return  # end processing for now
-
-                    await asyncio.sleep(EVENT_TABLE_POLLER_INTERVAL_MS / 1000)
+            prereqs = self.get_prerequisites(ev)
+            if prereqs.event_types:
+                started = time.perf_counter()
+                # parked: give the lane to lane-mates, which may be the
+                # prerequisites themselves
+                resolved = await self.wait_for_dependencies(
+                    ev, prereqs, on_wait=functools.partial(self.lanes.done, event_ctx)
+                )
+                EVENT_DEPENDENCY_WAIT.observe(
+                    time.perf_counter() - started,
+                    event_type=_label(ev.event_type),
+                    outcome="resolved" if resolved else "timeout",
+                )
+                if not resolved:
+                    await self.retry_event(event_ctx, "dependencies not resolved")
+                    return  # end processing for now
 
             ev.is_dependency_resolved = True
             await self.update_event_status(event_ctx, EventStatus.EXECUTING, True)
             # Process the event
-            await self.bulk_update(event_ctx)
+            if ev.event_type == EventType.DELETE_ASSETS:
+                # coalesced; each batch takes a single limiter slot
+                await self.bulk_update(event_ctx)
+            else:
+                async with self.concurrency_limiter:
+                    await self.bulk_update(event_ctx)
 
             # Update event status to completed
             await self.update_event_status(event_ctx, EventStatus.COMPLETED, False)
 
         except Exception as e:
-            ev.retry_count += 1
-            if ev.retry_count <= MAX_RETRY_COUNT:
-                await self.event_repo.update_status_and_times(
-                    event_id=ev.id, status=EventStatus.PENDING.value
-                )
-                await asyncio.sleep(REVISIBILITY_DELAY_SECONDS)
-                await self.add_event(event_ctx)
-            else:
-                await self.update_event_status(event_ctx, EventStatus.COMPLETED, False)
+            await self.retry_event(event_ctx, str(e))
             logger.error(f"Error processing event {ev.id}: {e}")
 
-    def _get_dependencies_until_self(
-        self, event: Event, deps: List[EventType]
-    ) -> List[EventType]:
-        for i, dep in enumerate(deps):
-            if dep == event.event_type:
-                return deps[:i]
-        return []
-
-    def _is_event_present_in_db(
-        self, events: Iterable[Event], event_type: EventType
-    ) -> bool:
-        for e in events:
-            if e.event_type == event_type:
-                return True
-        return False
+    async def retry_event(
+        self, event_ctx: EventContext, error: Optional[str] = None
+    ):
+        """
+        Increase retry_count and hand the event to the retry scheduler, which
+        re-enqueues it after a backoff without holding this worker. The retry
+        is persisted on the event row (retry_count, next_attempt_at), so the
+        retry sweeper recovers it if this process goes away first. Past
+        MAX_RETRY_COUNT the event is dead-lettered as FAILED.
+        """
+        ev = event_ctx.event
+        ev.retry_count += 1
+        if error:
+            ev.error = error
 
-    def _optional_event(
-        self, operation: Operation, event_type: EventType, events: Iterable[Event]
-    ) -> bool:
-        return self._is_optional_event(
-            operation, event_type
-        ) and not self._is_event_present_in_db(events, event_type)
+        if ev.retry_count <= MAX_RETRY_COUNT:
+            EVENT_RETRIES.inc(event_type=_label(ev.event_type))
+            delay = backoff_delay(
+                ev.retry_count,
+                REVISIBILITY_DELAY_SECONDS,
+                MAX_REVISIBILITY_DELAY_SECONDS,
+            )
+            ev.status = EventStatus.PENDING
+            ev.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            self.dependency_tracker.observe_event(ev)
+            self.status_writer.submit(
+                event_id=ev.id,
+                status=EventStatus.PENDING.value,
+                retry_count=ev.retry_count,
+                next_attempt_at=naive_utc(ev.next_attempt_at),
+                error=ev.error,
+                # once the retry is durable the DB owns it, not the stream
+                on_flushed=event_ctx.on_done,
+            )
+            self.retry_scheduler.schedule(event_ctx, delay)
+            logger.info(
+                "Retry %d for event %s scheduled in %.1fs", ev.retry_count, ev.id, delay
+            )
+        else:
+            EVENT_RETRIES_EXHAUSTED.inc(event_type=_label(ev.event_type))
+            logger.error(
+                "Event %s failed after %d retries: %s", ev.id, MAX_RETRY_COUNT, ev.error
+            )
+            await self.update_event_status(event_ctx, EventStatus.FAILED, False)
 
-    def _all_dependencies_completed(
+    async def wait_for_dependencies(
         self,
         event: Event,
-        actual_dependencies_for_operation: List[EventType],
-        db_events_for_operation: List[Event],
+        prereqs: Prerequisites,
+        on_wait: Optional[Callable[[], None]] = None,
     ) -> bool:
-        deps = self._get_dependencies_until_self(
-            event, actual_dependencies_for_operation
+        """
+        Park until every prerequisite of ``event`` is final, woken by the
+        dependency tracker instead of polling. ``on_wait`` is called once,
+        before the first actual wait. Returns False on timeout.
+        """
+        tracker = self.dependency_tracker
+        if tracker.needs_priming(event):
+            tracker.prime(event, await self.get_dependency_summary(event))
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + DEPENDENCY_POLL_TIMEOUT_SECONDS
+        # park before the first check so a completion in between isn't missed
+        waiter = tracker.park(event, prereqs.event_types)
+        try:
+            while True:
+                summary = tracker.summary(event, prereqs.event_types)
+                if summary is None:
+                    # history the tracker can't vouch for: one GROUP BY, kept
+                    # as the new history if it's the freshest we have
+                    summary = await self.get_dependency_summary(event)
+                    tracker.prime(event, summary)
+                if dependencies_met(prereqs, summary):
+                    return True
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                if on_wait is not None:
+                    on_wait()
+                    on_wait = None
+                try:
+                    await asyncio.wait_for(waiter.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                waiter.clear()
+        finally:
+            tracker.unpark(event, prereqs.event_types, waiter)
+
+        # timed out: re-read from DB in case a notification was missed
+        return dependencies_met(
+            prereqs, await self.get_dependency_summary(event, prereqs.event_types)
         )
-        for dep in deps:
-            # Optional dep not present → fine, skip
-            if self._optional_event(event.operation, dep, db_events_for_operation):
-                continue
 
-            # If the dependency IS this event's own type, true immediately
-            if dep == event.event_type:
-                return True
-
-            dep_found = False
-            for db_event in db_events_for_operation:
-                if db_event.event_type == dep:
-                    dep_found = True
-                    if db_event.status not in (
-                        EventStatus.COMPLETED,
-                        EventStatus.SKIPPED,
-                    ):
-                        return False
-
-            if not dep_found:
-                return False
-
-        return True
-
-    async def get_dependent_records(self, event: Event) -> List[Event]:
-        return [
-            Event.model_validate(r, from_attributes=True)
-            for r in await self.event_repo.get_dependent_records(event)
-        ]
+    def observe_event(self, event: Event) -> None:
+        """Feed an event seen on the CDC stream into the in-memory indexes."""
+        self.dependency_tracker.observe_event(event)
+        self.recent_events.observe_event(event)
 
-    async def has_duplicate_records(self, event_ctx: EventContext) -> bool:
-        duplicates = await self.event_repo.get_duplicate_records(event_ctx.event)
-        return len(duplicates) > 0
+    def observe_change(self, after: Dict[str, Any]) -> None:
+        """Same as observe_event, straight from a decoded Debezium ``after`` image."""
+        created_at = parse_debezium_timestamp(after.get("created_at"))
+        self.dependency_tracker.observe(
+            event_id=after.get("id"),
+            operation=after.get("operation"),
+            user_id=after.get("user_id"),
+            event_type=after.get("event_type"),
+            status=after.get("status"),
+            created_at=created_at,
+            expires_at=parse_debezium_timestamp(after.get("expires_at")),
+        )
+        self.recent_events.observe(
+            after.get("id"), after.get("event_type"), after.get("body"), created_at
+        )
 
-    def get_dependencies(self, event: Event) -> List[EventType]:
-        return dependencies.get(event.operation, [])
+    async def get_dependency_summary(
+        self, event: Event, event_types: Optional[Iterable[str]] = None
+    ) -> DependencySummary:
+        """DB summary of earlier events; all prerequisite types of the operation
+        unless ``event_types`` narrows it."""
+        if event_types is None:
+            event_types = OPERATION_PREREQUISITE_TYPES.get(
+                _label(event.operation), frozenset()
+            )
+        async with self.concurrency_limiter:
+            return await self.event_repo.get_dependency_summary(event, event_types)
 
-    def _is_optional_event(
-        self, operation: Union[Operation, str], event_type: Union[EventType, str]
-    ) -> bool:
-        try:
-            return (
-                _to_operation(operation),
-                _to_event_type(event_type),
-            ) in OPTIONAL_EVENT_SET
-        except ValueError:
-            return False
+    async def has_duplicate_records(self, event_ctx: EventContext) -> bool:
+        return await self.event_repo.has_duplicate_record(event_ctx.event)
+
+    def get_prerequisites(self, event: Event) -> Prerequisites:
+        return PREREQUISITES.get(
+            (_label(event.operation), _label(event.event_type)), NO_PREREQUISITES
+        )
 
     async def update_event_status(
         self, event_ctx: EventContext, status: EventStatus, log_only_wait_time: bool
@@ -506,8 +919,11 @@ class EventProcessorWorkerPool:
             completed_in_seconds: Optional[int] = None
         else:
             # Second phase (COMPLETED/FAILED/SKIPPED): compute completed_in_seconds using existing wait_time
-            # If message didn’t carry wait_time (e.g., consumer restarted), fetch it from DB.
+            # If message didn’t carry wait_time (e.g., consumer restarted), take it from
+            # the not-yet-flushed transitions, then from DB.
             wait_time = e.wait_time
+            if wait_time is None:
+                wait_time = self.status_writer.pending_wait_time(e.id)
             if wait_time is None:
                 wait_time = await self.event_repo.get_wait_time(e.id)
                 if wait_time is None:
@@ -522,12 +938,22 @@ class EventProcessorWorkerPool:
             e.completed_in_seconds = completed_in_seconds
 
         e.status = status
+        self.dependency_tracker.observe_event(e)
+        if status in FINAL_STATUSES:
+            event_type = _label(e.event_type)
+            EVENTS_PROCESSED.inc(event_type=event_type, status=status.value)
+            EVENT_WAIT_TIME.observe(e.wait_time or 0, event_type=event_type)
+            EVENT_COMPLETED_IN.observe(completed_in_seconds, event_type=event_type)
 
-        await self.event_repo.update_status_and_times(
+        self.status_writer.submit(
             event_id=e.id,
             status=e.status.value,
             wait_time=e.wait_time,
             completed_in_seconds=e.completed_in_seconds,
+            retry_count=e.retry_count,
+            error=e.error,
+            # the stream offset may only advance once the final status is durable
+            on_flushed=event_ctx.on_done if status in FINAL_STATUSES else None,
         )
 
     def _ensure_aware_utc(self, dt: datetime) -> datetime:
@@ -540,6 +966,7 @@ class EventProcessorWorkerPool:
 
     async def bulk_update(self, event_ctx: EventContext):
         event_type = event_ctx.event.event_type
+        started = time.perf_counter()
 
         try:
             if event_type == EventType.DELETE_ASSETS:
@@ -550,8 +977,16 @@ class EventProcessorWorkerPool:
                 raise ValueError(f"Unknown event type: {event_type}")
 
         except Exception as e:
+            EVENT_BULK_UPDATE.observe(
+                time.perf_counter() - started,
+                event_type=_label(event_type),
+                outcome="error",
+            )
             logger.error(f"Error in bulk_update for {event_type}: {e}")
             raise
+        EVENT_BULK_UPDATE.observe(
+            time.perf_counter() - started, event_type=_label(event_type), outcome="ok"
+        )
 
     async def _delete_assets(self, event_ctx: EventContext):
         logger.info(
@@ -563,27 +998,49 @@ class EventProcessorWorkerPool:
         if event_ctx.event.operation != Operation.DELETE_ASSETS:
             raise ValueError(f"Unsupported operation: {event_ctx.event.operation}")
 
-        asset_id = event_ctx.event.body
+        # joins whatever other deletes arrive within the batch window; the
+        # event's final status goes out with theirs in one status flush
+        return await self.delete_batcher.submit(event_ctx.event.body)
 
-        logger.info("Collecting descendants for asset %s", asset_id)
-        descendants = await self.asset_repo.fetch_descendants(
-            ancestor_id=asset_id,
-            min_depth=0,
-            max_depth=2,
-            project_fields=None,
-        )
-        ids = [a.id for a in descendants]
-        ids.append(asset_id)
+    async def _purge_asset_batch(self, asset_ids: List[str]) -> Dict[str, int]:
+        roots = list(dict.fromkeys(asset_ids))
 
-        # 2) Bulk delete in one go (repo handles session/commit)
-        logger.info("Deleting %d assets (including root)", len(ids))
-        deleted = await self.asset_repo.delete_by_ids(ids)
+        def progress(deleted: int, total: int):
+            logger.info("Deleted %d/%d assets", deleted, total)
 
-        logger.info("Deleted %d assets (requested %d)", deleted, len(ids))
-        return {"deleted": deleted, "requested": len(ids)}
+        logger.info(
+            "Purging subtrees of %d assets for %d delete events",
+            len(roots),
+            len(asset_ids),
+        )
+        async with self.concurrency_limiter:
+            # subtree resolved as IDs only, deleted in bounded chunks/transactions
+            result = await self.asset_repo.purge_subtrees(
+                roots,
+                min_depth=0,
+                max_depth=2,
+                chunk_size=self.delete_chunk_size,
+                lock_timeout_ms=self.delete_lock_timeout_ms,
+                chunk_timeout_ms=self.delete_chunk_timeout_ms,
+                on_progress=progress,
+            )
+
+        logger.info(
+            "Deleted %d assets (requested %d) in %d chunks",
+            result["deleted"],
+            result["requested"],
+            result["chunks"],
+        )
+        return {**result, "events": len(asset_ids)}
 
     def start(self):
         self.is_running = True
+        self.status_writer.start()
+        self.retry_scheduler.start()
+        self.retry_sweeper.start()
+        self.concurrency_limiter.start()
+        for collector in self._collectors:
+            REGISTRY.register_collector(collector)
         for i in range(self.max_workers):
             worker_task = asyncio.create_task(
                 self.worker(), name=f"event-processor-{i}"
@@ -593,17 +1050,92 @@ class EventProcessorWorkerPool:
         logger.info(f"Started event processor pool with {self.max_workers} workers")
 
     async def add_event(self, event_ctx: EventContext):
-        await self.queue.put(event_ctx)
+        self.observe_event(event_ctx.event)
+        await self.lanes.put(event_ctx)
 
-    async def stop(self):
+    def is_active(self, event_id: str) -> bool:
+        """Whether the event is queued in a lane or held by a worker."""
+        return event_id in self._in_flight or self.lanes.holds(event_id)
+
+    async def _redeliver_retry(self, event_ctx: EventContext):
+        """
+        Hand a due retry back to the lanes. Its row is leased again first
+        (next_attempt_at pushed out by the claim lease), so the sweeper
+        leaves it alone while it waits in a lane; the next status write
+        clears it.
+        """
+        ev = event_ctx.event
+        ev.next_attempt_at = datetime.now(timezone.utc) + timedelta(
+            seconds=self.retry_claim_lease_seconds
+        )
+        self.status_writer.submit(
+            event_id=ev.id,
+            status=EventStatus.PENDING.value,
+            next_attempt_at=naive_utc(ev.next_attempt_at),
+        )
+        await self.add_event(event_ctx)
+
+    async def _deliver_recovered(self, event_ctx: EventContext):
+        """Sweeper hand-off; skips retries this process is already running."""
+        if self.is_active(event_ctx.event.id):
+            logger.info(
+                "Recovered retry %s is already queued here, skipping",
+                event_ctx.event.id,
+            )
+            return
+        await self.add_event(event_ctx)
+
+    async def stop(self, drain_timeout: Optional[float] = None) -> int:
+        """
+        Stop dispatching and wait for the events workers are holding. With a
+        ``drain_timeout``, workers still busy after it are cancelled and their
+        events are put back to PENDING in the final status flush. Returns how
+        many events were put back.
+        """
         self.is_running = False
 
-        # Send poison pills to all workers
-        for _ in range(self.max_workers):
-            await self.queue.put(None)
+        # Pending retries stay PENDING in the DB, due at next_attempt_at; the
+        # retry sweeper (here after a restart, or on another pod) picks them up
+        await self.retry_sweeper.stop()
+        dropped = await self.retry_scheduler.stop()
+        if dropped:
+            logger.info("Left %d scheduled retries to the sweeper", len(dropped))
+
+        # Send poison pills to all workers; queued events are left PENDING
+        self.lanes.close(self.max_workers)
 
         # Wait for all workers to complete
+        reset = 0
         if self.workers:
+            _, busy = await asyncio.wait(self.workers, timeout=drain_timeout)
+            unfinished = list(self._in_flight.values())
+            for task in busy:
+                task.cancel()
             await asyncio.gather(*self.workers, return_exceptions=True)
+            self.workers.clear()
+            for event_ctx in unfinished:
+                if event_ctx.event.status in FINAL_STATUSES:
+                    continue
+                # due right away: the sweeper re-runs it, so the stream
+                # offset no longer has to wait for it
+                self.status_writer.submit(
+                    event_id=event_ctx.event.id,
+                    status=EventStatus.PENDING.value,
+                    next_attempt_at=naive_utc(datetime.now(timezone.utc)),
+                    on_flushed=event_ctx.on_done,
+                )
+                reset += 1
+            if reset:
+                logger.info(
+                    "Drain deadline reached; returning %d events to PENDING", reset
+                )
+        # a purge nobody waits for any more is cut short; its events are PENDING
+        await self.delete_batcher.stop(cancel=drain_timeout is not None)
 
+        await self.concurrency_limiter.stop()
+        # one bulk UPDATE for everything still buffered, resets included
+        await self.status_writer.stop()
+        for collector in self._collectors:
+            REGISTRY.unregister_collector(collector)
         logger.info("Event processor pool stopped")
+        return reset
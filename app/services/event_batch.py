@@ -0,0 +1,103 @@
+import asyncio
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+class MicroBatcher(Generic[T]):
+    """
+    Coalesces concurrent submissions into one ``flush(items)`` call.
+
+    The first submission opens a window of ``window_ms``; everything
+    submitted until it closes (or until ``max_size`` items are collected)
+    is flushed together. Every submitter awaits the shared result, or the
+    shared exception if the flush fails.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[T]], Awaitable[Any]],
+        window_ms: int = 20,
+        max_size: int = 200,
+    ):
+        self.flush = flush
+        self.window = window_ms / 1000
+        self.max_size = max(1, max_size)
+        self._items: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self.total_batches = 0
+        self.total_items = 0
+        self.last_batch_size = 0
+
+    async def submit(self, item: T) -> Any:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._items.append((item, fut))
+        if len(self._items) >= self.max_size:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush_now)
+        return await fut
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._items:
+            return
+        items, self._items = self._items, []
+        task = asyncio.create_task(self._run(items))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _run(self, items: List[Tuple[T, asyncio.Future]]) -> None:
+        self.total_batches += 1
+        self.total_items += len(items)
+        self.last_batch_size = len(items)
+        try:
+            result = await self.flush([item for item, _ in items])
+        except Exception as e:
+            for _, fut in items:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for _, fut in items:
+            if not fut.done():
+                fut.set_result(result)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._items),
+            "in_progress": len(self._flushes),
+            "total_batches": self.total_batches,
+            "total_items": self.total_items,
+            "last_batch_size": self.last_batch_size,
+        }
+
+    async def stop(self, cancel: bool = False) -> None:
+        """
+        Flush whatever is still collecting and wait for running flushes, or
+        cancel them when ``cancel`` is set.
+        """
+        if cancel:
+            for _, fut in self._items:
+                fut.cancel()
+            self._items = []
+        self._flush_now()
+        if self._flushes:
+            if cancel:
+                for task in self._flushes:
+                    task.cancel()
+            await asyncio.gather(*self._flushes, return_exceptions=True)
@@ -0,0 +1,115 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+from app.domain.schemas.events import Event, EventType, body_hash
+
+DedupeKey = Tuple[str, str]
+
+
+class _Newest(NamedTuple):
+    id: str
+    created_at: datetime
+
+
+def _value(x: Union[Enum, str, None]) -> str:
+    if x is None:
+        return ""
+    return x.value if isinstance(x, Enum) else str(x)
+
+
+def _as_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class RecentEventIndex:
+    """
+    Bounded LRU of the newest event seen per (event_type, body_hash).
+
+    Fed from every event image on the CDC stream, so it answers the duplicate
+    question ("is there a later event with the same type and body?") as of the
+    current stream position:
+    - a newer event under the key → duplicate, no DB round trip;
+    - no newer event, and the index has been complete since before this
+      event was created → not a duplicate;
+    - otherwise (created before the index's horizon, or a key that may have
+      been evicted) → unknown, the caller asks Postgres.
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = max(1, capacity)
+        self._entries: "OrderedDict[DedupeKey, _Newest]" = OrderedDict()
+        # every event created at/after this point has been observed and kept
+        self.complete_from: Optional[datetime] = None
+        # newest created_at observed; the stream has caught up to here
+        self.observed_until: Optional[datetime] = None
+        self.hits = 0
+        self.misses = 0
+
+    def observe(
+        self,
+        event_id: Optional[str],
+        event_type: Union[EventType, str, None],
+        body: Optional[str],
+        created_at: Optional[datetime],
+    ) -> None:
+        created_at = _as_utc(created_at)
+        if not event_id or created_at is None:
+            return
+
+        if self.complete_from is None:
+            self.complete_from = created_at
+        if self.observed_until is None or created_at > self.observed_until:
+            self.observed_until = created_at
+
+        key = (_value(event_type), body_hash(body))
+        current = self._entries.get(key)
+        if current is None or created_at > current.created_at:
+            self._entries[key] = _Newest(event_id, created_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.capacity:
+            _, evicted = self._entries.popitem(last=False)
+            # anything at or before the evicted event may now be missing
+            if evicted.created_at > self.complete_from:
+                self.complete_from = evicted.created_at
+
+    def observe_event(self, event: Event) -> None:
+        self.observe(event.id, event.event_type, event.body, event.created_at)
+
+    def is_duplicate(self, event: Event) -> Optional[bool]:
+        """True/False when the index can tell, None when the DB has to decide."""
+        created_at = _as_utc(event.created_at)
+        if created_at is None:
+            return None
+
+        key = (_value(event.event_type), body_hash(event.body))
+        newest = self._entries.get(key)
+        if newest is not None and newest.id != event.id:
+            if newest.created_at > created_at:
+                self.hits += 1
+                return True
+
+        if (
+            self.complete_from is not None
+            and self.complete_from < created_at
+            and self.observed_until is not None
+            and self.observed_until >= created_at
+        ):
+            self.hits += 1
+            return False
+
+        self.misses += 1
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,263 @@
+import asyncio
+import heapq
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+from app.domain.schemas.events import Event, EventStatus, EventType, Operation
+
+# FAILED (dead-lettered) events never complete; they must not block dependents
+TERMINAL_STATUSES = frozenset(
+    {
+        EventStatus.COMPLETED.value,
+        EventStatus.SKIPPED.value,
+        EventStatus.FAILED.value,
+    }
+)
+# expiry for events observed without expires_at, and for primed history
+DEFAULT_TTL = timedelta(days=1)
+
+OpKey = Tuple[str, str]
+TypeKey = Tuple[str, str, str]
+# event_type -> (present, all in a final status)
+DependencySummary = Dict[str, Tuple[bool, bool]]
+
+
+class TrackedEvent(NamedTuple):
+    id: str
+    event_type: str
+    status: str
+    created_at: datetime
+    expires_at: datetime
+
+
+def _value(x: Union[Enum, str, None]) -> str:
+    if x is None:
+        return ""
+    return x.value if isinstance(x, Enum) else str(x)
+
+
+def _as_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class DependencyTracker:
+    """
+    In-memory view of events keyed by (operation, user_id, event_type).
+
+    Events blocked on prerequisites park on the keys they depend on and are
+    woken whenever an event under one of those keys is observed, either from
+    our own status transitions or from the CDC stream. History that predates
+    the tracker is primed once per operation/user as an aggregated summary
+    from the DB; while that summary still has unfinished prerequisites (or
+    doesn't fit the event) the tracker can't answer and the caller asks the DB.
+
+    Records expire at their ``expires_at`` and primed history ``ttl`` after
+    the event it was primed for (everything it summarizes has expired by
+    then; a later event just primes again). Both sit in expiry heaps that
+    are popped as they come due, so pruning costs only what it drops.
+    """
+
+    def __init__(self, ttl: timedelta = DEFAULT_TTL):
+        self.ttl = ttl
+        self.started_at = datetime.now(timezone.utc)
+        self._records: Dict[TypeKey, Dict[str, TrackedEvent]] = {}
+        self._primed_until: Dict[OpKey, datetime] = {}
+        self._history: Dict[OpKey, DependencySummary] = {}
+        self._waiters: Dict[TypeKey, Set[asyncio.Event]] = {}
+        # (expires_at, key, event id); stale once the record moved or went
+        self._record_expiry: List[Tuple[datetime, TypeKey, str]] = []
+        # (primed_until + ttl, op key); stale once re-primed
+        self._history_expiry: List[Tuple[datetime, OpKey]] = []
+
+    def observe(
+        self,
+        event_id: str,
+        operation: Union[Operation, str],
+        user_id: Optional[str],
+        event_type: Union[EventType, str],
+        status: Union[EventStatus, str],
+        created_at: Optional[datetime],
+        expires_at: Optional[datetime] = None,
+    ) -> None:
+        created_at = _as_utc(created_at)
+        if not event_id or created_at is None:
+            return
+
+        key = (_value(operation), user_id or "", _value(event_type))
+        status = _value(status)
+        records = self._records.setdefault(key, {})
+        current = records.get(event_id)
+        # CDC images can arrive after our own (newer) transition; never regress
+        # a terminal status back to a non-terminal one.
+        if (
+            current is not None
+            and current.status in TERMINAL_STATUSES
+            and status not in TERMINAL_STATUSES
+        ):
+            return
+
+        tracked = TrackedEvent(
+            id=event_id,
+            event_type=key[2],
+            status=status,
+            created_at=created_at,
+            expires_at=_as_utc(expires_at) or created_at + self.ttl,
+        )
+        records[event_id] = tracked
+        if current is None or current.expires_at != tracked.expires_at:
+            heapq.heappush(self._record_expiry, (tracked.expires_at, key, event_id))
+        for waiter in self._waiters.get(key, ()):
+            waiter.set()
+
+        self.prune()
+
+    def observe_event(self, event: Event) -> None:
+        self.observe(
+            event_id=event.id,
+            operation=event.operation,
+            user_id=event.user_id,
+            event_type=event.event_type,
+            status=event.status,
+            created_at=event.created_at,
+            expires_at=event.expires_at,
+        )
+
+    def needs_priming(self, event: Event) -> bool:
+        """
+        Everything created after the tracker started is seen on the stream;
+        older history for this operation/user has to be loaded once from DB.
+        """
+        created_at = _as_utc(event.created_at)
+        primed_until = self._primed_until.get(
+            (_value(event.operation), event.user_id or "")
+        )
+        if primed_until is None:
+            return True
+        return primed_until < self.started_at and primed_until < created_at
+
+    def prime(self, event: Event, summary: DependencySummary) -> None:
+        """Record the DB summary of everything created before ``event``."""
+        op_key = (_value(event.operation), event.user_id or "")
+        created_at = _as_utc(event.created_at)
+        primed_until = self._primed_until.get(op_key)
+        if primed_until is None or primed_until <= created_at:
+            self._primed_until[op_key] = created_at
+            self._history[op_key] = dict(summary)
+            heapq.heappush(self._history_expiry, (created_at + self.ttl, op_key))
+
+    def summary(
+        self, event: Event, event_types: Iterable[Union[EventType, str]]
+    ) -> Optional[DependencySummary]:
+        """
+        {event_type: (present, all final)} for events of the given types
+        created before ``event``, or None when only the DB can tell: the
+        primed history extends past the event, or still has unfinished ones.
+        """
+        op_key = (_value(event.operation), event.user_id or "")
+        primed_until = self._primed_until.get(op_key)
+        if primed_until is None or primed_until > _as_utc(event.created_at):
+            return None
+        history = self._history.get(op_key, {})
+        out: DependencySummary = {}
+        for et in event_types:
+            et = _value(et)
+            present, done = history.get(et, (False, True))
+            if present and not done:
+                return None
+            for tracked in self.records(event, (et,)):
+                present = True
+                done = done and tracked.status in TERMINAL_STATUSES
+            if present:
+                out[et] = (present, done)
+        return out
+
+    def records(
+        self, event: Event, event_types: Iterable[Union[EventType, str]]
+    ) -> List[TrackedEvent]:
+        """Tracked events of the given types created before ``event``."""
+        created_at = _as_utc(event.created_at)
+        op, user = _value(event.operation), event.user_id or ""
+        out: List[TrackedEvent] = []
+        for et in event_types:
+            for tracked in self._records.get((op, user, _value(et)), {}).values():
+                if tracked.created_at < created_at:
+                    out.append(tracked)
+        return out
+
+    def park(
+        self, event: Event, event_types: Iterable[Union[EventType, str]]
+    ) -> asyncio.Event:
+        waiter = asyncio.Event()
+        for key in self._keys(event, event_types):
+            self._waiters.setdefault(key, set()).add(waiter)
+        return waiter
+
+    def unpark(
+        self,
+        event: Event,
+        event_types: Iterable[Union[EventType, str]],
+        waiter: asyncio.Event,
+    ) -> None:
+        for key in self._keys(event, event_types):
+            waiters = self._waiters.get(key)
+            if waiters is None:
+                continue
+            waiters.discard(waiter)
+            if not waiters:
+                del self._waiters[key]
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """
+        Drop expired events, and primed history past its ttl; they can no
+        longer gate anything. Returns how many events were dropped.
+        """
+        now = now or datetime.now(timezone.utc)
+        dropped = 0
+        expiry = self._record_expiry
+        while expiry and expiry[0][0] < now:
+            expires_at, key, event_id = heapq.heappop(expiry)
+            records = self._records.get(key)
+            tracked = records.get(event_id) if records else None
+            if tracked is None or tracked.expires_at != expires_at:
+                continue  # superseded entry
+            del records[event_id]
+            dropped += 1
+            if not records:
+                del self._records[key]
+
+        expiry = self._history_expiry
+        while expiry and expiry[0][0] < now:
+            expires_at, op_key = heapq.heappop(expiry)
+            primed_until = self._primed_until.get(op_key)
+            if primed_until is None or primed_until + self.ttl != expires_at:
+                continue  # re-primed since
+            del self._primed_until[op_key]
+            self._history.pop(op_key, None)
+        return dropped
+
+    @property
+    def parked(self) -> int:
+        return len({w for waiters in self._waiters.values() for w in waiters})
+
+    @property
+    def tracked(self) -> int:
+        return sum(len(r) for r in self._records.values())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "parked": self.parked,
+            "tracked": self.tracked,
+            "primed": len(self._primed_until),
+        }
+
+    @staticmethod
+    def _keys(
+        event: Event, event_types: Iterable[Union[EventType, str]]
+    ) -> List[TypeKey]:
+        op, user = _value(event.operation), event.user_id or ""
+        return [(op, user, _value(et)) for et in event_types]
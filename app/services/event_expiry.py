@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from app.core.metrics import Counter
+from app.infrastructure.db.repositories.event import EventRepository
+
+logger = logging.getLogger(__name__)
+
+EVENTS_EXPIRED_DELETED = Counter(
+    "events_expired_deleted", "Expired finished events deleted by the sweeper"
+)
+
+
+class ExpiredEventSweeper:
+    """
+    Deletes expired events in a final status, ``batch_size`` rows per
+    transaction with ``batch_pause_ms`` between batches, so the cleanup never
+    holds many row locks or saturates the DB. Rows locked by someone else
+    are skipped and picked up on a later round.
+
+    Complements the partition maintainer: dropping a daily partition needs
+    every row in it expired, while this keeps the current partitions (and
+    events_default) from carrying finished history in the meantime.
+    """
+
+    def __init__(
+        self,
+        event_repo: EventRepository,
+        batch_size: int = 1000,
+        batch_pause_ms: int = 100,
+        interval_seconds: float = 60,
+    ):
+        self.event_repo = event_repo
+        self.batch_size = max(1, batch_size)
+        self.batch_pause = batch_pause_ms / 1000
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.total_deleted = 0
+        self.last_round_deleted = 0
+
+    async def run_once(self) -> int:
+        """Delete batches until one comes back short; returns rows deleted."""
+        deleted = 0
+        while True:
+            n = await self.event_repo.delete_expired_events(limit=self.batch_size)
+            deleted += n
+            self.total_deleted += n
+            EVENTS_EXPIRED_DELETED.inc(n)
+            if n < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause)
+        self.last_round_deleted = deleted
+        if deleted:
+            logger.info("Deleted %d expired events", deleted)
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "total_deleted": self.total_deleted,
+            "last_round_deleted": self.last_round_deleted,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error deleting expired events: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="event-expiry-sweeper")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
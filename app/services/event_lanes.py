@@ -0,0 +1,251 @@
+import asyncio
+import heapq
+import itertools
+import math
+from datetime import datetime, timezone
+from enum import Enum, IntEnum
+from typing import Dict, List, Optional, Tuple, Union
+
+from app.core.metrics import Histogram
+from app.domain.schemas.events import Event, EventContext, EventType, Operation
+
+LaneKey = Tuple[str, str, str]
+
+
+class Priority(IntEnum):
+    FAST = 0  # is_fast_track: interactive, single-object operations
+    NORMAL = 1
+    BULK = 2  # bulk event types/operations and large bodies
+
+
+BULK_EVENT_TYPES = frozenset(
+    {
+        EventType.BULK_ASSETS.value,
+        EventType.BULK_TAGS.value,
+        EventType.BULK_RULES.value,
+        EventType.EXPORT_DATA.value,
+        EventType.DELETE_ALL_COMMENTS.value,
+    }
+)
+BULK_OPERATIONS = frozenset(
+    {
+        Operation.ASSETS_BULK_UPDATE.value,
+        Operation.TAGS_BULK_UPDATE.value,
+        Operation.RULES_BULK_UPDATE.value,
+        Operation.BULK_ASSETS.value,
+        Operation.BULK_TAGS.value,
+        Operation.BULK_RULES.value,
+        Operation.EXPORT_DATA.value,
+    }
+)
+
+EVENT_QUEUE_WAIT = Histogram(
+    "event_queue_wait_seconds",
+    "Time from entering a lane to dispatch to a worker, by priority",
+    ["priority"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 300),
+)
+
+
+def _value(x: Union[Enum, str, None]) -> str:
+    if x is None:
+        return ""
+    return x.value if isinstance(x, Enum) else str(x)
+
+
+def _created_ts(event: Event) -> float:
+    created_at = event.created_at
+    if created_at is None:
+        return datetime.now(timezone.utc).timestamp()
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.timestamp()
+
+
+def event_priority(event: Event, bulk_body_bytes: int = 4096) -> Priority:
+    if event.is_fast_track:
+        return Priority.FAST
+    if (
+        _value(event.event_type) in BULK_EVENT_TYPES
+        or _value(event.operation) in BULK_OPERATIONS
+        or len(event.body or "") > bulk_body_bytes
+    ):
+        return Priority.BULK
+    return Priority.NORMAL
+
+
+def lane_key(event: Event) -> LaneKey:
+    """Events touching the same target for the same user/operation share a lane."""
+    return (_value(event.operation), event.user_id or "", event.body or "")
+
+
+class _Lane:
+    __slots__ = ("items", "active")
+
+    def __init__(self):
+        # (created_at ts, seq, enqueued_at, priority, event_ctx)
+        self.items: List[Tuple[float, int, float, Priority, EventContext]] = []
+        # the dispatched event currently holding the lane
+        self.active: Optional[EventContext] = None
+
+
+class EventLanes:
+    """
+    Per-key ordered lanes in front of the worker pool.
+
+    Each lane holds the events of one ``lane_key`` ordered by ``created_at``
+    and hands out at most one at a time; the next one is released only when
+    the worker calls ``done``. Lanes with a releasable head sit in a ready
+    queue, so independent keys are dispatched in parallel and a busy lane
+    never blocks the others. ``maxsize`` bounds the number of queued (not
+    yet dispatched) events across all lanes.
+
+    Ready lanes are ordered by their head's priority with aging: a lane
+    ranks at ``enqueued_at + priority * aging_seconds``, so fast-track
+    events jump ahead of normal ones and normal of bulk, but a bulk event
+    that has waited ``2 * aging_seconds`` is served before a fast-track one
+    arriving now.
+
+    A dispatched event that has to wait (on its prerequisites) hands the
+    lane back early with ``done``, so lane-mates, its prerequisites among
+    them, are not stuck behind it; ``done`` for an event that no longer
+    holds its lane is a no-op.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        aging_seconds: float = 5.0,
+        bulk_body_bytes: int = 4096,
+    ):
+        self.maxsize = maxsize
+        self.aging_seconds = aging_seconds
+        self.bulk_body_bytes = bulk_body_bytes
+        self._lanes: Dict[LaneKey, _Lane] = {}
+        # (rank, seq, lane key); None keys are poison pills, ranked last
+        self._ready: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._slots = asyncio.Semaphore(maxsize) if maxsize > 0 else None
+        self._seq = itertools.count()
+        self._queued = 0
+        # queued events by id, to tell whether an event is already waiting
+        self._queued_ids: Dict[str, int] = {}
+        self._queued_by_priority: Dict[Priority, int] = {p: 0 for p in Priority}
+        self.total_dispatched = 0
+        self.dispatch_wait = 0.0
+
+    async def put(self, event_ctx: EventContext) -> None:
+        if self._slots is not None:
+            await self._slots.acquire()
+        key = lane_key(event_ctx.event)
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane()
+        was_empty = not lane.items
+        priority = self.priority_of(event_ctx.event)
+        heapq.heappush(
+            lane.items,
+            (
+                _created_ts(event_ctx.event),
+                next(self._seq),
+                asyncio.get_running_loop().time(),
+                priority,
+                event_ctx,
+            ),
+        )
+        self._queued += 1
+        event_id = event_ctx.event.id
+        self._queued_ids[event_id] = self._queued_ids.get(event_id, 0) + 1
+        self._queued_by_priority[priority] += 1
+        if was_empty and lane.active is None:
+            self._mark_ready(key, lane)
+
+    def priority_of(self, event: Event) -> Priority:
+        return event_priority(event, self.bulk_body_bytes)
+
+    def _mark_ready(self, key: LaneKey, lane: _Lane) -> None:
+        _, _, enqueued_at, priority, _ = lane.items[0]
+        rank = enqueued_at + priority * self.aging_seconds
+        self._ready.put_nowait((rank, next(self._seq), key))
+
+    async def get(self) -> Optional[EventContext]:
+        """Next event from a ready lane; None once the lanes are closed."""
+        _, _, key = await self._ready.get()
+        if key is None:
+            return None
+        lane = self._lanes[key]
+        _, _, enqueued_at, priority, event_ctx = heapq.heappop(lane.items)
+        lane.active = event_ctx
+        self._queued -= 1
+        left = self._queued_ids.pop(event_ctx.event.id, 1) - 1
+        if left > 0:
+            self._queued_ids[event_ctx.event.id] = left
+        self._queued_by_priority[priority] -= 1
+        if self._slots is not None:
+            self._slots.release()
+        self.total_dispatched += 1
+        # EWMA of how long events sat in their lane before dispatch
+        waited = asyncio.get_running_loop().time() - enqueued_at
+        self.dispatch_wait += (waited - self.dispatch_wait) * 0.1
+        EVENT_QUEUE_WAIT.observe(waited, priority=priority.name.lower())
+        return event_ctx
+
+    def done(self, event_ctx: EventContext) -> None:
+        """Release the lane of a dispatched event so its next event can run."""
+        key = lane_key(event_ctx.event)
+        lane = self._lanes.get(key)
+        if lane is None or lane.active is not event_ctx:
+            return
+        lane.active = None
+        if lane.items:
+            self._mark_ready(key, lane)
+        else:
+            del self._lanes[key]
+
+    def close(self, n_workers: int) -> None:
+        """
+        Hand ``n_workers`` getters None ahead of any ready lane; queued events
+        stay where they are (still PENDING, they are picked up again later).
+        """
+        for _ in range(n_workers):
+            self._ready.put_nowait((-math.inf, next(self._seq), None))
+
+    def holds(self, event_id: str) -> bool:
+        """Whether an event with this id is queued in some lane."""
+        return event_id in self._queued_ids
+
+    def qsize(self) -> int:
+        return self._queued
+
+    def depths(self, top: int = 10) -> List[Tuple[LaneKey, int]]:
+        """Deepest lanes first."""
+        return heapq.nlargest(
+            top,
+            ((k, len(lane.items)) for k, lane in self._lanes.items() if lane.items),
+            key=lambda kv: kv[1],
+        )
+
+    def head_of_line_wait(self) -> float:
+        """Longest time any lane's head event has been queued, in seconds."""
+        now = asyncio.get_running_loop().time()
+        oldest = min(
+            (lane.items[0][2] for lane in self._lanes.values() if lane.items),
+            default=None,
+        )
+        return 0.0 if oldest is None else now - oldest
+
+    def stats(self) -> Dict[str, float]:
+        lanes = self._lanes.values()
+        return {
+            "lanes": len(self._lanes),
+            "active_lanes": sum(1 for lane in lanes if lane.active is not None),
+            "ready_lanes": self._ready.qsize(),
+            "queued": self._queued,
+            **{
+                f"queued_{p.name.lower()}": n
+                for p, n in self._queued_by_priority.items()
+            },
+            "max_lane_depth": max((len(lane.items) for lane in lanes), default=0),
+            "head_of_line_wait_seconds": self.head_of_line_wait(),
+            "dispatch_wait_seconds": self.dispatch_wait,
+            "total_dispatched": self.total_dispatched,
+        }
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import math
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LatencySource = Callable[[], Tuple[Optional[float], Optional[float]]]
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Caps how many events do DB work at once, adapting the cap to the database.
+
+    Every ``update_interval`` seconds the limit is recomputed from
+    ``latency_source`` (average query latency, average pool checkout wait):
+    - checkout waits above ``max_pool_wait`` mean the pool is the bottleneck,
+      so the limit backs off multiplicatively;
+    - otherwise the limit follows the gradient between the baseline latency
+      and the current one, growing by sqrt(limit) while latency stays flat.
+    Without a latency source the limit stays at ``initial_limit``.
+    """
+
+    def __init__(
+        self,
+        latency_source: Optional[LatencySource] = None,
+        initial_limit: int = 32,
+        min_limit: int = 4,
+        max_limit: int = 1000,
+        update_interval: float = 1.0,
+        tolerance: float = 1.5,
+        backoff_ratio: float = 0.75,
+        max_pool_wait: float = 0.005,
+        smoothing: float = 0.5,
+    ):
+        self.latency_source = latency_source
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial_limit)))
+        self.update_interval = update_interval
+        self.tolerance = tolerance
+        self.backoff_ratio = backoff_ratio
+        self.max_pool_wait = max_pool_wait
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.waiting = 0
+        self.queueing_delay = 0.0
+        self.baseline_latency: Optional[float] = None
+        self._cond = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        async with self._cond:
+            self.waiting += 1
+            try:
+                await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+        # EWMA of the time spent waiting for a slot
+        self.queueing_delay += ((loop.time() - start) - self.queueing_delay) * 0.1
+
+    async def release(self) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def adjust(
+        self, query_latency: Optional[float], pool_wait: Optional[float]
+    ) -> float:
+        if query_latency is None or query_latency <= 0:
+            # idle window, nothing to learn from
+            return self.limit
+
+        # baseline tracks the best latency seen and drifts up slowly so it can
+        # recover when the workload changes
+        if self.baseline_latency is None or query_latency < self.baseline_latency:
+            self.baseline_latency = query_latency
+        else:
+            self.baseline_latency += (query_latency - self.baseline_latency) * 0.01
+
+        if pool_wait is not None and pool_wait > self.max_pool_wait:
+            new_limit = self.limit * self.backoff_ratio
+        elif self.in_flight < self.limit / 2:
+            # not using the current limit; don't grow on an idle signal
+            new_limit = self.limit
+        else:
+            gradient = max(
+                0.5,
+                min(1.0, self.tolerance * self.baseline_latency / query_latency),
+            )
+            new_limit = self.limit * gradient + math.sqrt(self.limit)
+
+        limit = self.limit * (1 - self.smoothing) + new_limit * self.smoothing
+        self.limit = min(self.max_limit, max(self.min_limit, limit))
+        return self.limit
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "queueing_delay_seconds": self.queueing_delay,
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.update_interval)
+            try:
+                previous = int(self.limit)
+                self.adjust(*self.latency_source())
+                if int(self.limit) > previous:
+                    async with self._cond:
+                        self._cond.notify(int(self.limit) - previous)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error adjusting concurrency limit: {e}")
+
+    def start(self):
+        if self.latency_source is None or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run(), name="event-concurrency-limiter")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
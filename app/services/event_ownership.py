@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from app.core.metrics import REGISTRY, Counter, stats_collector
+from app.domain.repositories.partition_lease import PartitionLeaseRepository
+from app.domain.schemas.events import (
+    Event,
+    EventContext,
+    event_partition,
+    parse_debezium_timestamp,
+)
+from app.infrastructure.db.repositories.event import EventRepository
+
+logger = logging.getLogger(__name__)
+
+EVENT_PARTITION_CHANGES = Counter(
+    "event_partition_changes",
+    "Partition leases acquired/released/lost by this replica",
+    ["action"],
+)
+EVENT_PARTITION_ADOPTED = Counter(
+    "event_partition_adopted",
+    "Unfinished events taken over from the DB when acquiring a partition",
+)
+
+
+def _as_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class PartitionOwnership:
+    """
+    Splits the events stream between replicas.
+
+    Every replica reads the whole stream, but only runs the events of the
+    partitions it holds (``event_partition`` of operation/user_id, so an
+    event and its prerequisites stay together). Partitions are advisory-lock
+    leases: each replica also holds one member-slot lock, counts the member
+    slots held cluster-wide and takes its fair share, ``ceil(partitions /
+    members)``. A replica over its share gives back partitions with nothing
+    in flight; one that dies loses its locks with its connection, and the
+    others pick the partitions up on their next round.
+
+    Acquiring a partition at time T is a clean cut-over: events created
+    after T come from the stream, events created up to T that are still
+    unfinished (left behind by the previous owner, or never picked up) are
+    adopted from the DB ``adopt_delay_seconds`` later, once commits around
+    T are visible. Stream checkpoints are kept per partition by its owner,
+    so after a restart a partition taken over resumes where its previous
+    owner got to.
+    """
+
+    def __init__(
+        self,
+        lease_repo: PartitionLeaseRepository,
+        event_repo: EventRepository,
+        deliver: Callable[[EventContext], Awaitable[None]],
+        partitions: int = 16,
+        lock_namespace: int = 7301,
+        rebalance_interval_seconds: float = 5,
+        adopt_delay_seconds: float = 5,
+        adopt_batch_size: int = 500,
+    ):
+        self.lease_repo = lease_repo
+        self.event_repo = event_repo
+        self.deliver = deliver
+        self.partitions = max(1, partitions)
+        self.member_namespace = lock_namespace
+        self.partition_namespace = lock_namespace + 1
+        self.rebalance_interval_seconds = rebalance_interval_seconds
+        self.adopt_delay_seconds = adopt_delay_seconds
+        self.adopt_batch_size = max(1, adopt_batch_size)
+        self.member_slot: Optional[int] = None
+        self.members = 0
+        self.target = 0
+        # partition -> acquired at
+        self._owned: Dict[int, datetime] = {}
+        # partition -> events handed to the pool and not done yet
+        self._in_flight: Dict[int, int] = {}
+        self._adoptions: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.total_adopted = 0
+        self._collector = stats_collector(
+            "event_partitions", "Events stream partition ownership", self.stats
+        )
+
+    @property
+    def owned(self) -> Set[int]:
+        return set(self._owned)
+
+    def partition_of(self, operation: Any, user_id: Optional[str]) -> int:
+        return event_partition(operation, user_id, self.partitions)
+
+    def owns(
+        self, operation: Any, user_id: Optional[str], created_at: Optional[datetime]
+    ) -> bool:
+        acquired_at = self._owned.get(self.partition_of(operation, user_id))
+        if acquired_at is None:
+            return False
+        created_at = _as_utc(created_at)
+        # created before we took over: adopted from the DB instead
+        return created_at is None or created_at > acquired_at
+
+    def owns_change(self, after: Dict[str, Any]) -> bool:
+        return self.owns(
+            after.get("operation"),
+            after.get("user_id"),
+            parse_debezium_timestamp(after.get("created_at")),
+        )
+
+    def track(self, event: Event) -> Callable[[], None]:
+        """Count the event against its partition; the callback settles it once."""
+        partition = self.partition_of(event.operation, event.user_id)
+        self._in_flight[partition] = self._in_flight.get(partition, 0) + 1
+        settled = False
+
+        def done():
+            nonlocal settled
+            if settled:
+                return
+            settled = True
+            left = self._in_flight.get(partition, 1) - 1
+            if left > 0:
+                self._in_flight[partition] = left
+            else:
+                self._in_flight.pop(partition, None)
+
+        return done
+
+    def _lost_all(self, reason: str) -> None:
+        if self._owned:
+            logger.warning("Lost %d event partitions (%s)", len(self._owned), reason)
+            EVENT_PARTITION_CHANGES.inc(len(self._owned), action="lost")
+        self._owned.clear()
+        self.member_slot = None
+
+    async def rebalance(self) -> None:
+        if not self.lease_repo.is_open:
+            self._lost_all("lease connection closed")
+            await self.lease_repo.open()
+
+        if self.member_slot is None:
+            # more replicas than partitions: the extra ones stay idle
+            for slot in range(self.partitions):
+                if await self.lease_repo.try_lock(self.member_namespace, slot):
+                    self.member_slot = slot
+                    break
+
+        holders = await self.lease_repo.count_holders(self.member_namespace)
+        self.members = max(1, holders)
+        self.target = (
+            math.ceil(self.partitions / self.members)
+            if self.member_slot is not None
+            else 0
+        )
+
+        # over our share (a replica joined): hand back idle partitions
+        for partition in sorted(self._owned, reverse=True):
+            if len(self._owned) <= self.target:
+                break
+            if self._in_flight.get(partition):
+                continue
+            await self.lease_repo.unlock(self.partition_namespace, partition)
+            del self._owned[partition]
+            EVENT_PARTITION_CHANGES.inc(action="released")
+            logger.info("Released event partition %d", partition)
+
+        if len(self._owned) >= self.target:
+            return
+        # start at a slot-dependent point so replicas don't all contend for 0
+        start = (self.member_slot or 0) * self.target
+        for i in range(self.partitions):
+            if len(self._owned) >= self.target:
+                break
+            partition = (start + i) % self.partitions
+            if partition in self._owned:
+                continue
+            if await self.lease_repo.try_lock(self.partition_namespace, partition):
+                acquired_at = datetime.now(timezone.utc)
+                self._owned[partition] = acquired_at
+                EVENT_PARTITION_CHANGES.inc(action="acquired")
+                logger.info("Acquired event partition %d", partition)
+                task = asyncio.create_task(
+                    self._adopt(partition, acquired_at),
+                    name=f"event-partition-adopt-{partition}",
+                )
+                self._adoptions.add(task)
+                task.add_done_callback(self._adoptions.discard)
+
+    async def _adopt(self, partition: int, acquired_at: datetime) -> None:
+        await asyncio.sleep(self.adopt_delay_seconds)
+        after = None
+        adopted = 0
+        while self._owned.get(partition) == acquired_at:
+            rows = await self.event_repo.list_unfinished_in_partition(
+                partition,
+                self.partitions,
+                created_before=acquired_at,
+                after=after,
+                limit=self.adopt_batch_size,
+            )
+            for row in rows:
+                event = Event.model_validate(row, from_attributes=True)
+                await self.deliver(EventContext(event=event, on_done=self.track(event)))
+            adopted += len(rows)
+            if len(rows) < self.adopt_batch_size:
+                break
+            after = (rows[-1].created_at, rows[-1].id)
+        if adopted:
+            self.total_adopted += adopted
+            EVENT_PARTITION_ADOPTED.inc(adopted)
+            logger.info(
+                "Adopted %d unfinished events of partition %d", adopted, partition
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "partitions": self.partitions,
+            "owned": len(self._owned),
+            "target": self.target,
+            "members": self.members,
+            "in_flight": sum(self._in_flight.values()),
+            "total_adopted": self.total_adopted,
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.rebalance_interval_seconds)
+            try:
+                await self.rebalance()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # the locks may be gone with the connection; start over
+                logger.error(f"Error rebalancing event partitions: {e}")
+                await self.lease_repo.close()
+                self._lost_all("rebalance failed")
+
+    async def start(self):
+        """First round inline, so partitions are held before consuming."""
+        if self._task is not None:
+            return
+        REGISTRY.register_collector(self._collector)
+        try:
+            await self.rebalance()
+        except Exception as e:
+            logger.error(f"Error acquiring event partitions: {e}")
+            await self.lease_repo.close()
+            self._lost_all("initial rebalance failed")
+        self._task = asyncio.create_task(self._run(), name="event-partition-ownership")
+
+    async def stop(self):
+        """Release every partition (by closing the lease connection)."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in list(self._adoptions):
+            task.cancel()
+        await asyncio.gather(*self._adoptions, return_exceptions=True)
+        if self._owned:
+            EVENT_PARTITION_CHANGES.inc(len(self._owned), action="released")
+        self._owned.clear()
+        self.member_slot = None
+        await self.lease_repo.close()
+        REGISTRY.unregister_collector(self._collector)
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from typing import Optional
+
+from app.infrastructure.db.repositories.event import EventRepository
+
+logger = logging.getLogger(__name__)
+
+
+class EventPartitionMaintainer:
+    """
+    Keeps the daily ``events`` partitions ahead of the clock and drops the
+    ones whose rows have all expired.
+    """
+
+    def __init__(
+        self,
+        event_repo: EventRepository,
+        days_ahead: int = 3,
+        interval_seconds: float = 3600,
+    ):
+        self.event_repo = event_repo
+        self.days_ahead = days_ahead
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self):
+        created = await self.event_repo.ensure_partitions(self.days_ahead)
+        if created:
+            logger.info("Created event partitions: %s", ", ".join(created))
+        dropped = await self.event_repo.drop_expired_partitions()
+        if dropped:
+            logger.info("Dropped expired event partitions: %s", ", ".join(dropped))
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error maintaining event partitions: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(
+                self._run(), name="event-partition-maintainer"
+            )
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
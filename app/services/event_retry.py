@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.infrastructure.db.repositories.event import EventRepository
+from app.domain.schemas.events import Event, EventContext
+from app.services.event_ownership import PartitionOwnership
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(
+    retry_count: int, base_delay: float, max_delay: float, jitter: bool = True
+) -> float:
+    """
+    Exponential backoff (base * 2^(n-1), capped at max_delay) with equal jitter:
+    at least half the nominal delay, plus a random share of the other half.
+    """
+    delay = min(max_delay, base_delay * (2 ** max(0, retry_count - 1)))
+    if not jitter:
+        return delay
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class RetryScheduler:
+    """
+    Delayed re-delivery of events on a min-heap keyed by due time.
+
+    A single background task sleeps until the earliest due entry and hands it
+    back to ``deliver``, so retrying events don't hold a worker while they wait.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[EventContext], Awaitable[None]],
+        base_delay_seconds: float = 20,
+        max_delay_seconds: float = 300,
+    ):
+        self.deliver = deliver
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._heap: List[Tuple[float, int, EventContext]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self.total_scheduled = 0
+        self.total_delivered = 0
+
+    def schedule(self, event_ctx: EventContext, delay: Optional[float] = None) -> float:
+        """Schedule a re-delivery; returns the delay in seconds that was applied."""
+        if delay is None:
+            delay = backoff_delay(
+                event_ctx.event.retry_count,
+                self.base_delay_seconds,
+                self.max_delay_seconds,
+            )
+        due = asyncio.get_running_loop().time() + delay
+        first = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (due, next(self._seq), event_ctx))
+        self.total_scheduled += 1
+        if first is None or due < first:
+            self._wakeup.set()
+        return delay
+
+    @property
+    def scheduled(self) -> int:
+        return len(self._heap)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "scheduled": self.scheduled,
+            "total_scheduled": self.total_scheduled,
+            "total_delivered": self.total_delivered,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._running:
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, self._heap[0][0] - loop.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            now = loop.time()
+            while self._running and self._heap and self._heap[0][0] <= now:
+                _, _, event_ctx = heapq.heappop(self._heap)
+                try:
+                    await self.deliver(event_ctx)
+                    self.total_delivered += 1
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(
+                        f"Error re-delivering event {event_ctx.event.id}: {e}"
+                    )
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run(), name="event-retry-scheduler")
+
+    async def stop(self) -> List[EventContext]:
+        """Stop dispatching; returns the retries that were still waiting."""
+        self._running = False
+        self._wakeup.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        remaining = [ctx for _, _, ctx in sorted(self._heap)]
+        self._heap.clear()
+        return remaining
+
+
+class RetrySweeper:
+    """
+    Picks up retries the in-memory scheduler lost.
+
+    Every retry is persisted on its event row (PENDING, retry_count,
+    next_attempt_at), so a retry whose scheduler died with its process is
+    still due in the DB. Every ``interval_seconds`` the sweeper claims up to
+    ``batch_size`` retries overdue by more than ``grace_seconds`` (the live
+    scheduler's head start) and hands them to ``deliver``; a claim holds
+    them for ``lease_seconds`` against other sweepers. With an ``ownership``
+    only retries of the stream partitions this replica owns are claimed.
+    """
+
+    def __init__(
+        self,
+        event_repo: EventRepository,
+        deliver: Callable[[EventContext], Awaitable[None]],
+        interval_seconds: float = 5,
+        batch_size: int = 100,
+        grace_seconds: float = 30,
+        lease_seconds: float = 300,
+        ownership: Optional[PartitionOwnership] = None,
+    ):
+        self.event_repo = event_repo
+        self.ownership = ownership
+        self.deliver = deliver
+        self.interval_seconds = interval_seconds
+        self.batch_size = max(1, batch_size)
+        self.grace_seconds = grace_seconds
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.total_claimed = 0
+        self.last_claimed = 0
+        self.sweep_errors = 0
+
+    async def run_once(self) -> int:
+        """Claim and deliver one batch; returns how many were claimed."""
+        partitions, owned = 0, None
+        if self.ownership is not None:
+            owned = sorted(self.ownership.owned)
+            if not owned:
+                return 0
+            partitions = self.ownership.partitions
+        rows = await self.event_repo.claim_due_retries(
+            limit=self.batch_size,
+            grace_seconds=self.grace_seconds,
+            lease_seconds=self.lease_seconds,
+            partitions=partitions,
+            owned=owned,
+        )
+        self.last_claimed = len(rows)
+        self.total_claimed += len(rows)
+        for row in rows:
+            event_ctx = EventContext(
+                event=Event.model_validate(row, from_attributes=True)
+            )
+            await self.deliver(event_ctx)
+        if rows:
+            logger.info("Recovered %d overdue retries", len(rows))
+        return len(rows)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "total_claimed": self.total_claimed,
+            "last_claimed": self.last_claimed,
+            "sweep_errors": self.sweep_errors,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                # a full batch means more are due; go again right away
+                if await self.run_once() >= self.batch_size:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.sweep_errors += 1
+                logger.error(f"Error sweeping due retries: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="event-retry-sweeper")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,124 @@
+"""
+Per-message parse cost of the consumer's Debezium decode path.
+
+Compares the previous path (str decode + json.loads for the filter, then a
+second str decode + json.loads + field-by-field Event constructor) with the
+single orjson pass that only builds the model for pending messages.
+
+    python -m benchmarks.debezium_decode --messages 50000 --pending-ratio 0.3
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.domain.schemas.events import (
+    Event,
+    EventContext,
+    EventStatus,
+    EventType,
+    Operation,
+    decode_debezium_envelope,
+    is_pending_change,
+    parse_debezium_timestamp,
+)
+
+
+def make_body(i: int, pending: bool) -> bytes:
+    now = datetime.now(timezone.utc)
+    after = {
+        "id": f"bench-{i}",
+        "event_type": EventType.DELETE_ASSETS.value,
+        "body": f"asset-{i}",
+        "status": "pending" if pending else "completed",
+        "user_id": "bench",
+        "operation": Operation.DELETE_ASSETS.value,
+        "expires_at": int((now + timedelta(days=1)).timestamp() * 1_000_000),
+        "updated_by": "bench",
+        "created_at": int(now.timestamp() * 1_000_000),
+        "is_authorized": True,
+        "is_fast_track": False,
+        "error": None,
+        "retry_count": 0,
+        "wait_time": None,
+        "is_dependency_resolved": False,
+        "completed_in_seconds": None,
+        "receipt_handle": None,
+    }
+    envelope = {
+        "before": None,
+        "after": after,
+        "source": {"connector": "postgresql", "table": "events", "lsn": 123 + i},
+        "op": "c",
+        "ts_ms": int(now.timestamp() * 1000),
+    }
+    return json.dumps(envelope).encode()
+
+
+def legacy_path(body: bytes):
+    data = json.loads(body.decode())
+    after = data.get("after") or {}
+    if (after.get("status") or "").lower() != "pending":
+        return None
+    after_data = json.loads(body.decode()).get("after", {})
+    return Event(
+        id=after_data.get("id", ""),
+        event_type=after_data.get("event_type", ""),
+        body=after_data.get("body", ""),
+        status=EventStatus(after_data.get("status", EventStatus.PENDING)),
+        user_id=after_data.get("user_id", ""),
+        operation=Operation(after_data.get("operation", "")),
+        expires_at=parse_debezium_timestamp(after_data.get("expires_at")),
+        updated_by=after_data.get("updated_by", ""),
+        created_at=parse_debezium_timestamp(after_data.get("created_at")),
+        is_authorized=after_data.get("is_authorized", True),
+        is_fast_track=after_data.get("is_fast_track", False),
+        error=after_data.get("error"),
+        retry_count=after_data.get("retry_count", 0),
+        wait_time=after_data.get("wait_time"),
+        is_dependency_resolved=after_data.get("is_dependency_resolved", False),
+        completed_in_seconds=after_data.get("completed_in_seconds"),
+        receipt_handle=after_data.get("receipt_handle"),
+    )
+
+
+def single_pass(body: bytes):
+    after = decode_debezium_envelope(body).get("after") or {}
+    if not is_pending_change(after):
+        return None
+    return EventContext.from_debezium_after(after).event
+
+
+def measure(fn, bodies, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for b in bodies:
+            fn(b)
+        best = min(best, time.perf_counter() - start)
+    return best / len(bodies) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--pending-ratio", type=float, default=0.3)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    bodies = [
+        make_body(i, rng.random() < args.pending_ratio) for i in range(args.messages)
+    ]
+
+    legacy = measure(legacy_path, bodies, args.rounds)
+    fast = measure(single_pass, bodies, args.rounds)
+    print(f"messages={args.messages} pending_ratio={args.pending_ratio}")
+    print(f"{'legacy':>12}: {legacy:7.2f} us/msg")
+    print(f"{'single-pass':>12}: {fast:7.2f} us/msg ({legacy / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
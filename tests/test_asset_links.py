@@ -0,0 +1,82 @@
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from app.domain.schemas.asset import AssetCreate, ExtTag
+from app.infrastructure.db.models.asset_ext_tag import asset_ext_tag
+from app.infrastructure.db.models.ext_tag import ExtTag as ExtTagRow
+from app.infrastructure.db.repositories.asset import AssetRepository
+
+
+LINKS = asset_ext_tag.name
+TAGS = ExtTagRow.__table__.name
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        compiled = statement.compile(dialect=postgresql.dialect())
+        self.statements.append((str(compiled), compiled.params))
+
+
+def tag(tag_id, name=None):
+    return ExtTag(
+        ext_tag_id=tag_id, ext_tag_name=name or tag_id, ext_tag_description=""
+    )
+
+
+def sync_tags(schemas, **kwargs):
+    session = RecordingSession()
+    repo = AssetRepository(None, **kwargs)
+    asyncio.run(repo._process_bulk_ext_tags(session, schemas))
+    return session.statements
+
+
+def test_tag_links_sync_in_one_delete_and_one_insert():
+    schemas = [
+        AssetCreate(id="a1", ext_tag=[tag("t1"), tag("t2")]),
+        AssetCreate(id="a2", ext_tag=[tag("t2", "renamed")]),
+        AssetCreate(id="a3", ext_tag=[]),  # clears its links
+        AssetCreate(id="a4"),  # not given: links left alone
+    ]
+    (upsert, upsert_params), (delete, delete_params), (insert, insert_params) = (
+        sync_tags(schemas)
+    )
+
+    assert upsert.startswith(f"INSERT INTO {TAGS} ")
+    assert "ON CONFLICT (id) DO UPDATE" in upsert
+    assert "IS DISTINCT FROM" in upsert
+    # one row per tag; the last occurrence wins
+    assert "renamed" in upsert_params.values()
+    assert "t1" in upsert_params.values() and "t2" in upsert_params.values()
+
+    assert delete.startswith(f"DELETE FROM {LINKS} ")
+    assert "unnest" in delete and "NOT (EXISTS" in delete
+    assert sorted(delete_params["owners"]) == ["a1", "a2", "a3"]
+
+    assert insert.startswith(f"INSERT INTO {LINKS} ")
+    assert "ON CONFLICT DO NOTHING" in insert
+    pairs = set(zip(insert_params["link_owners"], insert_params["link_targets"]))
+    assert pairs == {("a1", "t1"), ("a1", "t2"), ("a2", "t2")}
+
+
+def test_clearing_every_link_skips_the_insert():
+    statements = sync_tags([AssetCreate(id="a1", ext_tag=[])])
+    assert len(statements) == 1
+    sql, params = statements[0]
+    assert sql.startswith(f"DELETE FROM {LINKS} ")
+    assert params["owners"] == ["a1"]
+
+
+def test_nothing_given_touches_nothing():
+    assert sync_tags([AssetCreate(id="a1")]) == []
+
+
+def test_dimension_upsert_is_split_by_the_parameter_bound():
+    schemas = [AssetCreate(id=f"a{i}", ext_tag=[tag(f"t{i}")]) for i in range(5)]
+    # three columns per tag row: two rows per statement
+    statements = sync_tags(schemas, upsert_max_params=6)
+    upserts = [sql for sql, _ in statements if sql.startswith(f"INSERT INTO {TAGS} ")]
+    assert len(upserts) == 3
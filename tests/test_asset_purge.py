@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from app.infrastructure.db.repositories.asset import AssetRepository
+
+
+def timeout_error(sqlstate="55P03"):
+    return DBAPIError("DELETE FROM assets", None, SimpleNamespace(sqlstate=sqlstate))
+
+
+class PurgeRecordingRepo(AssetRepository):
+    """Runs purge_subtrees' chunking without a database."""
+
+    def __init__(self, descendants, too_big=None, error=None):
+        super().__init__(None)
+        self.descendants = descendants
+        self.too_big = too_big
+        self.error = error or timeout_error()
+        self.lookups = []
+        self.chunks = []
+
+    async def fetch_descendant_ids(self, ancestor_ids, min_depth, max_depth):
+        self.lookups.append((ancestor_ids, min_depth, max_depth))
+        return self.descendants
+
+    async def _delete_chunk(self, ids, lock_timeout_ms, chunk_timeout_ms):
+        if self.too_big is not None and len(ids) > self.too_big:
+            raise self.error
+        self.chunks.append(ids)
+        return len(ids)
+
+
+def test_subtree_is_deleted_in_chunks_with_progress():
+    repo = PurgeRecordingRepo([f"d{i}" for i in range(5)])
+    progress = []
+
+    result = asyncio.run(
+        repo.purge_subtrees(
+            ["r1", "r1", "d0"],
+            chunk_size=2,
+            on_progress=lambda deleted, total: progress.append((deleted, total)),
+        )
+    )
+
+    assert repo.lookups == [(["r1", "d0"], 0, 2)]
+    assert repo.chunks == [["d0", "d1"], ["d2", "d3"], ["d4", "r1"]]
+    assert result == {"deleted": 6, "requested": 6, "chunks": 3}
+    assert progress == [(2, 6), (4, 6), (6, 6)]
+
+
+def test_timed_out_chunk_is_split_and_retried_in_order():
+    repo = PurgeRecordingRepo([f"d{i}" for i in range(7)], too_big=2)
+
+    result = asyncio.run(repo.purge_subtrees(["r"], chunk_size=8))
+
+    assert [i for chunk in repo.chunks for i in chunk] == [
+        *[f"d{i}" for i in range(7)],
+        "r",
+    ]
+    assert all(len(chunk) <= 2 for chunk in repo.chunks)
+    assert result == {"deleted": 8, "requested": 8, "chunks": 4}
+
+
+def test_other_errors_and_single_row_timeouts_are_raised():
+    repo = PurgeRecordingRepo([], too_big=0)
+    with pytest.raises(DBAPIError):
+        asyncio.run(repo.purge_subtrees(["r"]))
+
+    repo = PurgeRecordingRepo(["d0"], too_big=1, error=timeout_error("23503"))
+    with pytest.raises(DBAPIError):
+        asyncio.run(repo.purge_subtrees(["r"]))
+    assert repo.chunks == []
+
+
+def test_nothing_to_purge_skips_the_lookup():
+    repo = PurgeRecordingRepo(["d0"])
+
+    result = asyncio.run(repo.purge_subtrees([]))
+
+    assert result == {"deleted": 0, "requested": 0, "chunks": 0}
+    assert repo.lookups == []
@@ -0,0 +1,271 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.elements import BindParameter
+
+from app.domain.schemas.asset import AssetCreate, ExtTag
+from app.infrastructure.db.repositories.asset import (
+    UPSERT_COLUMNS,
+    UPSERT_STAGE_TABLE,
+    AssetRepository,
+)
+
+ROW_PARAMS = len(UPSERT_COLUMNS) + 1  # the row plus its asset id lookup
+
+
+class ChunkRecordingRepo(AssetRepository):
+    """Runs bulk_upsert's chunking and scheduling without a database."""
+
+    def __init__(self, fail_on=None, **kwargs):
+        super().__init__(None, **kwargs)
+        self.fail_on = fail_on
+        self.started = []
+        self.finished = []
+        self.copy_modes = []
+        self.active = 0
+        self.peak = 0
+
+    async def _upsert_chunk(self, chunk, default_asset_group_id, is_partial, use_copy):
+        ids = [s.id for s in chunk]
+        self.started.append(ids)
+        self.copy_modes.append(use_copy)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail_on in ids:
+                raise RuntimeError("chunk failed")
+        finally:
+            self.active -= 1
+        self.finished.append(ids)
+        return {"inserted": len(chunk) - 1, "updated": 1, "unchanged": 0}
+
+
+def assets(prefix, n, **kwargs):
+    return [AssetCreate(id=f"{prefix}{i}", **kwargs) for i in range(n)]
+
+
+def tag(tag_id):
+    return ExtTag(ext_tag_id=tag_id, ext_tag_name=tag_id, ext_tag_description="")
+
+
+def test_chunks_are_consecutive_runs_within_the_parameter_bound():
+    repo = ChunkRecordingRepo(upsert_max_params=ROW_PARAMS * 4)
+    schemas = assets("a", 10)
+    chunks = list(repo._chunk_schemas(schemas, use_copy=False))
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    assert [s for c in chunks for s in c] == schemas
+    # COPY binds no per-row parameters for the asset row itself
+    assert len(list(repo._chunk_schemas(schemas, use_copy=True))) == 1
+
+
+def test_chunks_respect_the_payload_size_bound():
+    schemas = assets("a", 6, ext_description="x" * 100)
+    one = len(schemas[0].model_dump_json())
+    repo = ChunkRecordingRepo(upsert_max_chunk_bytes=one * 2)
+    assert [len(c) for c in repo._chunk_schemas(schemas, use_copy=False)] == [2] * 3
+
+
+def test_counts_progress_and_ids_in_input_order():
+    repo = ChunkRecordingRepo(upsert_max_params=ROW_PARAMS * 3, upsert_parallelism=2)
+    schemas = assets("a", 9)
+    schemas.append(AssetCreate(id="a0"))  # repeated ids come back once
+    progress = []
+
+    async def scenario():
+        ids = await repo.bulk_upsert(
+            schemas,
+            "g",
+            False,
+            use_copy=False,
+            on_progress=progress.append,
+            return_mode="ids",
+        )
+        summary = await repo.bulk_upsert(
+            schemas[:9], "g", False, use_copy=False, return_mode="none"
+        )
+        return ids, summary
+
+    ids, summary = asyncio.run(scenario())
+    assert ids == [f"a{i}" for i in range(9)]
+    assert summary == {"inserted": 6, "updated": 3, "unchanged": 0, "chunks": 3}
+    assert [p["chunks"] for p in progress] == [1, 2, 3, 4]
+    assert progress[-1]["inserted"] + progress[-1]["updated"] == len(schemas)
+    assert repo.peak == 2
+
+
+def test_chunks_sharing_a_row_run_one_after_another():
+    repo = ChunkRecordingRepo(upsert_max_params=ROW_PARAMS + 2, upsert_parallelism=4)
+    shared = [AssetCreate(id=f"s{i}", ext_tag=[tag("t1")]) for i in range(3)]
+    schemas = [shared[0], AssetCreate(id="free"), shared[1], shared[2]]
+
+    asyncio.run(
+        repo.bulk_upsert(schemas, "g", False, use_copy=False, return_mode="none")
+    )
+
+    tagged = [ids for ids in repo.finished if ids[0].startswith("s")]
+    # later rows still win: the shared tag is written in input order
+    assert tagged == [["s0"], ["s1"], ["s2"]]
+    # the unrelated chunk ran alongside s0 instead of waiting behind it
+    assert repo.started[:2] == [["s0"], ["free"]]
+    assert repo.peak == 2
+
+
+def test_failed_chunk_stops_the_rest_and_raises():
+    repo = ChunkRecordingRepo(
+        fail_on="a1", upsert_max_params=ROW_PARAMS, upsert_parallelism=1
+    )
+    with pytest.raises(RuntimeError):
+        asyncio.run(
+            repo.bulk_upsert(
+                assets("a", 5), "g", False, use_copy=False, return_mode="none"
+            )
+        )
+    assert repo.started == [["a0"], ["a1"]]
+    assert repo.finished == [["a0"]]
+
+
+def test_empty_batch():
+    repo = ChunkRecordingRepo()
+    assert asyncio.run(repo.bulk_upsert([], "g", False, return_mode="ids")) == []
+    assert repo.started == []
+
+
+class ScalarSession:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def scalars(self):
+        return iter(self.rows)
+
+
+def bound_values(statement):
+    return [
+        b.value for b in visitors.iterate(statement) if isinstance(b, BindParameter)
+    ]
+
+
+def test_existence_is_prefetched_in_one_array_bound_query():
+    session = ScalarSession(rows=["a1"])
+    repo = AssetRepository(None)
+
+    existing = asyncio.run(repo._existing_ids(session, ["a1", "a2", "a1"]))
+
+    assert existing == {"a1"}
+    assert len(session.statements) == 1
+    (ids,) = bound_values(session.statements[0])
+    assert sorted(ids) == ["a1", "a2"]
+
+
+def test_no_existence_query_without_ids():
+    session = ScalarSession()
+    assert asyncio.run(AssetRepository(None)._existing_ids(session, [])) == set()
+    assert session.statements == []
+
+
+def test_copy_ingest_is_picked_from_the_batch_size():
+    repo = ChunkRecordingRepo(copy_min_rows=5)
+
+    async def scenario():
+        await repo.bulk_upsert(assets("s", 4), "g", False, return_mode="none")
+        await repo.bulk_upsert(assets("b", 5), "g", False, return_mode="none")
+        await repo.bulk_upsert(
+            assets("f", 4), "g", False, use_copy=True, return_mode="none"
+        )
+
+    asyncio.run(scenario())
+    assert repo.copy_modes == [False, True, True]
+    # copy_min_rows=0 (the default) never picks COPY on its own
+    repo = ChunkRecordingRepo()
+    asyncio.run(repo.bulk_upsert(assets("s", 50), "g", False, return_mode="none"))
+    assert repo.copy_modes == [False]
+
+
+class CopyConnection:
+    def __init__(self):
+        self.statements = []
+        self.copies = []
+        self.driver_connection = self
+
+    async def execute(self, statement):
+        self.statements.append(str(statement))
+
+    async def get_raw_connection(self):
+        return self
+
+    async def copy_records_to_table(self, table_name, records, columns):
+        self.copies.append((table_name, records, columns))
+
+
+class CopySession:
+    def __init__(self):
+        self.conn = CopyConnection()
+
+    async def connection(self):
+        return self.conn
+
+
+def test_rows_are_copied_into_a_staging_table_in_column_order():
+    session = CopySession()
+    rows = [
+        {**dict.fromkeys(UPSERT_COLUMNS), "id": "a1", "physical_name": "t1"},
+        {**dict.fromkeys(UPSERT_COLUMNS), "id": "a2"},
+    ]
+
+    stmt = asyncio.run(AssetRepository(None)._stage_rows(session, rows))
+
+    (create,) = session.conn.statements
+    assert create.startswith(f"CREATE TEMP TABLE {UPSERT_STAGE_TABLE} ON COMMIT DROP")
+    assert create.endswith("FROM assets WITH NO DATA")
+    ((table_name, records, columns),) = session.conn.copies
+    assert table_name == UPSERT_STAGE_TABLE
+    assert columns == list(UPSERT_COLUMNS)
+    assert [dict(zip(columns, r)) for r in records] == rows
+    assert f"SELECT {UPSERT_STAGE_TABLE}.id" in str(stmt)
+    assert bound_values(stmt) == []
+
+
+class RowsSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def scalars(self):
+        return self
+
+    def unique(self):
+        return iter(self.rows)
+
+
+def test_full_mode_reloads_rows_once_in_input_order():
+    repo = ChunkRecordingRepo(upsert_max_params=ROW_PARAMS * 2)
+    # the reload comes back in any order; a row deleted meanwhile is skipped
+    session = RowsSession([SimpleNamespace(id=i) for i in ("a2", "a0", "a3")])
+    repo.session_factory = lambda: session
+
+    rows = asyncio.run(
+        repo.bulk_upsert(assets("a", 4), "g", False, use_copy=False, loaders=())
+    )
+
+    assert [r.id for r in rows] == ["a0", "a2", "a3"]
+    assert len(session.statements) == 1
+    (ids,) = bound_values(session.statements[0])
+    assert ids == ["a0", "a1", "a2", "a3"]
+    assert len(repo.finished) == 2
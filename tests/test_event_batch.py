@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.services.event_batch import MicroBatcher
+
+
+class Recorder:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def flush(self, items):
+        self.batches.append(list(items))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("purge failed")
+        return {"deleted": len(items)}
+
+
+def test_submissions_within_the_window_share_one_flush():
+    async def scenario():
+        recorder = Recorder()
+        batcher = MicroBatcher(recorder.flush, window_ms=10, max_size=100)
+        results = await asyncio.gather(*(batcher.submit(f"a{i}") for i in range(5)))
+        return recorder, batcher, results
+
+    recorder, batcher, results = asyncio.run(scenario())
+
+    assert recorder.batches == [["a0", "a1", "a2", "a3", "a4"]]
+    assert results == [{"deleted": 5}] * 5
+    assert batcher.stats() == {
+        "pending": 0,
+        "in_progress": 0,
+        "total_batches": 1,
+        "total_items": 5,
+        "last_batch_size": 5,
+    }
+
+
+def test_a_full_batch_flushes_without_waiting_for_the_window():
+    async def scenario():
+        recorder = Recorder()
+        batcher = MicroBatcher(recorder.flush, window_ms=60_000, max_size=3)
+        return recorder, await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i) for i in range(3))), timeout=1
+        )
+
+    recorder, results = asyncio.run(scenario())
+
+    assert recorder.batches == [[0, 1, 2]]
+    assert results == [{"deleted": 3}] * 3
+
+
+def test_every_submitter_sees_a_failed_flush():
+    async def scenario():
+        batcher = MicroBatcher(Recorder(fail=True).flush, window_ms=5)
+        return await asyncio.gather(
+            batcher.submit("a"), batcher.submit("b"), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+
+
+def test_stop_flushes_what_is_still_collecting():
+    async def scenario():
+        recorder = Recorder()
+        batcher = MicroBatcher(recorder.flush, window_ms=60_000)
+        pending = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0)
+        await batcher.stop()
+        return recorder, await pending
+
+    recorder, result = asyncio.run(scenario())
+
+    assert recorder.batches == [["a"]]
+    assert result == {"deleted": 1}
+
+
+def test_stop_with_cancel_abandons_collected_items():
+    async def scenario():
+        recorder = Recorder()
+        batcher = MicroBatcher(recorder.flush, window_ms=60_000)
+        pending = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0)
+        await batcher.stop(cancel=True)
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        return recorder
+
+    assert asyncio.run(scenario()).batches == []
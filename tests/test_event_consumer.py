@@ -0,0 +1,211 @@
+import asyncio
+import functools
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.domain.schemas.events import Event, EventContext
+from app.infrastructure.messaging.consumers.event import (
+    EventConsumerPool,
+    _AckBatcher,
+    _StreamOffsets,
+)
+
+
+class FailingPool:
+    async def add_event(self, ctx):
+        raise RuntimeError("lanes closed")
+
+
+def make_ctx():
+    now = datetime(2026, 1, 1)
+    return EventContext(
+        event=Event(
+            id="e1",
+            event_type="DeleteAssets",
+            operation="OpDeleteAssets",
+            body="a1",
+            created_at=now,
+            expires_at=now + timedelta(days=1),
+        )
+    )
+
+
+def test_committed_offset_stays_below_in_flight_events():
+    offsets = _StreamOffsets()
+    for offset in (10, 11, 12):
+        offsets.seen(offset)
+    offsets.begin(11)
+    assert offsets.committed == 10
+    offsets.done(11)
+    assert offsets.committed == 12
+
+
+def test_failed_hand_off_releases_its_offset():
+    offsets = _StreamOffsets()
+    offsets.seen(7)
+    offsets.seen(8)
+    offsets.begin(7)
+    ctx = make_ctx()
+    ctx.on_done = functools.partial(offsets.done, 7)
+    consumers = EventConsumerPool(FailingPool(), prefetch_count=1)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(consumers._hand_off(ctx))
+
+    # the message is acked anyway; the watermark must not stay pinned at 6
+    assert offsets.committed == 8
+
+
+class OffsetRepo:
+    def __init__(self, rows=None):
+        self.rows = dict(rows or {})
+
+    async def get_stream_offset(self, consumer):
+        return self.rows.get(consumer)
+
+    async def save_stream_offset(self, consumer, offset, rewound_to=None):
+        row = self.rows.get(consumer)
+        if rewound_to is None and row is not None:
+            rewound_to = row.rewound_to
+        self.rows[consumer] = SimpleNamespace(offset=offset, rewound_to=rewound_to)
+
+
+class Owner:
+    def __init__(self, owned):
+        self.owned = set(owned)
+
+
+def make_consumers(repo, owned=None):
+    consumers = EventConsumerPool(
+        None,
+        prefetch_count=1,
+        event_repo=repo,
+        ownership=Owner(owned) if owned is not None else None,
+    )
+    consumers.consumer_name = "assets"
+    return consumers
+
+
+def test_each_partition_is_held_back_only_by_its_own_events():
+    offsets = _StreamOffsets()
+    for offset in range(20, 31):
+        offsets.seen(offset)
+    offsets.begin(22, partition=1)
+    offsets.begin(25, partition=2)
+    assert offsets.committed_for(1) == 21
+    assert offsets.committed_for(2) == 24
+    assert offsets.committed_for(3) == 30
+    offsets.done(22)
+    assert offsets.committed_for(1) == 30
+
+
+def test_replicas_checkpoint_disjoint_rows():
+    repo = OffsetRepo()
+    a = make_consumers(repo, owned={0, 1})
+    b = make_consumers(repo, owned={2})
+    offsets_a, offsets_b = _StreamOffsets(), _StreamOffsets()
+    offsets_a.seen(100)
+    offsets_a.begin(90, partition=1)
+    offsets_b.seen(40)  # a replica lagging behind
+
+    asyncio.run(a._save_checkpoint(0, offsets_a))
+    asyncio.run(b._save_checkpoint(0, offsets_b))
+
+    assert {k: r.offset for k, r in repo.rows.items()} == {
+        "assets:0:p0": 100,
+        "assets:0:p1": 89,
+        "assets:0:p2": 40,
+    }
+
+
+def test_resume_from_the_oldest_owned_checkpoint():
+    repo = OffsetRepo(
+        {
+            "assets:0:p0": SimpleNamespace(offset=100, rewound_to=None),
+            "assets:0:p1": SimpleNamespace(offset=89, rewound_to=None),
+            # someone else's partition: not ours to resume from
+            "assets:0:p2": SimpleNamespace(offset=40, rewound_to=None),
+        }
+    )
+    assert asyncio.run(make_consumers(repo, owned={0, 1})._start_offset(0)) == 90
+    assert asyncio.run(make_consumers(repo, owned=set())._start_offset(0)) is None
+
+
+def test_unpartitioned_consumer_keeps_one_row():
+    repo = OffsetRepo()
+    consumers = make_consumers(repo)
+    offsets = _StreamOffsets()
+    offsets.seen(7)
+    asyncio.run(consumers._save_checkpoint(0, offsets))
+    assert list(repo.rows) == ["assets:0"]
+    assert asyncio.run(consumers._start_offset(0)) == 8
+
+
+def test_taken_over_partition_resumes_from_its_own_row():
+    repo = OffsetRepo()
+    a, b = make_consumers(repo, owned={0, 1}), make_consumers(repo, owned={2})
+    offsets_a, offsets_b = _StreamOffsets(), _StreamOffsets()
+    offsets_a.seen(500)
+    offsets_b.seen(300)
+    offsets_b.begin(250, partition=2)
+    asyncio.run(a._save_checkpoint(0, offsets_a))
+    asyncio.run(b._save_checkpoint(0, offsets_b))
+
+    # b goes away; a restarts and now holds partition 2 as well
+    restarted = make_consumers(repo, owned={0, 1, 2})
+    assert asyncio.run(restarted._start_offset(0)) == 250
+
+
+def test_partition_without_a_row_falls_back_to_the_unpartitioned_one():
+    repo = OffsetRepo(
+        {
+            "assets:0": SimpleNamespace(offset=60, rewound_to=None),
+            "assets:0:p0": SimpleNamespace(offset=100, rewound_to=None),
+        }
+    )
+    assert asyncio.run(make_consumers(repo, owned={0, 1})._start_offset(0)) == 61
+    assert asyncio.run(make_consumers(repo, owned={0})._start_offset(0)) == 101
+
+
+class Message:
+    def __init__(self, tag, acks):
+        self.tag = tag
+        self.acks = acks
+
+    async def ack(self, multiple=False):
+        self.acks.append((self.tag, multiple))
+
+
+def test_acks_are_cumulative_once_the_batch_fills():
+    async def scenario():
+        acks = []
+        acker = _AckBatcher(max_pending=3, flush_interval_ms=60_000)
+        for tag in range(1, 8):
+            await acker.ack(Message(tag, acks))
+        assert acks == [(3, True), (6, True)]
+        await acker.close()  # the partial batch goes out on close
+        assert acks == [(3, True), (6, True), (7, True)]
+
+    asyncio.run(scenario())
+
+
+def test_partial_batch_is_acked_on_the_flush_interval():
+    async def scenario():
+        acks = []
+        acker = _AckBatcher(max_pending=100, flush_interval_ms=10)
+        acker.start()
+        await acker.ack(Message(1, acks))
+        await acker.ack(Message(2, acks))
+        await asyncio.sleep(0.05)
+        assert acks == [(2, True)]
+        await acker.close()
+        assert acks == [(2, True)]
+
+    asyncio.run(scenario())
+
+
+def test_ack_batch_never_exceeds_the_prefetch_window():
+    consumers = EventConsumerPool(None, prefetch_count=8, ack_batch_size=50)
+    assert consumers.ack_batch_size == 8
@@ -0,0 +1,62 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from app.domain.schemas.events import Event, EventType, Operation, body_hash
+from app.services.event_dedupe import RecentEventIndex
+
+T0 = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+
+
+def make_event(event_id, seconds, body="a1", event_type=EventType.DELETE_ASSETS):
+    return Event(
+        id=event_id,
+        event_type=event_type,
+        operation=Operation.DELETE_ASSETS,
+        body=body,
+        user_id="u1",
+        created_at=T0 + timedelta(seconds=seconds),
+        expires_at=T0 + timedelta(days=1, seconds=seconds),
+    )
+
+
+def test_body_hash_matches_the_generated_column():
+    assert body_hash("a1") == hashlib.md5(b"a1").hexdigest()
+    # md5(coalesce(body, ''))
+    assert body_hash(None) == body_hash("") == hashlib.md5(b"").hexdigest()
+
+
+def test_newer_event_with_the_same_type_and_body_is_a_duplicate():
+    index = RecentEventIndex()
+    old, new = make_event("old", 1), make_event("new", 2)
+    index.observe_event(old)
+    index.observe_event(new)
+
+    assert index.is_duplicate(old) is True
+    assert index.is_duplicate(new) is False
+    assert index.is_duplicate(make_event("other", 2, body="a2")) is False
+    assert index.stats() == {"entries": 1, "hits": 3, "misses": 0}
+
+
+def test_events_before_the_index_horizon_go_to_the_database():
+    index = RecentEventIndex()
+    index.observe_event(make_event("first-seen", 10))
+
+    # created before anything was observed: a later copy may have been missed
+    assert index.is_duplicate(make_event("older", 5, body="a2")) is None
+    # created after what the stream has delivered so far
+    assert index.is_duplicate(make_event("ahead", 20, body="a2")) is None
+    assert index.stats()["misses"] == 2
+
+
+def test_eviction_moves_the_horizon_past_the_evicted_event():
+    index = RecentEventIndex(capacity=2)
+    for i, body in enumerate(["a1", "a2", "a3", "a4"]):
+        index.observe_event(make_event(f"e{i}", i, body=body))
+
+    assert index.stats()["entries"] == 2
+    assert index.complete_from == (T0 + timedelta(seconds=1)).replace(
+        tzinfo=timezone.utc
+    )
+    # e1's key was evicted; a newer copy of it may be gone with it
+    assert index.is_duplicate(make_event("e1", 1, body="a2")) is None
+    assert index.is_duplicate(make_event("e2", 2, body="a3")) is False
@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.domain.schemas.events import Event, EventStatus, EventType, Operation
+from app.services.event import (
+    PREREQUISITES,
+    EventProcessorWorkerPool,
+    Prerequisites,
+    dependencies_met,
+)
+from app.services.event_dependency import DependencyTracker
+
+T0 = datetime.now(timezone.utc).replace(microsecond=0)
+PREREQ = EventType.DELETE_ASSETS.value
+
+
+def make_event(event_id, seconds, event_type=EventType.UPDATE_TAGS, **kwargs):
+    fields = dict(
+        id=event_id,
+        event_type=event_type,
+        operation=Operation.DELETE_ASSETS,
+        body="a1",
+        user_id="u1",
+        created_at=T0 + timedelta(seconds=seconds),
+        expires_at=T0 + timedelta(days=1, seconds=seconds),
+    )
+    fields.update(kwargs)
+    return Event(**fields)
+
+
+def test_parked_event_wakes_when_its_prerequisite_finishes():
+    async def scenario():
+        tracker = DependencyTracker()
+        head = make_event("head", 10)
+        prereq = make_event("prereq", 5, event_type=EventType.DELETE_ASSETS)
+        tracker.prime(head, {})
+        tracker.observe_event(prereq)
+        assert tracker.summary(head, [PREREQ]) == {PREREQ: (True, False)}
+
+        waiter = tracker.park(head, [PREREQ])
+        assert tracker.stats()["parked"] == 1
+        # other keys don't wake it
+        tracker.observe_event(make_event("other", 6, event_type=EventType.UPDATE_USERS))
+        assert not waiter.is_set()
+
+        prereq.status = EventStatus.COMPLETED
+        tracker.observe_event(prereq)
+        await asyncio.wait_for(waiter.wait(), 0.5)
+        assert tracker.summary(head, [PREREQ]) == {PREREQ: (True, True)}
+
+        tracker.unpark(head, [PREREQ], waiter)
+        assert tracker.stats()["parked"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_later_events_do_not_gate_earlier_ones():
+    tracker = DependencyTracker()
+    head = make_event("head", 10)
+    tracker.prime(head, {})
+    tracker.observe_event(make_event("later", 20, event_type=EventType.DELETE_ASSETS))
+    assert tracker.summary(head, [PREREQ]) == {}
+
+
+def test_stale_cdc_image_does_not_regress_a_final_status():
+    tracker = DependencyTracker()
+    head = make_event("head", 10)
+    tracker.prime(head, {})
+    prereq = make_event("prereq", 5, event_type=EventType.DELETE_ASSETS)
+    prereq.status = EventStatus.COMPLETED
+    tracker.observe_event(prereq)
+    prereq.status = EventStatus.EXECUTING
+    tracker.observe_event(prereq)
+    assert tracker.summary(head, [PREREQ]) == {PREREQ: (True, True)}
+
+
+def test_unfinished_primed_history_defers_to_the_db():
+    tracker = DependencyTracker()
+    head = make_event("head", 10)
+    tracker.prime(head, {PREREQ: (True, False)})
+    assert tracker.summary(head, [PREREQ]) is None
+    assert tracker.summary(make_event("earlier", 5), [PREREQ]) is None
+
+
+def test_records_and_primed_history_expire_together():
+    tracker = DependencyTracker(ttl=timedelta(hours=1))
+    head = make_event("head", 10)
+    tracker.prime(head, {})
+    tracker.observe_event(make_event("prereq", 5, event_type=EventType.DELETE_ASSETS))
+    # no expires_at: falls back to created_at + ttl
+    tracker.observe(
+        event_id="bare",
+        operation=Operation.DELETE_ASSETS,
+        user_id="u1",
+        event_type=EventType.UPDATE_USERS,
+        status=EventStatus.PENDING,
+        created_at=T0,
+    )
+    assert tracker.stats()["tracked"] == 2
+
+    assert tracker.prune(now=T0 + timedelta(hours=2)) == 1
+    assert tracker.stats()["primed"] == 0
+    assert tracker.needs_priming(head)
+
+    assert tracker.prune(now=T0 + timedelta(days=2)) == 1
+    assert tracker.stats()["tracked"] == 0
+    assert not tracker._record_expiry and not tracker._history_expiry
+
+
+def test_reprimed_history_outlives_its_earlier_expiry():
+    tracker = DependencyTracker(ttl=timedelta(hours=1))
+    tracker.prime(make_event("first", 0), {})
+    later = make_event("later", 3000)
+    tracker.prime(later, {PREREQ: (True, True)})
+
+    tracker.prune(now=T0 + timedelta(hours=1, minutes=1))
+    assert not tracker.needs_priming(later)
+    assert tracker.summary(later, [PREREQ]) == {PREREQ: (True, True)}
+
+
+def test_prerequisites_are_the_types_listed_earlier_in_the_operation():
+    delete_users = PREREQUISITES[("OpDeleteAssets", "UpdateUsers")]
+    assert delete_users == Prerequisites(
+        required=frozenset({"DeleteAssets", "UpdateTags"}), optional=frozenset()
+    )
+    ext_tags = PREREQUISITES[("OpExtUpdateMetadata", "UpdateTags")]
+    assert ext_tags.required == {"ApplyRule"}
+    assert ext_tags.optional == {"UpdateAssets"}
+    assert PREREQUISITES[("OpDeleteAssets", "DeleteAssets")].event_types == set()
+
+
+def test_dependencies_met_from_a_grouped_summary():
+    prereqs = Prerequisites(
+        required=frozenset({"ApplyRule"}), optional=frozenset({"UpdateAssets"})
+    )
+    # {event_type: (present, all_final)}
+    assert dependencies_met(prereqs, {"ApplyRule": (True, True)})
+    assert not dependencies_met(prereqs, {})  # required type never ran
+    assert not dependencies_met(prereqs, {"ApplyRule": (True, False)})
+    assert not dependencies_met(
+        prereqs, {"ApplyRule": (True, True), "UpdateAssets": (True, False)}
+    )
+    assert dependencies_met(
+        prereqs, {"ApplyRule": (True, True), "UpdateAssets": (True, True)}
+    )
+
+
+def test_history_summary_is_one_query_over_every_prerequisite_type():
+    class SummaryRepo:
+        def __init__(self):
+            self.calls = []
+
+        async def get_dependency_summary(self, event, event_types):
+            self.calls.append(set(event_types))
+            return {"DeleteAssets": (True, True)}
+
+    async def scenario():
+        repo = SummaryRepo()
+        pool = EventProcessorWorkerPool(repo, asset_repo=None, max_workers=1)
+        summary = await pool.get_dependency_summary(make_event("e", 10))
+        return repo, summary
+
+    repo, summary = asyncio.run(scenario())
+
+    assert repo.calls == [{"DeleteAssets", "UpdateTags", "UpdateUsers"}]
+    assert summary == {"DeleteAssets": (True, True)}
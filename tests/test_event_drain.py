@@ -0,0 +1,106 @@
+import asyncio
+import os
+import signal
+
+from app.core.metrics import REGISTRY, stats_collector
+from app.infrastructure.messaging.consumers.event import EventsRuntime
+
+
+class Stoppable:
+    def __init__(self):
+        self.stops = 0
+
+    async def stop(self):
+        self.stops += 1
+
+    async def save_checkpoints(self):
+        pass
+
+
+class SlowPool:
+    def __init__(self):
+        self.stops = 0
+        self.release = asyncio.Event()
+
+    async def stop(self, drain_timeout=None):
+        self.stops += 1
+        await self.release.wait()
+        return 3
+
+
+def make_runtime():
+    runtime = EventsRuntime.__new__(EventsRuntime)
+    runtime.processor_pool = SlowPool()
+    runtime.consumer_pool = Stoppable()
+    runtime.ownership = None
+    runtime.partition_maintainer = Stoppable()
+    runtime.expiry_sweeper = Stoppable()
+    runtime._expiry_collector = stats_collector("drain_test", "", lambda: {})
+    REGISTRY.register_collector(runtime._expiry_collector)
+    runtime._started = True
+    runtime.draining = False
+    runtime._drain_task = None
+    runtime._drain_signal = None
+    return runtime
+
+
+def test_prestop_drain_is_joined_by_shutdown():
+    async def scenario():
+        runtime = make_runtime()
+        prestop = asyncio.create_task(runtime.drain(timeout=1))
+        await asyncio.sleep(0)
+        # readiness already fails while the server still serves
+        assert runtime.draining
+        shutdown = asyncio.create_task(runtime.stop())
+        await asyncio.sleep(0)
+        runtime.processor_pool.release.set()
+        assert await prestop == 3
+        await shutdown
+        assert runtime.processor_pool.stops == 1
+        assert runtime.consumer_pool.stops == 1
+        assert await runtime.drain() == 3
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_prestop_does_not_cut_the_drain_short():
+    async def scenario():
+        runtime = make_runtime()
+        prestop = asyncio.create_task(runtime.drain(timeout=1))
+        await asyncio.sleep(0)
+        prestop.cancel()
+        await asyncio.gather(prestop, return_exceptions=True)
+        runtime.processor_pool.release.set()
+        assert await runtime.drain() == 3
+        assert runtime.partition_maintainer.stops == 1
+
+    asyncio.run(scenario())
+
+
+def test_drain_before_start_is_a_noop():
+    async def scenario():
+        runtime = make_runtime()
+        runtime._started = False
+        assert await runtime.drain() == 0
+        assert not runtime.draining
+
+    asyncio.run(scenario())
+
+
+def test_signal_starts_the_drain_and_shutdown_joins_it():
+    async def scenario():
+        runtime = make_runtime()
+        runtime.drain_on_signal(signal.SIGUSR1)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        for _ in range(50):
+            if runtime.draining:
+                break
+            await asyncio.sleep(0.01)
+        assert runtime.draining
+        runtime.processor_pool.release.set()
+        await runtime.stop()
+        assert runtime.processor_pool.stops == 1
+        # the handler is gone with the runtime
+        assert runtime._drain_signal is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,64 @@
+import asyncio
+
+from app.services.event_expiry import ExpiredEventSweeper
+
+
+class FakeEventRepo:
+    def __init__(self, expired):
+        self.expired = expired
+        self.limits = []
+
+    async def delete_expired_events(self, limit=1000, now=None):
+        self.limits.append(limit)
+        n = min(limit, self.expired)
+        self.expired -= n
+        return n
+
+
+def test_sweeper_deletes_in_batches_until_one_comes_back_short():
+    repo = FakeEventRepo(expired=25)
+    sweeper = ExpiredEventSweeper(repo, batch_size=10, batch_pause_ms=0)
+
+    deleted = asyncio.run(sweeper.run_once())
+
+    assert deleted == 25
+    assert repo.limits == [10, 10, 10]
+    assert sweeper.stats() == {"total_deleted": 25, "last_round_deleted": 25}
+
+
+def test_sweeper_stops_after_an_empty_batch_when_rows_divide_evenly():
+    repo = FakeEventRepo(expired=20)
+    sweeper = ExpiredEventSweeper(repo, batch_size=10, batch_pause_ms=0)
+
+    asyncio.run(sweeper.run_once())
+    deleted = asyncio.run(sweeper.run_once())
+
+    assert deleted == 0
+    assert repo.limits == [10, 10, 10, 10]
+    assert sweeper.stats() == {"total_deleted": 20, "last_round_deleted": 0}
+
+
+def test_sweeper_keeps_running_after_a_failed_round():
+    class FlakyRepo(FakeEventRepo):
+        async def delete_expired_events(self, limit=1000, now=None):
+            if not self.limits:
+                self.limits.append(limit)
+                raise RuntimeError("connection reset")
+            return await super().delete_expired_events(limit, now)
+
+    async def scenario():
+        repo = FlakyRepo(expired=3)
+        sweeper = ExpiredEventSweeper(repo, batch_size=10, interval_seconds=0)
+        sweeper.start()
+        for _ in range(20):
+            await asyncio.sleep(0)
+            if sweeper.total_deleted:
+                break
+        await sweeper.stop()
+        return sweeper
+
+    sweeper = asyncio.run(scenario())
+
+    assert sweeper.total_deleted == 3
+    assert sweeper._task is None
+
@@ -0,0 +1,160 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.domain.schemas.events import (
+    Event,
+    EventContext,
+    EventStatus,
+    EventType,
+    Operation,
+)
+from app.services.event import PREREQUISITES, EventProcessorWorkerPool
+from app.services.event_lanes import EventLanes, Priority
+
+T0 = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def make_ctx(event_id, seconds=0, **kwargs):
+    fields = dict(
+        id=event_id,
+        event_type=EventType.UPDATE_TAGS,
+        operation=Operation.DELETE_ASSETS,
+        body="a1",
+        user_id="u1",
+        created_at=T0 + timedelta(seconds=seconds),
+        expires_at=T0 + timedelta(days=1),
+    )
+    fields.update(kwargs)
+    return EventContext(event=Event(**fields))
+
+
+async def get_now(lanes):
+    return await asyncio.wait_for(lanes.get(), 0.5)
+
+
+def test_same_key_runs_in_created_order_one_at_a_time():
+    async def scenario():
+        lanes = EventLanes()
+        await lanes.put(make_ctx("late", seconds=2))
+        await lanes.put(make_ctx("early", seconds=1))
+        first = await get_now(lanes)
+        assert first.event.id == "early"
+        assert lanes._ready.empty()  # the lane is busy until done
+        lanes.done(first)
+        assert (await get_now(lanes)).event.id == "late"
+
+    asyncio.run(scenario())
+
+
+def test_independent_keys_dispatch_in_parallel():
+    async def scenario():
+        lanes = EventLanes()
+        await lanes.put(make_ctx("a", body="a"))
+        await lanes.put(make_ctx("b", body="b"))
+        got = {(await get_now(lanes)).event.id, (await get_now(lanes)).event.id}
+        assert got == {"a", "b"}
+        assert lanes.stats()["active_lanes"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_fast_track_goes_ahead_of_bulk():
+    async def scenario():
+        lanes = EventLanes(aging_seconds=5)
+        bulk = make_ctx("bulk", body="b", operation=Operation.BULK_ASSETS)
+        fast = make_ctx("fast", body="f", is_fast_track=True)
+        assert lanes.priority_of(bulk.event) == Priority.BULK
+        await lanes.put(bulk)
+        await lanes.put(fast)
+        assert (await get_now(lanes)).event.id == "fast"
+
+    asyncio.run(scenario())
+
+
+def test_waiting_bulk_event_ages_past_new_fast_track():
+    async def scenario():
+        lanes = EventLanes(aging_seconds=0.01)
+        await lanes.put(make_ctx("bulk", body="b", operation=Operation.BULK_ASSETS))
+        await asyncio.sleep(0.05)  # longer than 2 * aging_seconds
+        await lanes.put(make_ctx("fast", body="f", is_fast_track=True))
+        assert (await get_now(lanes)).event.id == "bulk"
+
+    asyncio.run(scenario())
+
+
+
+def test_priority_classes():
+    lanes = EventLanes(bulk_body_bytes=8)
+    assert lanes.priority_of(make_ctx("n").event) == Priority.NORMAL
+    assert lanes.priority_of(make_ctx("big", body="x" * 9).event) == Priority.BULK
+    fast_bulk = make_ctx("fb", operation=Operation.BULK_ASSETS, is_fast_track=True)
+    assert lanes.priority_of(fast_bulk.event) == Priority.FAST
+
+
+def test_priority_never_reorders_a_lane():
+    async def scenario():
+        lanes = EventLanes(aging_seconds=5)
+        await lanes.put(make_ctx("first", seconds=1))
+        await lanes.put(make_ctx("urgent", seconds=2, is_fast_track=True))
+        assert lanes.stats()["queued_fast"] == 1
+        assert lanes.stats()["queued_normal"] == 1
+        first = await get_now(lanes)
+        assert first.event.id == "first"
+        lanes.done(first)
+        assert (await get_now(lanes)).event.id == "urgent"
+        assert lanes.stats()["queued"] == 0
+
+    asyncio.run(scenario())
+
+def test_done_from_an_event_that_gave_up_its_lane_is_a_noop():
+    async def scenario():
+        lanes = EventLanes()
+        await lanes.put(make_ctx("head", seconds=1))
+        await lanes.put(make_ctx("mate", seconds=2))
+        head = await get_now(lanes)
+        lanes.done(head)  # released early, e.g. to wait on prerequisites
+        mate = await get_now(lanes)
+        await lanes.put(make_ctx("next", seconds=3))
+        lanes.done(head)  # the worker's final release: must not free mate's lane
+        assert lanes._ready.empty()
+        lanes.done(mate)
+        assert (await get_now(lanes)).event.id == "next"
+
+    asyncio.run(scenario())
+
+
+class SummaryRepo:
+    async def get_dependency_summary(self, event, event_types):
+        return {}
+
+
+def test_parked_head_lets_its_prerequisite_through_the_lane():
+    async def scenario():
+        pool = EventProcessorWorkerPool(SummaryRepo(), asset_repo=None, max_workers=1)
+        tracker = pool.dependency_tracker
+        # the prerequisite was created first but is back from a retry, so it
+        # queues in the lane behind the head that is already dispatched
+        prereq = make_ctx("prereq", seconds=1, event_type=EventType.DELETE_ASSETS)
+        head = make_ctx("head", seconds=2)
+        tracker.prime(head.event, {})
+        tracker.observe_event(prereq.event)
+
+        await pool.lanes.put(head)
+        assert await get_now(pool.lanes) is head
+        await pool.lanes.put(prereq)
+
+        prereqs = PREREQUISITES[
+            (Operation.DELETE_ASSETS.value, EventType.UPDATE_TAGS.value)
+        ]
+        waiting = asyncio.create_task(
+            pool.wait_for_dependencies(
+                head.event, prereqs, on_wait=lambda: pool.lanes.done(head)
+            )
+        )
+        # no timeout: the lane was handed back while the head is parked
+        assert await get_now(pool.lanes) is prereq
+        prereq.event.status = EventStatus.COMPLETED
+        tracker.observe_event(prereq.event)
+        assert await asyncio.wait_for(waiting, 0.5)
+
+    asyncio.run(scenario())
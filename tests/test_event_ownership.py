@@ -0,0 +1,296 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.infrastructure.db.repositories.partition_lease import PartitionLeaseRepository
+from app.services.event_ownership import PartitionOwnership
+
+PARTITIONS = 16
+
+
+class FakeLeases:
+    """Advisory locks of one session, over a lock table shared by replicas."""
+
+    def __init__(self, locks, name):
+        self.locks = locks
+        self.name = name
+        self._open = False
+
+    @property
+    def is_open(self):
+        return self._open
+
+    async def open(self):
+        self._open = True
+
+    async def close(self):
+        self._open = False
+        for key in [k for k, holder in self.locks.items() if holder == self.name]:
+            del self.locks[key]
+
+    async def try_lock(self, namespace, key):
+        if self.locks.get((namespace, key), self.name) != self.name:
+            return False
+        self.locks[(namespace, key)] = self.name
+        return True
+
+    async def unlock(self, namespace, key):
+        return self.locks.pop((namespace, key), None) is not None
+
+    async def count_holders(self, namespace):
+        return sum(1 for ns, _ in self.locks if ns == namespace)
+
+    async def held_keys(self, namespace):
+        return sorted(
+            k
+            for (ns, k), holder in self.locks.items()
+            if ns == namespace and holder == self.name
+        )
+
+
+class FakeEvents:
+    def __init__(self):
+        self.calls = []
+
+    async def list_unfinished_in_partition(
+        self, partition, partitions, created_before, after=None, limit=500
+    ):
+        self.calls.append((partition, created_before))
+        return []
+
+
+def make_replicas(n, locks=None, events=None):
+    locks = {} if locks is None else locks
+    events = events or FakeEvents()
+
+    async def deliver(ctx):
+        pass
+
+    return [
+        PartitionOwnership(
+            FakeLeases(locks, f"r{i}"),
+            events,
+            deliver,
+            partitions=PARTITIONS,
+            rebalance_interval_seconds=3600,
+            adopt_delay_seconds=0,
+        )
+        for i in range(n)
+    ]
+
+
+async def _settle(replicas, rounds=2):
+    for _ in range(rounds):
+        for r in replicas:
+            await r.rebalance()
+
+
+def test_partitions_split_between_replicas_without_overlap():
+    async def scenario():
+        a, b, c = make_replicas(3)
+        await a.start()
+        assert len(a.owned) == PARTITIONS
+        await b.start()
+        await c.start()
+        await _settle([a, b, c])
+        owned = [a.owned, b.owned, c.owned]
+        assert all(len(o) <= 6 for o in owned)  # ceil(16 / 3)
+        assert set().union(*owned) == set(range(PARTITIONS))
+        assert not (a.owned & b.owned or a.owned & c.owned or b.owned & c.owned)
+        for r in (a, b, c):
+            await r.stop()
+
+    asyncio.run(scenario())
+
+
+def test_busy_partitions_are_not_handed_back():
+    async def scenario():
+        a, b = make_replicas(2)
+        await a.start()
+        settle = [
+            a.track(SimpleNamespace(operation="OpDeleteAssets", user_id=f"u{i}"))
+            for i in range(200)
+        ]
+        await b.start()
+        await _settle([a, b])
+        # every partition has work in flight on a: nothing moves yet
+        assert len(a.owned) == PARTITIONS and not b.owned
+        for done in settle:
+            done()
+            done()  # settling twice is harmless
+        await _settle([a, b])
+        assert len(a.owned) == len(b.owned) == PARTITIONS // 2
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(scenario())
+
+
+def test_leaving_replica_partitions_are_taken_over_and_adopted():
+    async def scenario():
+        events = FakeEvents()
+        a, b = make_replicas(2, events=events)
+        await a.start()
+        await b.start()
+        await _settle([a, b])
+        handed_over = a.owned
+        await a.stop()
+        events.calls.clear()
+        await b.rebalance()
+        await asyncio.sleep(0.01)
+        assert b.owned == set(range(PARTITIONS))
+        assert {p for p, _ in events.calls} == handed_over
+        await b.stop()
+
+    asyncio.run(scenario())
+
+
+def test_owns_only_events_created_after_takeover():
+    async def scenario():
+        (a,) = make_replicas(1)
+        await a.start()
+        now = datetime.now(timezone.utc)
+        assert a.owns("OpDeleteAssets", "u1", now + timedelta(seconds=1))
+        assert not a.owns("OpDeleteAssets", "u1", now - timedelta(hours=1))
+        # naive timestamps are UTC
+        naive = (now + timedelta(seconds=1)).replace(tzinfo=None)
+        assert a.owns("OpDeleteAssets", "u1", naive)
+        await a.stop()
+
+    asyncio.run(scenario())
+
+
+def test_failed_rebalance_releases_locks_for_other_replicas():
+    async def scenario():
+        locks = {}
+        a, b = make_replicas(2, locks=locks)
+        await a.start()
+
+        async def broken(namespace):
+            raise ConnectionError("gone")
+
+        a.lease_repo.count_holders = broken
+        a.rebalance_interval_seconds = 0
+        a._task.cancel()
+        a._task = asyncio.create_task(a._run())
+        await asyncio.sleep(0.01)
+        assert not a.owned
+        await b.start()
+        assert len(b.owned) == PARTITIONS
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(scenario())
+
+
+def test_lease_connection_is_not_from_the_app_pool():
+    app_engine = create_async_engine("postgresql+asyncpg://u:p@localhost/assets")
+    leases = PartitionLeaseRepository(app_engine)
+    assert isinstance(leases.engine.pool, NullPool)
+    assert leases.engine.url == app_engine.url
+
+
+def test_lease_close_unlocks_everything_before_disconnecting():
+    class Conn:
+        closed = False
+
+        def __init__(self):
+            self.executed = []
+
+        async def execute(self, stmt, params=None):
+            self.executed.append(str(stmt))
+
+        async def close(self):
+            self.closed = True
+
+    leases = PartitionLeaseRepository(
+        create_async_engine("postgresql+asyncpg://u:p@localhost/assets")
+    )
+    conn = leases._conn = Conn()
+    asyncio.run(leases.close())
+    assert conn.executed == ["SELECT pg_advisory_unlock_all()"]
+    assert conn.closed and not leases.is_open
+
+
+class LockConn:
+    """A connection whose advisory locks live in a table shared with others."""
+
+    closed = False
+
+    def __init__(self, locks, pid):
+        self.locks = locks
+        self.pid = pid
+        self.executed = []
+
+    async def scalar(self, stmt, params):
+        sql = str(stmt)
+        self.executed.append((sql, params))
+        key = (params["ns"], params.get("key"))
+        if "pg_try_advisory_lock" in sql:
+            if self.locks.setdefault(key, self.pid) != self.pid:
+                return False
+            return True
+        if "pg_advisory_unlock" in sql:
+            if self.locks.get(key) != self.pid:
+                return False
+            del self.locks[key]
+            return True
+        if "FROM pg_locks" in sql:
+            return sum(1 for ns, _ in self.locks if ns == params["ns"])
+        raise AssertionError(sql)
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.executed.append((sql, params))
+        assert "pg_backend_pid()" in sql
+        return [
+            (k,)
+            for (ns, k), pid in self.locks.items()
+            if ns == params["ns"] and pid == self.pid
+        ]
+
+
+def make_leases(locks, pid):
+    leases = PartitionLeaseRepository(
+        create_async_engine("postgresql+asyncpg://u:p@localhost/assets")
+    )
+    leases._conn = LockConn(locks, pid)
+    return leases
+
+
+def test_advisory_locks_are_exclusive_per_namespace_and_key():
+    async def scenario():
+        locks = {}
+        a, b = make_leases(locks, 1), make_leases(locks, 2)
+        assert await a.try_lock(7, 3)
+        assert await a.try_lock(7, 3)  # re-entrant for the holder
+        assert not await b.try_lock(7, 3)
+        assert await b.try_lock(7, 4)
+        assert await b.try_lock(8, 3)  # other namespace, other lock
+        assert await a.count_holders(7) == 2
+        assert await a.held_keys(7) == [3]
+        assert await b.held_keys(7) == [4]
+        assert not await b.unlock(7, 3)  # not b's to release
+        assert await a.unlock(7, 3)
+        assert await b.try_lock(7, 3)
+        sql, params = a._conn.executed[0]
+        assert sql == "SELECT pg_try_advisory_lock(:ns, :key)"
+        assert params == {"ns": 7, "key": 3}
+
+    asyncio.run(scenario())
+
+
+def test_lease_calls_fail_fast_without_a_connection():
+    async def scenario():
+        leases = PartitionLeaseRepository(
+            create_async_engine("postgresql+asyncpg://u:p@localhost/assets")
+        )
+        assert await leases.held_keys(7) == []
+        with pytest.raises(RuntimeError, match="not open"):
+            await leases.try_lock(7, 3)
+
+    asyncio.run(scenario())
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app.infrastructure.db.repositories.event import EventRepository
+
+PARTITIONS = ["events_p20260101", "events_p20260102", "events_default"]
+
+
+class RecordingSession:
+    def __init__(self, statements):
+        self.statements = statements
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(str(statement))
+        return [(name,) for name in PARTITIONS]
+
+    async def commit(self):
+        pass
+
+
+def test_partitions_dropped_from_their_bounds_without_reading_them():
+    statements = []
+    repo = EventRepository(lambda: RecordingSession(statements))
+    # events_p20260101 ends 2026-01-02, so its rows expired by 2026-01-03
+    now = datetime(2026, 1, 3, tzinfo=timezone.utc)
+
+    dropped = asyncio.run(repo.drop_expired_partitions(now=now))
+
+    assert dropped == ["events_p20260101"]
+    assert "DROP TABLE events_p20260101" in statements
+    assert not any("max(expires_at)" in s for s in statements)
+    assert not any("events_p20260102" in s for s in statements)
+
+
+def test_busy_partition_is_skipped_and_the_rest_still_dropped():
+    class BusySession(RecordingSession):
+        async def execute(self, statement):
+            if str(statement) == "DROP TABLE events_p20260101":
+                raise RuntimeError("canceling statement due to lock timeout")
+            return await super().execute(statement)
+
+    statements = []
+    repo = EventRepository(lambda: BusySession(statements))
+    now = datetime(2026, 1, 4, tzinfo=timezone.utc)
+
+    dropped = asyncio.run(repo.drop_expired_partitions(now=now, lock_timeout_ms=250))
+
+    assert dropped == ["events_p20260102"]
+    assert "DROP TABLE events_p20260102" in statements
+    assert statements.count("SET LOCAL lock_timeout = '250ms'") == 2
+    assert not any("events_default" in s for s in statements if s.startswith("DROP"))
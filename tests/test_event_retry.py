@@ -0,0 +1,170 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.domain.schemas.events import Event, EventContext, EventStatus
+from app.services.event import EventProcessorWorkerPool
+from app.services.event_retry import RetryScheduler, RetrySweeper, backoff_delay
+
+
+def make_event(event_id="e1", **kwargs):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    fields = dict(
+        id=event_id,
+        event_type="DeleteAssets",
+        operation="OpDeleteAssets",
+        body="a1",
+        user_id="u1",
+        created_at=now,
+        expires_at=now + timedelta(days=1),
+    )
+    fields.update(kwargs)
+    return Event(**fields)
+
+
+class ClaimingRepo:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.claims = []
+
+    async def claim_due_retries(self, **kwargs):
+        self.claims.append(kwargs)
+        rows, self.rows = self.rows, []
+        return rows
+
+
+class Owner:
+    partitions = 16
+
+    def __init__(self, owned):
+        self.owned = set(owned)
+
+
+def test_backoff_delay_grows_and_is_capped():
+    delays = [backoff_delay(n, 10, 100, jitter=False) for n in range(1, 6)]
+    assert delays == [10, 20, 40, 80, 100]
+    for _ in range(100):
+        assert 20 <= backoff_delay(3, 10, 100) <= 40
+
+
+def test_scheduler_delivers_in_due_order():
+    async def scenario():
+        delivered = []
+
+        async def deliver(ctx):
+            delivered.append(ctx.event.id)
+
+        scheduler = RetryScheduler(deliver)
+        scheduler.start()
+        scheduler.schedule(EventContext(event=make_event("late")), 0.03)
+        scheduler.schedule(EventContext(event=make_event("early")), 0.01)
+        await asyncio.sleep(0.06)
+        assert delivered == ["early", "late"]
+        assert await scheduler.stop() == []
+
+    asyncio.run(scenario())
+
+
+
+def test_earlier_retry_wakes_the_scheduler_and_failures_do_not_stop_it():
+    async def scenario():
+        delivered = []
+
+        async def deliver(ctx):
+            delivered.append(ctx.event.id)
+            if ctx.event.id == "broken":
+                raise RuntimeError("queue closed")
+
+        scheduler = RetryScheduler(deliver)
+        scheduler.start()
+        scheduler.schedule(EventContext(event=make_event("late")), 60)
+        await asyncio.sleep(0)  # the scheduler now sleeps until "late" is due
+        scheduler.schedule(EventContext(event=make_event("broken")), 0)
+        scheduler.schedule(EventContext(event=make_event("next")), 0.01)
+        await asyncio.sleep(0.05)
+        assert delivered == ["broken", "next"]
+        assert scheduler.stats() == {
+            "scheduled": 1,
+            "total_scheduled": 3,
+            "total_delivered": 1,
+        }
+        remaining = await scheduler.stop()
+        assert [ctx.event.id for ctx in remaining] == ["late"]
+
+    asyncio.run(scenario())
+
+
+def test_stop_hands_back_waiting_retries_in_due_order():
+    async def scenario():
+        async def deliver(ctx):
+            raise AssertionError("nothing is due")
+
+        scheduler = RetryScheduler(deliver)
+        scheduler.start()
+        for event_id, delay in [("b", 20), ("c", 30), ("a", 10)]:
+            scheduler.schedule(EventContext(event=make_event(event_id)), delay)
+        remaining = await scheduler.stop()
+        assert [ctx.event.id for ctx in remaining] == ["a", "b", "c"]
+        assert scheduler.scheduled == 0
+
+    asyncio.run(scenario())
+
+def test_sweeper_claims_only_owned_partitions():
+    async def scenario():
+        repo = ClaimingRepo()
+        delivered = []
+
+        async def deliver(ctx):
+            delivered.append(ctx)
+
+        sweeper = RetrySweeper(repo, deliver, ownership=Owner([]))
+        assert await sweeper.run_once() == 0
+        assert repo.claims == []
+
+        sweeper.ownership = Owner([7, 3])
+        await sweeper.run_once()
+        assert repo.claims[-1]["partitions"] == 16
+        assert repo.claims[-1]["owned"] == [3, 7]
+
+        sweeper.ownership = None
+        await sweeper.run_once()
+        assert repo.claims[-1]["partitions"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_recovered_retry_already_queued_is_not_delivered_twice():
+    async def scenario():
+        repo = ClaimingRepo([make_event("e1")])
+        pool = EventProcessorWorkerPool(repo, asset_repo=None, max_workers=1)
+        await pool.add_event(EventContext(event=make_event("e1")))
+        assert pool.is_active("e1")
+
+        assert await pool.retry_sweeper.run_once() == 1
+        assert pool.lanes.qsize() == 1
+
+        repo.rows = [make_event("e2")]
+        await pool.retry_sweeper.run_once()
+        assert pool.lanes.qsize() == 2
+
+    asyncio.run(scenario())
+
+
+def test_retry_handed_back_from_memory_is_leased_in_the_db():
+    async def scenario():
+        pool = EventProcessorWorkerPool(
+            ClaimingRepo(),
+            asset_repo=None,
+            max_workers=1,
+            retry_claim_lease_seconds=300,
+        )
+        ctx = EventContext(event=make_event("e1", retry_count=2))
+        await pool._redeliver_retry(ctx)
+
+        row = pool.status_writer._pending["e1"]
+        assert row["status"] == EventStatus.PENDING.value
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        lease = row["next_attempt_at"] - now
+        assert timedelta(seconds=290) < lease <= timedelta(seconds=300)
+        assert pool.lanes.holds("e1")
+
+    asyncio.run(scenario())
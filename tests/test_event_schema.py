@@ -0,0 +1,55 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.domain.schemas.events import EventContext, parse_debezium_timestamp
+
+CREATED = datetime(2026, 3, 1, 12, 30, 15, 250000)
+CREATED_MICROS = int(CREATED.replace(tzinfo=timezone.utc).timestamp() * 1_000_000)
+
+
+def test_micro_timestamp_is_naive_utc():
+    assert parse_debezium_timestamp(CREATED_MICROS) == CREATED
+
+
+def test_iso_timestamp_with_offset_is_naive_utc():
+    parsed = parse_debezium_timestamp("2026-03-01T14:30:15.25+02:00")
+    assert parsed == CREATED
+
+
+def test_millisecond_string_is_naive_utc():
+    assert parse_debezium_timestamp(str(CREATED_MICROS // 1000)) == CREATED
+
+
+def test_debezium_event_timestamps_compare_with_naive_columns():
+    ctx = EventContext.from_debezium_after(
+        {
+            "id": "e1",
+            "event_type": "DeleteAssets",
+            "operation": "OpDeleteAssets",
+            "body": "a1",
+            "created_at": CREATED_MICROS,
+            "expires_at": CREATED_MICROS + 86_400_000_000,
+        }
+    )
+    assert ctx.event.created_at.tzinfo is None
+    assert ctx.event.expires_at - ctx.event.created_at == timedelta(days=1)
+    # what the repository binds against naive ``timestamp`` columns
+    assert ctx.event.created_at - timedelta(days=7) < CREATED
+
+
+@pytest.mark.parametrize("value", ["not a timestamp", "2026-13-45T99:00:00"])
+def test_unparseable_timestamp_falls_back_to_now_in_naive_utc(monkeypatch, value):
+    # a host far from UTC: local now would be hours off
+    monkeypatch.setenv("TZ", "Pacific/Kiritimati")
+    time.tzset()
+    try:
+        parsed = parse_debezium_timestamp(value)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+    assert parsed.tzinfo is None
+    utc_now = datetime.now(timezone.utc).replace(tzinfo=None)
+    assert abs(utc_now - parsed) < timedelta(seconds=5)
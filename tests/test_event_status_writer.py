@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services.event import EventStatusWriter
+
+
+class StatusRepo:
+    def __init__(self, fail=0):
+        self.batches = []
+        self.fail = fail
+
+    async def bulk_update_status_and_times(self, rows):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("db down")
+        self.batches.append([dict(row) for row in rows])
+        return len(rows)
+
+
+def test_transitions_coalesce_to_one_row_per_event():
+    repo = StatusRepo()
+    writer = EventStatusWriter(repo)
+    writer.submit("e1", "EXECUTING", wait_time=3)
+    writer.submit("e1", "COMPLETED", completed_in_seconds=7)
+    writer.submit("e2", "EXECUTING")
+
+    assert asyncio.run(writer.flush()) == 2
+
+    (batch,) = repo.batches
+    rows = {row["id"]: row for row in batch}
+    # latest status wins, fields set earlier are kept
+    assert rows["e1"]["status"] == "COMPLETED"
+    assert rows["e1"]["wait_time"] == 3
+    assert rows["e1"]["completed_in_seconds"] == 7
+    assert rows["e2"]["status"] == "EXECUTING"
+
+
+def test_flush_is_split_by_max_batch_size():
+    repo = StatusRepo()
+    writer = EventStatusWriter(repo, max_batch_size=2)
+    for i in range(5):
+        writer.submit(f"e{i}", "COMPLETED")
+
+    assert asyncio.run(writer.flush()) == 5
+    assert [len(batch) for batch in repo.batches] == [2, 2, 1]
+
+
+def test_failed_flush_requeues_under_newer_transitions():
+    repo = StatusRepo(fail=1)
+    writer = EventStatusWriter(repo)
+    flushed = []
+    retry_at = datetime(2026, 1, 1)
+    writer.submit(
+        "e1",
+        "PENDING",
+        retry_count=1,
+        next_attempt_at=retry_at,
+        on_flushed=lambda: flushed.append("e1"),
+    )
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(writer.flush())
+    assert writer.stats()["flush_errors"] == 1
+    assert flushed == []
+
+    # submitted while the batch was out: merged on top of the requeued row
+    writer.submit("e1", "EXECUTING")
+    assert asyncio.run(writer.flush()) == 1
+
+    (row,) = repo.batches[0]
+    assert row["status"] == "EXECUTING"
+    assert row["retry_count"] == 1
+    assert row["next_attempt_at"] == retry_at
+    # the callback survives the failure and runs once the write lands
+    assert flushed == ["e1"]
+
+
+def test_full_batch_wakes_the_flusher_early():
+    async def scenario():
+        repo = StatusRepo()
+        writer = EventStatusWriter(repo, flush_interval_ms=60_000, max_batch_size=2)
+        writer.start()
+        writer.submit("e1", "COMPLETED")
+        writer.submit("e2", "COMPLETED")
+        for _ in range(50):
+            if repo.batches:
+                break
+            await asyncio.sleep(0.01)
+        await writer.stop()
+        return repo.batches
+
+    assert [len(batch) for batch in asyncio.run(scenario())] == [2]
@@ -0,0 +1,61 @@
+from app.core.metrics import Counter, Gauge, Histogram, Registry, stats_collector
+
+
+def test_render_counter_gauge_and_histogram():
+    registry = Registry()
+    requests = Counter("requests", "Requests", ["route"], registry=registry)
+    depth = Gauge("queue_depth", "Queue depth", registry=registry)
+    latency = Histogram(
+        "latency_seconds", "Latency", buckets=(0.1, 1.0), registry=registry
+    )
+
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    depth.set(7)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/a"} 3' in lines
+    assert "# TYPE queue_depth gauge" in lines
+    assert "queue_depth 7" in lines
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 5.55" in lines
+    assert "latency_seconds_count 3" in lines
+
+
+def test_stats_collector_exports_totals_as_counters():
+    registry = Registry()
+    stats = {"pending": 4, "total_flushed": 10, "flush_errors": 1, "healthy": True}
+    registry.register_collector(
+        stats_collector("writer", "Writer", lambda: stats, counters=("flush_errors",))
+    )
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE writer_pending gauge" in lines
+    assert "writer_pending 4" in lines
+    assert "# TYPE writer_flushed_total counter" in lines
+    assert "writer_flushed_total 10" in lines
+    assert "# TYPE writer_flush_errors_total counter" in lines
+    assert "writer_flush_errors_total 1" in lines
+    assert not any("writer_total_flushed" in line for line in lines)
+    assert not any("healthy" in line for line in lines)
+
+
+def test_collectors_register_once_and_unregister():
+    registry = Registry()
+    collector = stats_collector("db", "Database", lambda: {"total_queries": 3})
+
+    registry.register_collector(collector)
+    registry.register_collector(collector)
+    assert registry.render().count("db_queries_total 3") == 1
+
+    registry.unregister_collector(collector)
+    assert "db_queries_total" not in registry.render()